@@ -1,17 +1,62 @@
 #!/usr/bin/env python3
 """FastAPI REST API for Universal On-Chain Balance Tracker"""
 
-from fastapi import FastAPI, Query, HTTPException
-from fastapi.responses import JSONResponse
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from typing import Optional, List
 
-from app.validators import detect_address_type, validate_evm_address, validate_solana_address
-from app.chains.evm import get_all_evm_balances, EVM_NETWORKS
-from app.chains.solana import get_solana_balances
-from app.models import BalanceResponse, ErrorResponse
-from app.config import SOLANA_CONFIG
+from app.validators import INVALID_ADDRESS_MESSAGE, normalize_address, validate_addresses
+from app.batch import resolve_network_filter, stream_balances
+from app.planner import check_token_filter, execute_plan, plan_balances
+from app.cache import NEGATIVE_CACHE
+from app.chains.registry import ClientRegistry
+from app.models import (
+    BalanceResponse,
+    BatchBalanceRequest,
+    BatchValidateRequest,
+    ErrorResponse,
+    WatchlistRequest,
+    to_json,
+)
+from app.config import EVM_NETWORKS, SOLANA_CONFIG, BATCH_MAX_ADDRESSES, METRICS_ENABLED, VALIDATE_MAX_ADDRESSES
+from app import metrics
+from app.timings import span, trace
+from app.watchlist import Watchlist
+
+
+class ModelResponse(JSONResponse):
+    """
+    JSON response rendered straight from a pydantic model
+
+    Returning it skips FastAPI's response_model handling (dump to a dict,
+    validate again, encode with the stdlib json module); the declared
+    response_model still documents the schema.
+    """
+
+    def render(self, content: BalanceResponse) -> bytes:
+        return to_json(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared client registry on startup and close it on shutdown"""
+    registry = ClientRegistry()
+    # A server handles every chain, so build all clients before serving
+    await registry.start(preload=True)
+    app.state.registry = registry
+    app.state.watchlist = Watchlist(registry)
+    app.state.watchlist.start()
+    try:
+        yield
+    finally:
+        await app.state.watchlist.stop()
+        await registry.close()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -19,7 +64,8 @@ app = FastAPI(
     description="REST API for checking wallet balances across multiple blockchains (EVM + Solana)",
     version="1.0.0",
     docs_url="/",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -32,6 +78,26 @@ app.add_middleware(
 )
 
 
+if METRICS_ENABLED:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        """Record per-route latency and in-flight requests"""
+        metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+            # The route template keeps label cardinality bounded
+            route = request.scope.get("route")
+            metrics.HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, getattr(route, "path", "unmatched"), request.method, str(status)
+            )
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint"""
@@ -66,10 +132,55 @@ async def get_supported_networks():
     }
 
 
+@app.get("/cache/stats", tags=["Info"])
+async def get_cache_stats(request: Request):
+    """Balance cache hit/miss counters and occupancy, and negative cache skip counters"""
+    cache = request.app.state.registry.cache
+    negative = {"enabled": True, **NEGATIVE_CACHE.stats()} if NEGATIVE_CACHE is not None else {"enabled": False}
+    if cache is None:
+        return {"enabled": False, "negative": negative}
+    return {"enabled": True, **cache.stats(), "negative": negative}
+
+
+@app.get("/metrics", tags=["Info"])
+async def get_metrics(request: Request):
+    """
+    Metrics in the Prometheus text format
+
+    Request latency per route, RPC latency and errors per network and
+    method, in-flight requests, per-endpoint rate and concurrency limits
+    and balance cache counters. Returns 404 unless METRICS_ENABLED is set.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+
+    registry = request.app.state.registry
+    extra = metrics.endpoint_limit_metrics(registry.endpoint_stats())
+    if registry.cache is not None:
+        extra += metrics.cache_metrics(registry.cache.stats())
+    return PlainTextResponse(metrics.render(extra), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/rpc/stats", tags=["Info"])
+async def get_rpc_stats(request: Request):
+    """Latency and health of every configured RPC endpoint"""
+    return request.app.state.registry.endpoint_stats()
+
+
+@app.get("/rpc/queues", tags=["Info"])
+async def get_rpc_queues(request: Request):
+    """Queued requests, slots held and average wait per priority class of every network client"""
+    return request.app.state.registry.queue_stats()
+
+
 @app.get("/balances", response_model=BalanceResponse, tags=["Balances"])
 async def get_balances(
+    request: Request,
     address: str = Query(..., description="Wallet address (EVM or Solana)"),
-    networks: Optional[str] = Query(None, description="Comma-separated list of networks (e.g., 'ethereum,polygon,solana')")
+    networks: Optional[str] = Query(None, description="Comma-separated list of networks (e.g., 'ethereum,polygon,solana')"),
+    tokens: Optional[str] = Query(None, description="Comma-separated token symbols or contract/mint addresses (e.g., 'USDC,USDT')"),
+    discover: bool = Query(False, description="Solana only: return every SPL/Token-2022 holding, not just popular tokens"),
+    timings: bool = Query(False, description="Attach a per-network, per-RPC-call timing breakdown")
 ):
     """
     Get wallet balances across all supported networks or specific networks
@@ -77,66 +188,32 @@ async def get_balances(
     **Parameters:**
     - **address**: Wallet address (EVM format: 0x... or Solana format: base58)
     - **networks**: (Optional) Comma-separated list of networks to check
+    - **tokens**: (Optional) Comma-separated tokens to read; only these are
+      queried, and native balances are always included
+    - **discover**: (Optional) Discover all Solana token holdings
+    - **timings**: (Optional) Include a `timings` span tree covering validation,
+      each network, each RPC call and its queueing, and serialization
 
     **Examples:**
     - `/balances?address=0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb`
     - `/balances?address=0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb&networks=ethereum,polygon`
+    - `/balances?address=0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb&tokens=USDC,USDT`
     - `/balances?address=9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM`
+    - `/balances?address=9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM&discover=true`
+    - `/balances?address=0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb&timings=true`
     """
     try:
-        # Detect address type
-        address_type = detect_address_type(address)
-
-        if address_type == "unknown":
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid address format. Must be valid EVM (0x...) or Solana (base58) address."
-            )
-
-        all_balances = []
-
-        # Parse network filter
-        network_filter = None
-        if networks:
-            network_filter = [n.strip().lower() for n in networks.split(",")]
-
-        # Get EVM balances
-        if address_type == "evm":
-            is_valid, result = validate_evm_address(address)
-            if not is_valid:
-                raise HTTPException(status_code=400, detail=f"Invalid EVM address: {result}")
-
-            address = result  # Use checksum address
-
-            # Get balances for specific networks or all
-            if network_filter:
-                for network_key in EVM_NETWORKS.keys():
-                    if network_key in network_filter or EVM_NETWORKS[network_key]["name"].lower() in network_filter:
-                        from app.chains.evm import EVMClient
-                        client = EVMClient(network_key)
-                        balance = client.get_all_balances(address)
-                        all_balances.append(balance)
-            else:
-                evm_balances = get_all_evm_balances(address)
-                all_balances.extend(evm_balances)
-
-        # Get Solana balances
-        if address_type == "solana":
-            is_valid, result = validate_solana_address(address)
-            if not is_valid:
-                raise HTTPException(status_code=400, detail=f"Invalid Solana address: {result}")
-
-            # Check if Solana is in filter or no filter specified
-            if not network_filter or "solana" in network_filter:
-                solana_balance = get_solana_balances(address)
-                all_balances.append(solana_balance)
-
-        return BalanceResponse(
-            address=address,
-            networks=all_balances,
-            total_networks_checked=len(all_balances),
-            success=True
-        )
+        registry: ClientRegistry = request.app.state.registry
+        watchlist: Watchlist = request.app.state.watchlist
+        if not timings:
+            return ModelResponse(await build_balance_response(registry, watchlist, address, networks, tokens, discover))
+
+        with trace("balances") as request_span:
+            response = await build_balance_response(registry, watchlist, address, networks, tokens, discover)
+            with span("serialize"):
+                content = response.model_dump(mode="json")
+        content["timings"] = request_span.to_dict()
+        return JSONResponse(content=content)
 
     except HTTPException:
         raise
@@ -144,6 +221,88 @@ async def get_balances(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+async def build_balance_response(registry: ClientRegistry, watchlist: Watchlist, address: str,
+                                 networks: Optional[str], tokens: Optional[str], discover: bool) -> BalanceResponse:
+    """Validate the address, plan the query and answer from the watchlist snapshot or by running the plan"""
+    # Detect the address type and normalize it once
+    try:
+        with span("validate"):
+            wallet = normalize_address(address)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=INVALID_ADDRESS_MESSAGE)
+
+    # Parse network filter
+    network_filter = None
+    if networks:
+        network_filter = [n.strip().lower() for n in networks.split(",")]
+    evm_keys, include_solana = resolve_network_filter(network_filter)
+
+    # Only the filtered networks and tokens are read
+    try:
+        with span("plan"):
+            plan = plan_balances([wallet], evm_keys, include_solana, tokens, discover)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Watched addresses are answered from the background-refreshed snapshot
+    if not (wallet.kind == "solana" and (discover or not include_solana)):
+        with span("snapshot") as snapshot_span:
+            snapshot = watchlist.snapshot(wallet, evm_keys if wallet.kind == "evm" else None)
+            snapshot_span.set("hit", snapshot is not None)
+        if snapshot is not None:
+            balances, age = snapshot
+            balances = [network.select(balance) for network, balance in zip(plan.networks, balances)]
+            return BalanceResponse(
+                address=wallet,
+                networks=balances,
+                total_networks_checked=len(balances),
+                success=True,
+                snapshot_age_seconds=round(age, 3)
+            )
+
+    # Query the networks concurrently
+    response, = await execute_plan(registry, plan)
+    return response
+
+
+@app.post("/balances/batch", tags=["Balances"])
+async def get_balances_batch(request: Request, body: BatchBalanceRequest):
+    """
+    Get balances for many addresses, streamed as NDJSON
+
+    Addresses of the same type share RPC batches, and one JSON line (a
+    BalanceResponse) is written per address as soon as it completes, in
+    completion order. Invalid addresses produce a line with
+    `success: false` and do not abort the stream.
+
+    **Body:**
+    - **addresses**: EVM and/or Solana addresses
+    - **networks**: (Optional) Networks to check, e.g. `["ethereum", "solana"]`
+    - **tokens**: (Optional) Tokens to read, e.g. `["USDC", "USDT"]`
+    - **discover**: (Optional) Discover all Solana token holdings
+    """
+    if len(body.addresses) > BATCH_MAX_ADDRESSES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many addresses: {len(body.addresses)} (maximum {BATCH_MAX_ADDRESSES})"
+        )
+
+    evm_keys, include_solana = resolve_network_filter(body.networks)
+    try:
+        check_token_filter(body.tokens, evm_keys, include_solana, body.discover)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    registry: ClientRegistry = request.app.state.registry
+
+    async def ndjson_lines():
+        async for response in stream_balances(registry, body.addresses, body.networks, body.discover,
+                                              tokens=body.tokens):
+            yield to_json(response) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 @app.get("/validate", tags=["Validation"])
 async def validate_address(address: str = Query(..., description="Address to validate")):
     """
@@ -157,35 +316,120 @@ async def validate_address(address: str = Query(..., description="Address to val
     - Validation status
     - Checksum address (for EVM)
     """
-    address_type = detect_address_type(address)
-
-    if address_type == "evm":
-        is_valid, result = validate_evm_address(address)
-        return {
-            "valid": is_valid,
-            "type": "evm",
-            "checksum_address": result if is_valid else None,
-            "message": result if is_valid else "Invalid EVM address"
-        }
-    elif address_type == "solana":
-        is_valid, result = validate_solana_address(address)
-        return {
-            "valid": is_valid,
-            "type": "solana",
-            "address": result if is_valid else None,
-            "message": result if is_valid else "Invalid Solana address"
-        }
-    else:
+    try:
+        wallet = normalize_address(address)
+    except ValueError:
         return {
             "valid": False,
             "type": "unknown",
             "message": "Unknown address format"
         }
 
+    if wallet.kind == "evm":
+        return {
+            "valid": True,
+            "type": "evm",
+            "checksum_address": wallet,
+            "message": wallet
+        }
+    return {
+        "valid": True,
+        "type": "solana",
+        "address": wallet,
+        "message": wallet
+    }
+
+
+@app.post("/validate/batch", tags=["Validation"])
+async def validate_addresses_batch(body: BatchValidateRequest):
+    """
+    Validate many addresses and detect their types
+
+    Results are returned in input order. Each entry holds the input
+    address, its type (evm, solana, or unknown), the validation status and
+    either the normalized address or the reason it is invalid.
+
+    **Body:**
+    - **addresses**: Addresses to validate
+    """
+    if len(body.addresses) > VALIDATE_MAX_ADDRESSES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many addresses: {len(body.addresses)} (maximum {VALIDATE_MAX_ADDRESSES})"
+        )
+
+    results = []
+    valid_count = 0
+    for address, (valid, message) in zip(body.addresses, validate_addresses(body.addresses)):
+        if valid:
+            valid_count += 1
+            results.append({"address": address, "valid": True, "type": message.kind, "normalized": message.canonical})
+        else:
+            results.append({"address": address, "valid": False, "type": "unknown", "message": message})
+
+    # Built as plain dicts and serialized directly; large batches would
+    # otherwise spend most of their time in response-model encoding
+    return JSONResponse(content={
+        "results": results,
+        "total": len(results),
+        "valid": valid_count,
+        "invalid": len(results) - valid_count
+    })
+
+
+@app.get("/watchlist", tags=["Watchlist"])
+async def get_watchlist(request: Request):
+    """Watched addresses and per-chain refresh counters"""
+    watchlist: Watchlist = request.app.state.watchlist
+    return {**watchlist.stats(), "watched": watchlist.addresses()}
+
+
+@app.post("/watchlist", tags=["Watchlist"])
+async def add_to_watchlist(request: Request, body: WatchlistRequest):
+    """
+    Watch addresses
+
+    Watched addresses are refreshed in the background at block-time cadence
+    (less often while their balances do not change), and `/balances` answers
+    them from memory with a `snapshot_age_seconds` field.
+
+    **Body:**
+    - **addresses**: Addresses to watch (EVM and Solana may be mixed)
+    """
+    watchlist: Watchlist = request.app.state.watchlist
+
+    valid = []
+    invalid = []
+    for address, (is_valid, message) in zip(body.addresses, validate_addresses(body.addresses)):
+        if is_valid:
+            valid.append(message)
+        else:
+            invalid.append(address)
+
+    new = {wallet for wallet in valid if wallet not in watchlist}
+    if len(watchlist) + len(new) > watchlist.max_addresses:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many watched addresses: {len(watchlist) + len(new)} (maximum {watchlist.max_addresses})"
+        )
+
+    added = sum(watchlist.add(wallet) for wallet in valid)
+    return {"added": added, "invalid": invalid, "total": len(watchlist)}
+
+
+@app.delete("/watchlist/{address}", tags=["Watchlist"])
+async def remove_from_watchlist(request: Request, address: str):
+    """Stop watching an address"""
+    if not request.app.state.watchlist.remove(address):
+        raise HTTPException(status_code=404, detail="Address is not watched")
+    return {"removed": address}
+
 
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    """Custom 404 handler"""
+    """Custom 404 handler for unknown endpoints; 404s raised by a route keep their detail"""
+    if isinstance(exc, HTTPException):
+        return await http_exception_handler(request, exc)
     return JSONResponse(
         status_code=404,
         content={
@@ -0,0 +1,162 @@
+"""Streaming balance lookups for large batches of addresses"""
+
+import asyncio
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .chains.registry import ClientRegistry
+from .chains.scheduler import BULK, priority
+from .config import EVM_NETWORKS, BATCH_CHUNK_SIZE, BATCH_CONCURRENCY
+from .models import BalanceResponse
+from .planner import QueryPlan, check_token_filter, execute_plan, plan_balances
+from .validators import INVALID_ADDRESS_MESSAGE, normalize_address
+
+
+def resolve_network_filter(network_filter: Optional[Sequence[str]]) -> Tuple[List[str], bool]:
+    """
+    Resolve a user-supplied network filter
+
+    Args:
+        network_filter: Network keys or names (case-insensitive), or None for all
+
+    Returns:
+        Tuple of (EVM network keys to query, whether to query Solana)
+    """
+    if not network_filter:
+        return list(EVM_NETWORKS.keys()), True
+
+    wanted = {n.strip().lower() for n in network_filter}
+    evm_keys = [
+        network_key for network_key, config in EVM_NETWORKS.items()
+        if network_key in wanted or config["name"].lower() in wanted
+    ]
+    return evm_keys, "solana" in wanted
+
+
+def _error(address: str, error: str) -> BalanceResponse:
+    return BalanceResponse(
+        address=address,
+        networks=[],
+        total_networks_checked=0,
+        success=False,
+        error=error
+    )
+
+
+def _chunks(addresses: Iterable[str], chunk_size: int) -> Iterator[Tuple[Optional[str], List[str]]]:
+    """
+    Group addresses into same-type chunks of chunk_size, in input order
+
+    Yields (address type, normalized addresses) whenever a chunk fills,
+    then the partial chunks; an invalid address is yielded at once as
+    (None, [address]).
+    """
+    buffers = {"evm": [], "solana": []}
+    for address in addresses:
+        address = address.strip()
+        try:
+            wallet = normalize_address(address)
+        except ValueError:
+            yield None, [address]
+            continue
+
+        buffers[wallet.kind].append(wallet)
+        if len(buffers[wallet.kind]) >= chunk_size:
+            yield wallet.kind, buffers[wallet.kind]
+            buffers[wallet.kind] = []
+
+    for address_type, chunk in buffers.items():
+        if chunk:
+            yield address_type, chunk
+
+
+def plan_batch(
+    addresses: Iterable[str],
+    network_filter: Optional[Sequence[str]] = None,
+    tokens: Optional[Sequence[str]] = None,
+    discover: bool = False,
+    chunk_size: int = BATCH_CHUNK_SIZE
+) -> List[QueryPlan]:
+    """
+    The plans stream_balances would run, one per chunk (for dry runs)
+
+    Raises:
+        ValueError: If a filtered token exists on none of the selected networks
+    """
+    evm_keys, include_solana = resolve_network_filter(network_filter)
+    return [plan_balances(chunk, evm_keys, include_solana, tokens, discover) for _, chunk in _chunks(addresses, chunk_size)]
+
+
+async def _fetch_chunk(registry: ClientRegistry, plan: QueryPlan) -> List[BalanceResponse]:
+    """Run the plan of one chunk of same-type addresses, as bulk-priority traffic"""
+    try:
+        with priority(BULK):
+            return await execute_plan(registry, plan)
+    except Exception as e:
+        return [_error(address, f"Internal error: {str(e)}") for address in plan.inputs]
+
+
+async def stream_balances(
+    registry: ClientRegistry,
+    addresses: Iterable[str],
+    network_filter: Optional[Sequence[str]] = None,
+    discover: bool = False,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    concurrency: int = BATCH_CONCURRENCY,
+    tokens: Optional[Sequence[str]] = None
+) -> AsyncIterator[BalanceResponse]:
+    """
+    Look up balances for many addresses, yielding each result as it completes
+
+    Valid addresses are grouped by type into chunks of chunk_size, and each
+    chunk is planned and run as one query (see app.planner), so its
+    addresses share RPC batches: Multicall3 calls on EVM networks,
+    getMultipleAccounts on Solana. At most `concurrency` chunks are in
+    flight, so memory use does not grow with the number of addresses.
+    Invalid addresses are reported inline and never abort the stream.
+
+    Args:
+        registry: Started client registry
+        addresses: Wallet addresses (EVM and Solana may be mixed)
+        network_filter: Network keys or names to query (default: all)
+        discover: Discover all Solana token holdings
+        chunk_size: Addresses per shared RPC batch
+        concurrency: Maximum chunks fetched at the same time
+        tokens: Token filter (symbols or contract/mint addresses; default: all)
+
+    Yields:
+        One BalanceResponse per input address, in completion order
+
+    Raises:
+        ValueError: If a filtered token exists on none of the selected networks
+    """
+    evm_keys, include_solana = resolve_network_filter(network_filter)
+    check_token_filter(tokens, evm_keys, include_solana, discover)
+    pending = set()
+
+    try:
+        for address_type, chunk in _chunks(addresses, chunk_size):
+            if address_type is None:
+                yield _error(chunk[0], INVALID_ADDRESS_MESSAGE)
+                continue
+
+            plan = plan_balances(chunk, evm_keys, include_solana, tokens, discover)
+            pending.add(asyncio.ensure_future(_fetch_chunk(registry, plan)))
+
+            # Drain finished chunks before reading further input
+            while len(pending) >= concurrency:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    for response in task.result():
+                        yield response
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+                for response in task.result():
+                    yield response
+
+    finally:
+        # The consumer may stop early (e.g. client disconnect)
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,351 @@
+"""Block-aware in-process cache of NetworkBalance results"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from .config import (
+    EVM_NETWORKS,
+    SOLANA_CONFIG,
+    CACHE_MAX_SIZE,
+    CACHE_TTL_BLOCKS,
+    NEGATIVE_CACHE_ENABLED,
+    NEGATIVE_CACHE_MAX_SIZE,
+    NEGATIVE_CACHE_TTLS,
+)
+from .models import NetworkBalance
+
+# (network_key, address, token set); an empty token set means the default tokens
+CacheKey = Tuple[str, str, Tuple[str, ...]]
+
+T = TypeVar("T")
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "head")
+
+    def __init__(self, value: NetworkBalance, expires_at: float, head: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.head = head
+
+
+class BalanceCache:
+    """
+    Bounded LRU cache of NetworkBalance results
+
+    Entries expire after a per-chain TTL derived from the chain's block time,
+    and are also treated as stale as soon as a newer block (or slot) has been
+    observed for their chain. Concurrent misses for the same key share one
+    in-flight fetch.
+    """
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl_blocks: float = CACHE_TTL_BLOCKS):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of entries before LRU eviction
+            ttl_blocks: Entry lifetime measured in block times of its chain
+        """
+        self.max_size = max_size
+        self.ttls: Dict[str, float] = {
+            network_key: config["block_time"] * ttl_blocks
+            for network_key, config in EVM_NETWORKS.items()
+        }
+        self.ttls["solana"] = SOLANA_CONFIG["block_time"] * ttl_blocks
+
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._heads: Dict[str, int] = {}
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(network_key: str, address: str, tokens: Sequence[str] = ()) -> CacheKey:
+        """Build a cache key for a network, address and token set"""
+        return network_key, address, tuple(tokens)
+
+    def observe_head(self, network_key: str, head: int):
+        """
+        Record a new chain head
+
+        Every entry of the chain stored at an older head becomes stale.
+        """
+        if head > self._heads.get(network_key, -1):
+            self._heads[network_key] = head
+
+    def head(self, network_key: str) -> int:
+        """Latest observed head of a chain, or -1 if none was seen yet"""
+        return self._heads.get(network_key, -1)
+
+    def _lookup(self, key: CacheKey) -> Optional[NetworkBalance]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= time.monotonic() or entry.head < self._heads.get(key[0], -1):
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def get(self, key: CacheKey) -> Optional[NetworkBalance]:
+        """Get a fresh cached value, counting the hit or miss"""
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: CacheKey, value: NetworkBalance, head: int):
+        """
+        Store a value, evicting the least recently used entries if full
+
+        Args:
+            key: Cache key
+            value: Fetched value
+            head: Block (or slot) the value was read at, else head() of the
+                chain taken before the fetch started; the value is stale once
+                a newer head is observed, even one seen while the fetch was
+                in flight
+        """
+        self._put(key, value, head)
+
+    def _put(self, key: CacheKey, value: NetworkBalance, head: int, ttl: Optional[float] = None):
+        ttl = self.ttls.get(key[0], 0) if ttl is None else ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+
+        self._entries[key] = _Entry(value, time.monotonic() + ttl, head)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(self, key: CacheKey,
+                           fetch: Callable[[], Awaitable[Tuple[NetworkBalance, Optional[int]]]]) -> NetworkBalance:
+        """
+        Return the cached value or fetch it, sharing concurrent fetches
+
+        Args:
+            key: Cache key
+            fetch: Coroutine factory producing, on a miss, the value and the
+                block it was read at (None if unknown: the head from before
+                the fetch is used instead)
+
+        Returns:
+            Cached or freshly fetched NetworkBalance
+
+        Raises:
+            Exception: Whatever fetch raised; failures are not cached
+        """
+        while True:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not this waiter: fetch again, or join a newer fetch
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        head = self.head(key[0])
+        try:
+            value, read_at = await fetch()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Waiters re-raise it; mark it retrieved when there are none
+                future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        self.set(key, value, head if read_at is None else read_at)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        """Drop every entry"""
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and occupancy"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
+
+
+class _EmptyTokens:
+    __slots__ = ("mask", "expires_at")
+
+    def __init__(self, mask: int, expires_at: float):
+        self.mask = mask
+        self.expires_at = expires_at
+
+
+class NegativeCache:
+    """
+    Bounded LRU of the tokens each wallet was seen not to hold
+
+    Tokens are identified by their index in the network's token list
+    (TOKENS.for_network, or the popular tokens on Solana) and stored as a
+    bitmask per (network, address), so even long token lists cost a few
+    bytes per wallet. Known-empty tokens are skipped until the entry
+    expires after its chain's TTL; the next lookup then probes every token
+    again and starts a new entry.
+    """
+
+    def __init__(self, max_size: int = NEGATIVE_CACHE_MAX_SIZE, ttls: Optional[Dict[str, float]] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of wallets before LRU eviction
+            ttls: Seconds known-empty tokens are skipped, per network key
+        """
+        self.max_size = max_size
+        self.ttls = dict(NEGATIVE_CACHE_TTLS if ttls is None else ttls)
+        self._entries: "OrderedDict[Tuple[str, str], _EmptyTokens]" = OrderedDict()
+        self.skipped = 0
+        self.probed = 0
+
+    def probes(self, network_key: str, address: str, count: int,
+               candidates: Optional[Sequence[int]] = None) -> Optional[List[int]]:
+        """
+        Token indices still worth probing for a wallet
+
+        Args:
+            network_key: Network identifier
+            address: Wallet address
+            count: Number of tokens in the network's token list
+            candidates: Only consider these token indices (e.g. a token filter)
+
+        Returns:
+            Indices not known to be empty, or None to probe every token
+        """
+        key = (network_key, address)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        considered = count if candidates is None else len(candidates)
+        if entry is None or not entry.mask:
+            self.probed += considered
+            return None if candidates is None else list(candidates)
+
+        self._entries.move_to_end(key)
+        # Bit i of the mask is character i of the reversed binary string
+        flags = format(entry.mask, "b")[::-1]
+        indices = [index for index in (range(count) if candidates is None else candidates)
+                   if flags[index:index + 1] != "1"]
+        self.probed += len(indices)
+        self.skipped += considered - len(indices)
+        return indices
+
+    def record(self, network_key: str, address: str, balances: Sequence[Optional[int]],
+               indices: Optional[Sequence[int]] = None):
+        """
+        Remember which probed tokens a wallet does not hold
+
+        Tokens added to a live entry share its expiry, so every token of a
+        wallet is re-checked together.
+
+        Args:
+            network_key: Network identifier
+            address: Wallet address
+            balances: Probed raw balances; None (a failed probe) is not cached
+            indices: Token indices of balances, as returned by probes()
+        """
+        ttl = self.ttls.get(network_key, 0)
+        if ttl <= 0 or self.max_size <= 0:
+            return
+
+        mask = 0
+        for position, balance in enumerate(balances):
+            if balance == 0:
+                mask |= 1 << (position if indices is None else indices[position])
+
+        key = (network_key, address)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            entry.mask |= mask
+            return
+        if not mask:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = _EmptyTokens(mask, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Occupancy and the share of token probes skipped"""
+        total = self.probed + self.skipped
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "probed": self.probed,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / total, 4) if total else 0.0
+        }
+
+
+def expand(values: Sequence[T], indices: Optional[Sequence[int]], count: int, fill: T) -> List[T]:
+    """
+    Spread probed values back over the full token list
+
+    Args:
+        values: Values of the probed tokens
+        indices: Their token indices, or None when every token was probed
+        count: Length of the full token list
+        fill: Value of the skipped (known-empty) tokens
+
+    Returns:
+        Values aligned with the full token list
+    """
+    if indices is None:
+        return list(values)
+    expanded = [fill] * count
+    for index, value in zip(indices, values):
+        expanded[index] = value
+    return expanded
+
+
+def oldest(blocks: Sequence[Optional[int]]) -> Optional[int]:
+    """Oldest block (or slot) several reads were served at, or None if any read did not report one"""
+    if not blocks or None in blocks:
+        return None
+    return min(blocks)
+
+
+NEGATIVE_CACHE: Optional[NegativeCache] = NegativeCache() if NEGATIVE_CACHE_ENABLED else None
@@ -1,6 +1,25 @@
-"""Blockchain clients"""
+"""Blockchain clients
 
-from .evm import EVMClient
-from .solana import SolanaClient
+Clients are imported on first access, so importing one chain backend does
+not load the libraries of the others.
+"""
 
-__all__ = ["EVMClient", "SolanaClient"]
+from importlib import import_module
+
+_CLIENT_MODULES = {
+    "EVMClient": ".evm",
+    "SolanaClient": ".solana",
+    "AsyncEVMClient": ".evm_async",
+    "AsyncSolanaClient": ".solana_async",
+}
+
+__all__ = ["EVMClient", "SolanaClient", "AsyncEVMClient", "AsyncSolanaClient"]
+
+
+def __getattr__(name: str):
+    module = _CLIENT_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    client = getattr(import_module(module, __name__), name)
+    globals()[name] = client
+    return client
@@ -1,32 +1,50 @@
 """EVM (Ethereum Virtual Machine) blockchain client"""
 
-from web3 import Web3
-from typing import Dict, List, Optional
+from decimal import Decimal, localcontext
+from typing import List, Optional, Sequence, Union
 import logging
-from ..config import EVM_NETWORKS, ERC20_ABI
+from ..cache import NEGATIVE_CACHE, NegativeCache, expand
+from ..config import EVM_NETWORKS, ERC20_ABI, METRICS_ENABLED, MULTICALL3_ADDRESS, MULTICALL_CHUNK_SIZE, USE_MULTICALL
+from ..metrics import web3_rpc_middleware
 from ..models import NetworkBalance, TokenBalance
-from ..tokens import POPULAR_TOKENS
+from ..tokens import TOKENS, Token
+from ..validators import normalize_evm_address
+from .multicall import build_balance_calls, chunk_calls, encode_aggregate3, decode_aggregate3, decode_uint256
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_WEI_PER_ETHER = Decimal(10 ** 18)
+
 
 class EVMClient:
     """Client for interacting with EVM-compatible blockchains"""
 
-    def __init__(self, network_key: str):
+    def __init__(self, network_key: str, rpc_url: Optional[str] = None, use_multicall: bool = USE_MULTICALL,
+                 negative_cache: Optional[NegativeCache] = NEGATIVE_CACHE):
         """
         Initialize EVM client for specific network
 
         Args:
             network_key: Network identifier (e.g., 'ethereum', 'polygon')
+            rpc_url: Override the configured RPC endpoint (e.g., a local node)
+            use_multicall: Batch all balance reads into one Multicall3 eth_call
+            negative_cache: Skips tokens a wallet was recently seen not to hold
         """
         if network_key not in EVM_NETWORKS:
             raise ValueError(f"Unsupported network: {network_key}")
 
         self.network_key = network_key
         self.config = EVM_NETWORKS[network_key]
-        self.w3 = Web3(Web3.HTTPProvider(self.config["rpc_url"]))
+        self.use_multicall = use_multicall
+        self.negative_cache = negative_cache
+
+        # web3 is only needed by this synchronous client; the async clients
+        # and the helpers below work without importing it
+        from web3 import Web3
+        self.w3 = Web3(Web3.HTTPProvider(rpc_url or self.config["rpc_url"]))
+        if METRICS_ENABLED:
+            self.w3.middleware_onion.add(web3_rpc_middleware(network_key), name="metrics")
 
         # Test connection
         try:
@@ -46,10 +64,9 @@ class EVMClient:
             Tuple of (raw_balance, formatted_balance)
         """
         try:
-            checksum_address = Web3.to_checksum_address(address)
+            checksum_address = normalize_evm_address(address)
             balance_wei = self.w3.eth.get_balance(checksum_address)
-            balance_formatted = self.w3.from_wei(balance_wei, 'ether')
-            return str(balance_wei), str(balance_formatted)
+            return str(balance_wei), format_native_balance(balance_wei)
         except Exception as e:
             logger.error(f"Error getting native balance on {self.network_key}: {e}")
             return "0", "0.0"
@@ -67,20 +84,93 @@ class EVMClient:
             Tuple of (raw_balance, formatted_balance)
         """
         try:
-            checksum_address = Web3.to_checksum_address(address)
-            token_checksum = Web3.to_checksum_address(token_address)
-
-            contract = self.w3.eth.contract(address=token_checksum, abi=ERC20_ABI)
-            balance = contract.functions.balanceOf(checksum_address).call()
-
-            # Format balance
-            balance_formatted = balance / (10 ** decimals)
-
-            return str(balance), f"{balance_formatted:.6f}".rstrip('0').rstrip('.')
+            balance = self._balance_of(address, token_address)
+            return str(balance), format_token_balance(balance, decimals)
         except Exception as e:
             logger.error(f"Error getting token balance for {token_address} on {self.network_key}: {e}")
             return "0", "0"
 
+    def _balance_of(self, address: str, token_address: str) -> int:
+        checksum_address = normalize_evm_address(address)
+        token_checksum = normalize_evm_address(token_address)
+        contract = self.w3.eth.contract(address=token_checksum, abi=ERC20_ABI)
+        return contract.functions.balanceOf(checksum_address).call()
+
+    def _probe_tokens(self, address: str, tokens: Sequence[Token]) -> List[Optional[int]]:
+        """balanceOf each token with its own call; failed calls are None"""
+        balances = []
+        for token in tokens:
+            try:
+                balances.append(self._balance_of(address, token.address))
+            except Exception as e:
+                logger.error(f"Error getting token balance for {token.address} on {self.network_key}: {e}")
+                balances.append(None)
+        return balances
+
+    def get_multicall_balances(self, address: str, token_addresses: Sequence[Union[str, bytes]]) -> tuple[Optional[int], List[Optional[int]]]:
+        """
+        Get native and ERC20 balances through Multicall3 aggregate3
+
+        Every sub-call is sent with allowFailure=True, so a reverting token
+        only yields None for that token instead of failing the whole batch.
+        Lists longer than MULTICALL_CHUNK_SIZE are split into several calls.
+
+        Args:
+            address: Wallet address
+            token_addresses: Checksummed or raw token contract addresses
+
+        Returns:
+            Tuple of (native_balance_wei, token_balances) where failed
+            sub-calls are None
+
+        Raises:
+            Exception: If the aggregate3 eth_call itself fails
+        """
+        checksum_address = normalize_evm_address(address)
+        calls = build_balance_calls(MULTICALL3_ADDRESS, checksum_address, token_addresses)
+
+        results = []
+        for chunk in chunk_calls(calls, MULTICALL_CHUNK_SIZE):
+            raw = self.w3.eth.call({
+                "to": normalize_evm_address(MULTICALL3_ADDRESS),
+                "data": encode_aggregate3(chunk)
+            })
+            results.extend(decode_uint256(success, data) for success, data in decode_aggregate3(raw))
+
+        return results[0], results[1:]
+
+    def _fetch_balances(self, address: str) -> tuple[str, str, List[tuple[str, str]]]:
+        """
+        Fetch native and token balances, batched through Multicall3 when enabled
+
+        Tokens the negative cache knows the wallet does not hold are not probed.
+        """
+        popular_tokens = TOKENS.for_network(self.network_key)
+        probed = probe_indices(self.negative_cache, self.network_key, address, len(popular_tokens))
+        if self.use_multicall:
+            try:
+                token_addresses = TOKENS.addresses(self.network_key)
+                native_wei, token_results = self.get_multicall_balances(
+                    address, token_addresses if probed is None else [token_addresses[index] for index in probed]
+                )
+                if self.negative_cache is not None:
+                    self.negative_cache.record(self.network_key, address, token_results, probed)
+                return format_multicall_results(
+                    self.network_key, popular_tokens, native_wei, expand(token_results, probed, len(popular_tokens), 0)
+                )
+            except Exception as e:
+                logger.warning(f"Multicall failed on {self.network_key}, falling back to individual calls: {e}")
+
+        native_raw, native_formatted = self.get_native_balance(address)
+        token_results = self._probe_tokens(
+            address, popular_tokens if probed is None else [popular_tokens[index] for index in probed]
+        )
+        if self.negative_cache is not None:
+            self.negative_cache.record(self.network_key, address, token_results, probed)
+        return native_raw, native_formatted, format_token_values(
+            popular_tokens, expand(token_results, probed, len(popular_tokens), 0)
+        )
+
     def get_all_balances(self, address: str) -> NetworkBalance:
         """
         Get all balances (native + popular tokens) for an address
@@ -92,55 +182,127 @@ class EVMClient:
             NetworkBalance object with all balances
         """
         try:
-            # Get native balance
-            native_raw, native_formatted = self.get_native_balance(address)
-
-            # Get token balances
-            token_balances = []
-            popular_tokens = POPULAR_TOKENS.get(self.network_key, [])
-
-            for token_info in popular_tokens:
-                raw_balance, formatted_balance = self.get_token_balance(
-                    address,
-                    token_info["address"],
-                    int(token_info["decimals"])
-                )
-
-                # Only include tokens with non-zero balance
-                if float(formatted_balance) > 0:
-                    token_balances.append(
-                        TokenBalance(
-                            symbol=token_info["symbol"],
-                            name=token_info["name"],
-                            balance=raw_balance,
-                            balance_formatted=formatted_balance,
-                            decimals=int(token_info["decimals"]),
-                            contract_address=token_info["address"]
-                        )
-                    )
-
-            return NetworkBalance(
-                network=self.config["name"],
-                chain_id=self.config["chain_id"],
-                native_token=self.config["native_token"],
-                native_balance=native_raw,
-                native_balance_formatted=native_formatted,
-                tokens=token_balances,
-                explorer_url=f"{self.config['explorer']}/address/{address}"
-            )
+            native_raw, native_formatted, token_values = self._fetch_balances(address)
+            return build_network_balance(self.network_key, address, native_raw, native_formatted, token_values)
 
         except Exception as e:
             logger.error(f"Error getting balances for {self.network_key}: {e}")
-            return NetworkBalance(
-                network=self.config["name"],
-                chain_id=self.config["chain_id"],
-                native_token=self.config["native_token"],
-                native_balance="0",
-                native_balance_formatted="0.0",
-                tokens=[],
-                explorer_url=f"{self.config['explorer']}/address/{address}"
+            return empty_network_balance(self.network_key, address)
+
+
+def format_native_balance(balance_wei: int) -> str:
+    """Format a native balance in wei as ether units (same output as Web3.from_wei)"""
+    if balance_wei == 0:
+        return "0"
+    with localcontext() as ctx:
+        ctx.prec = 999
+        return str(Decimal(balance_wei) / _WEI_PER_ETHER)
+
+
+def format_token_balance(balance: int, decimals: int) -> str:
+    """Format a raw token balance with up to 6 decimal places"""
+    balance_formatted = balance / (10 ** decimals)
+    return f"{balance_formatted:.6f}".rstrip('0').rstrip('.')
+
+
+def probe_indices(negative_cache: Optional[NegativeCache], network_key: str, address: str, count: int,
+                  candidates: Optional[Sequence[int]] = None) -> Optional[List[int]]:
+    """Token indices to probe for a wallet (among candidates, if given), or None for all of them"""
+    if negative_cache is None:
+        return None if candidates is None else list(candidates)
+    return negative_cache.probes(network_key, address, count, candidates)
+
+
+def format_token_values(tokens: Sequence[Token], balances: Sequence[Optional[int]]) -> List[tuple[str, str]]:
+    """(raw, formatted) pairs of raw token balances; failed reads (None) are zero"""
+    return [(str(balance), token.format(balance)) if balance else ("0", "0") for token, balance in zip(tokens, balances)]
+
+
+def format_multicall_results(network_key: str, popular_tokens: Sequence[Token], native_wei: Optional[int],
+                             token_results: List[Optional[int]]) -> tuple[str, str, List[tuple[str, str]]]:
+    """
+    Format decoded Multicall3 results, treating failed sub-calls as zero
+
+    Returns:
+        Tuple of (native_raw, native_formatted, token_values)
+    """
+    if native_wei is None:
+        native_raw, native_formatted = "0", "0.0"
+    else:
+        native_raw, native_formatted = str(native_wei), format_native_balance(native_wei)
+
+    # Tokens are only looked up for non-zero results, so long token lists
+    # never materialize entries the wallet does not hold
+    token_values = []
+    for index, balance in enumerate(token_results):
+        if not balance:
+            if balance is None:
+                logger.error(f"Error getting token balance for {popular_tokens[index].address} on {network_key}: call reverted")
+            token_values.append(("0", "0"))
+            continue
+        token_values.append((str(balance), popular_tokens[index].format(balance)))
+
+    return native_raw, native_formatted, token_values
+
+
+def build_network_balance(network_key: str, address: str, native_raw: str, native_formatted: str,
+                          token_values: List[tuple[str, str]]) -> NetworkBalance:
+    """
+    Assemble a NetworkBalance from fetched values
+
+    Args:
+        network_key: Network identifier
+        address: Wallet address
+        native_raw: Native balance in wei
+        native_formatted: Native balance in ether units
+        token_values: (raw, formatted) pairs aligned with TOKENS.for_network(network_key)
+
+    Returns:
+        NetworkBalance object including only tokens with non-zero balance
+    """
+    config = EVM_NETWORKS[network_key]
+    token_balances = []
+
+    tokens = TOKENS.for_network(network_key)
+    for index, (raw_balance, formatted_balance) in enumerate(token_values):
+        # Only include tokens with a non-zero balance at display precision
+        if formatted_balance != "0":
+            token = tokens[index]
+            token_balances.append(
+                TokenBalance(
+                    symbol=token.symbol,
+                    name=token.name,
+                    balance=raw_balance,
+                    balance_formatted=formatted_balance,
+                    decimals=token.decimals,
+                    contract_address=token.address
+                )
             )
 
+    return NetworkBalance(
+        network=config["name"],
+        chain_id=config["chain_id"],
+        native_token=config["native_token"],
+        native_balance=native_raw,
+        native_balance_formatted=native_formatted,
+        tokens=token_balances,
+        explorer_url=f"{config['explorer']}/address/{address}"
+    )
+
+
+def empty_network_balance(network_key: str, address: str) -> NetworkBalance:
+    """Zero-balance NetworkBalance returned when a network could not be queried"""
+    config = EVM_NETWORKS[network_key]
+    return NetworkBalance(
+        network=config["name"],
+        chain_id=config["chain_id"],
+        native_token=config["native_token"],
+        native_balance="0",
+        native_balance_formatted="0.0",
+        tokens=[],
+        explorer_url=f"{config['explorer']}/address/{address}"
+    )
+
 
 def get_all_evm_balances(address: str) -> List[NetworkBalance]:
     """
@@ -0,0 +1,410 @@
+"""Asyncio EVM client built on aiohttp JSON-RPC"""
+
+import asyncio
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+import logging
+import aiohttp
+from ..cache import NEGATIVE_CACHE, NegativeCache, expand, oldest
+from ..config import (
+    EVM_NETWORKS,
+    MULTICALL3_ADDRESS,
+    MULTICALL_CHUNK_SIZE,
+    USE_MULTICALL,
+    MAX_CONCURRENT_REQUESTS,
+)
+from ..models import NetworkBalance
+from ..timings import span
+from ..tokens import TOKENS
+from ..validators import normalize_evm_address
+from .evm import (
+    build_network_balance,
+    format_multicall_results,
+    format_native_balance,
+    format_token_values,
+    probe_indices,
+)
+from .multicall import (
+    Call,
+    GET_BLOCK_NUMBER_SELECTOR,
+    build_balance_calls,
+    chunk_calls,
+    decode_aggregate3,
+    decode_uint256,
+    encode_aggregate3,
+    encode_balance_of,
+    encode_get_eth_balance,
+)
+from .rpc import AsyncRPCClient
+from .scheduler import FairQueue
+
+# Topic of Transfer(address indexed from, address indexed to, uint256 value)
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+# Contracts per eth_getLogs filter; providers reject very long address lists
+LOGS_ADDRESS_CHUNK = 500
+
+# (owner, index into TOKENS.for_network or None for the native balance)
+BalanceRead = Tuple[Union[str, bytes], Optional[int]]
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEVMClient:
+    """Asyncio client for EVM-compatible blockchains"""
+
+    def __init__(
+        self,
+        network_key: str,
+        rpc_url: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        semaphore: Optional[FairQueue] = None,
+        use_multicall: bool = USE_MULTICALL,
+        on_head: Optional[Callable[[str, int], None]] = None,
+        negative_cache: Optional[NegativeCache] = NEGATIVE_CACHE
+    ):
+        """
+        Initialize async EVM client for specific network
+
+        Args:
+            network_key: Network identifier (e.g., 'ethereum', 'polygon')
+            rpc_url: Override the configured RPC endpoints
+            session: Shared aiohttp session
+            semaphore: Bounds the number of in-flight RPC requests, shared fairly by priority class
+            use_multicall: Batch all balance reads into one Multicall3 eth_call
+            on_head: Called with (network_key, block_number) when a newer block is seen
+            negative_cache: Skips tokens a wallet was recently seen not to hold
+        """
+        if network_key not in EVM_NETWORKS:
+            raise ValueError(f"Unsupported network: {network_key}")
+
+        self.network_key = network_key
+        self.config = EVM_NETWORKS[network_key]
+        self.use_multicall = use_multicall
+        self.rpc = AsyncRPCClient(rpc_url or self.config["rpc_urls"], session, network=network_key)
+        self.semaphore = semaphore or FairQueue(MAX_CONCURRENT_REQUESTS)
+        self.on_head = on_head
+        self.negative_cache = negative_cache
+        self.head: Optional[int] = None
+
+    async def _call(self, method: str, params: list):
+        # Time spent waiting for a semaphore slot is reported separately
+        with span("queue"):
+            slot = await self.semaphore.acquire()
+        try:
+            return await self.rpc.call(method, params)
+        finally:
+            self.semaphore.release(slot)
+
+    def _observe_head(self, block_number: Optional[int]):
+        """Record the latest block number seen in a response"""
+        if block_number is None or (self.head is not None and block_number <= self.head):
+            return
+        self.head = block_number
+        if self.on_head is not None:
+            self.on_head(self.network_key, block_number)
+
+    async def _get_balance_wei(self, address: str) -> int:
+        return int(await self._call("eth_getBalance", [address, "latest"]), 16)
+
+    async def _balance_of(self, address: str, token_address: str) -> int:
+        with span("token", address=token_address):
+            result = await self._call("eth_call", [
+                {"to": token_address, "data": "0x" + encode_balance_of(address).hex()},
+                "latest"
+            ])
+        return int(result, 16)
+
+    async def _probe_token(self, address: str, token_address: str) -> Optional[int]:
+        """balanceOf with its own call; None if the call failed"""
+        try:
+            return await self._balance_of(address, token_address)
+        except Exception as e:
+            logger.error(f"Error getting token balance for {token_address} on {self.network_key}: {e}")
+            return None
+
+    async def aggregate3(self, calls: Sequence[Call]) -> Tuple[List[Optional[int]], Optional[int]]:
+        """
+        Execute uint256 sub-calls through Multicall3 aggregate3
+
+        Batches larger than MULTICALL_CHUNK_SIZE are split into several
+        eth_calls that run concurrently. A getBlockNumber() sub-call is
+        appended to every batch so the block the results were read at is
+        known without an extra request.
+
+        Args:
+            calls: Sequence of (target, calldata) tuples
+
+        Returns:
+            Decoded results in call order (failed sub-calls are None), and
+            the block they were read at: the oldest of the batches, or None
+            if a batch did not report it
+        """
+        chunks = await asyncio.gather(*[
+            self._aggregate3_chunk(chunk) for chunk in chunk_calls(calls, MULTICALL_CHUNK_SIZE)
+        ])
+        return [result for results, _ in chunks for result in results], oldest([block for _, block in chunks])
+
+    async def _aggregate3_chunk(self, calls: Sequence[Call]) -> Tuple[List[Optional[int]], Optional[int]]:
+        with span("multicall", calls=len(calls)):
+            raw = await self._call("eth_call", [
+                {"to": MULTICALL3_ADDRESS, "data": encode_aggregate3([*calls, (MULTICALL3_ADDRESS, GET_BLOCK_NUMBER_SELECTOR)])},
+                "latest"
+            ])
+        *results, block_number = [
+            decode_uint256(success, data) for success, data in decode_aggregate3(bytes.fromhex(raw[2:]))
+        ]
+        self._observe_head(block_number)
+        return results, block_number
+
+    async def get_multicall_balances(self, address: str, token_addresses: Sequence[Union[str, bytes]]) -> tuple[Optional[int], List[Optional[int]]]:
+        """
+        Get native and ERC20 balances in a single Multicall3 aggregate3 call
+
+        Args:
+            address: Wallet address
+            token_addresses: Checksummed or raw token contract addresses
+
+        Returns:
+            Tuple of (native_balance_wei, token_balances) where failed
+            sub-calls are None
+        """
+        results, _ = await self.aggregate3(build_balance_calls(MULTICALL3_ADDRESS, address, token_addresses))
+        return results[0], results[1:]
+
+    async def get_block_number(self) -> int:
+        """Latest block number"""
+        block_number = int(await self._call("eth_blockNumber", []), 16)
+        self._observe_head(block_number)
+        return block_number
+
+    async def get_transfer_logs(self, from_block: int, to_block: int,
+                                contracts: Sequence[Union[str, bytes]]) -> List[dict]:
+        """
+        Transfer event logs emitted by a set of contracts over a block range
+
+        Args:
+            from_block: First block (inclusive)
+            to_block: Last block (inclusive)
+            contracts: Token contract addresses, hex or raw 20 bytes
+
+        Returns:
+            Raw log objects from eth_getLogs
+        """
+        chunks = [contracts[start:start + LOGS_ADDRESS_CHUNK] for start in range(0, len(contracts), LOGS_ADDRESS_CHUNK)]
+        results = await asyncio.gather(*[
+            self._call("eth_getLogs", [{
+                "fromBlock": hex(from_block),
+                "toBlock": hex(to_block),
+                "address": ["0x" + contract.hex() if isinstance(contract, bytes) else contract for contract in chunk],
+                "topics": [TRANSFER_TOPIC]
+            }])
+            for chunk in chunks
+        ])
+        return [log for logs in results for log in logs]
+
+    async def read_balances(self, reads: Sequence[BalanceRead]) -> Tuple[List[Optional[int]], Optional[int]]:
+        """
+        Read selected native and token balances through Multicall3
+
+        Args:
+            reads: (owner, token index) pairs; a None index reads the native balance
+
+        Returns:
+            Raw balances in read order (failed sub-calls are None), and the
+            block they were read at (see aggregate3)
+        """
+        token_addresses = TOKENS.addresses(self.network_key)
+        return await self.aggregate3([
+            (MULTICALL3_ADDRESS, encode_get_eth_balance(owner)) if index is None
+            else (token_addresses[index], encode_balance_of(owner))
+            for owner, index in reads
+        ])
+
+    async def get_balance_values_many(self, addresses: Sequence[str]) -> Tuple[List[List[Optional[int]]], Optional[int]]:
+        """
+        Raw native and token balances of several addresses in one Multicall3 batch
+
+        Args:
+            addresses: Checksummed wallet addresses
+
+        Returns:
+            Per address, [native_wei, *token_balances] aligned with
+            TOKENS.for_network (failed sub-calls are None), and the block
+            they were read at (see aggregate3)
+        """
+        token_addresses = TOKENS.addresses(self.network_key)
+        calls = []
+        for address in addresses:
+            calls.extend(build_balance_calls(MULTICALL3_ADDRESS, address, token_addresses))
+        results, block_number = await self.aggregate3(calls)
+
+        stride = len(token_addresses) + 1
+        return [results[index * stride:(index + 1) * stride] for index in range(len(addresses))], block_number
+
+    def _native_read_failed(self, address: str) -> RuntimeError:
+        """Error for an address whose native balance sub-call reverted"""
+        return RuntimeError(f"Native balance read failed for {address} on {self.network_key}")
+
+    def balance_from_values(self, address: str, values: Sequence[Optional[int]]) -> NetworkBalance:
+        """Build a NetworkBalance from [native_wei, *token_balances] as returned by get_balance_values_many"""
+        native_wei, *token_results = values
+        native_raw, native_formatted, token_values = format_multicall_results(
+            self.network_key, TOKENS.for_network(self.network_key), native_wei, token_results
+        )
+        return build_network_balance(self.network_key, address, native_raw, native_formatted, token_values)
+
+    async def _fetch_balances(self, address: str) -> tuple[str, str, List[tuple[str, str]]]:
+        """
+        Fetch native and token balances, batched through Multicall3 when enabled
+
+        Tokens the negative cache knows the wallet does not hold are not probed.
+        """
+        popular_tokens = TOKENS.for_network(self.network_key)
+        probed = probe_indices(self.negative_cache, self.network_key, address, len(popular_tokens))
+        if self.use_multicall:
+            try:
+                token_addresses = TOKENS.addresses(self.network_key)
+                native_wei, token_results = await self.get_multicall_balances(
+                    address, token_addresses if probed is None else [token_addresses[index] for index in probed]
+                )
+                if native_wei is None:
+                    raise self._native_read_failed(address)
+                if self.negative_cache is not None:
+                    self.negative_cache.record(self.network_key, address, token_results, probed)
+                return format_multicall_results(
+                    self.network_key, popular_tokens, native_wei, expand(token_results, probed, len(popular_tokens), 0)
+                )
+            except Exception as e:
+                logger.warning(f"Multicall failed on {self.network_key}, falling back to individual calls: {e}")
+
+        # Native and token reads run concurrently, bounded by the semaphore.
+        # A failing native read fails the network; failing tokens read as zero.
+        native_wei, *token_results = await asyncio.gather(
+            self._get_balance_wei(address),
+            *[
+                self._probe_token(address, token.address)
+                for token in (popular_tokens if probed is None else [popular_tokens[index] for index in probed])
+            ]
+        )
+        if self.negative_cache is not None:
+            self.negative_cache.record(self.network_key, address, token_results, probed)
+        return str(native_wei), format_native_balance(native_wei), format_token_values(
+            popular_tokens, expand(token_results, probed, len(popular_tokens), 0)
+        )
+
+    async def fetch_all_balances(self, address: str) -> NetworkBalance:
+        """
+        Get all balances (native + popular tokens) for an address
+
+        Unlike get_all_balances, errors are raised instead of being turned
+        into a zero balance, so callers can tell failures from empty wallets.
+
+        Args:
+            address: Wallet address
+
+        Returns:
+            NetworkBalance object with all balances
+
+        Raises:
+            Exception: If the network could not be queried
+        """
+        address = normalize_evm_address(address)
+        native_raw, native_formatted, token_values = await self._fetch_balances(address)
+        return build_network_balance(self.network_key, address, native_raw, native_formatted, token_values)
+
+    async def fetch_all_balances_many(self, addresses: Sequence[str]) -> Tuple[List[Union[NetworkBalance, Exception]], Optional[int]]:
+        """
+        Get all balances for several addresses with one Multicall3 call
+
+        The native and token reads of every address are packed into the same
+        aggregate3 batch, so a group of addresses costs a single eth_call.
+
+        Args:
+            addresses: Checksummed wallet addresses
+
+        Returns:
+            NetworkBalance objects in address order (addresses that could not
+            be queried yield the exception instead), and the block they were
+            read at, or None when the per-address fallback was used
+        """
+        if self.use_multicall:
+            try:
+                values, block_number = await self.get_balance_values_many(addresses)
+                return [
+                    self._native_read_failed(address) if address_values[0] is None
+                    else self.balance_from_values(address, address_values)
+                    for address, address_values in zip(addresses, values)
+                ], block_number
+            except Exception as e:
+                logger.warning(f"Multicall failed on {self.network_key}, falling back to per-address calls: {e}")
+
+        return list(await asyncio.gather(
+            *[self.fetch_all_balances(address) for address in addresses],
+            return_exceptions=True
+        )), None
+
+    async def _read_balance(self, owner: str, index: Optional[int]) -> Optional[int]:
+        """One native (index None) or token balance read with its own call"""
+        if index is None:
+            return await self._get_balance_wei(owner)
+        return await self._probe_token(owner, TOKENS.for_network(self.network_key)[index].address)
+
+    async def fetch_selected_balances_many(
+        self, addresses: Sequence[str], token_indices: Optional[Sequence[int]] = None
+    ) -> Tuple[List[Union[NetworkBalance, Exception]], Optional[int]]:
+        """
+        Get the native and selected token balances of several addresses in one Multicall3 batch
+
+        Only the selected tokens are read, minus those the negative cache
+        knows an address does not hold; unread tokens count as zero.
+
+        Args:
+            addresses: Checksummed wallet addresses
+            token_indices: Indices into TOKENS.for_network to read (default: all)
+
+        Returns:
+            NetworkBalance objects in address order (addresses that could not
+            be queried yield the exception instead), and the block they were
+            read at, or None when the individual-call fallback was used
+        """
+        count = len(TOKENS.for_network(self.network_key))
+        probed = [
+            probe_indices(self.negative_cache, self.network_key, address, count, token_indices)
+            for address in addresses
+        ]
+        reads: List[BalanceRead] = []
+        for address, indices in zip(addresses, probed):
+            reads.append((address, None))
+            reads.extend((address, index) for index in (range(count) if indices is None else indices))
+
+        results, block_number = None, None
+        if self.use_multicall:
+            try:
+                results, block_number = await self.read_balances(reads)
+            except Exception as e:
+                logger.warning(f"Multicall failed on {self.network_key}, falling back to individual calls: {e}")
+        if results is None:
+            # Failing token reads come back as None, failing native reads as the exception
+            results = await asyncio.gather(*[self._read_balance(owner, index) for owner, index in reads],
+                                           return_exceptions=True)
+
+        balances = []
+        position = 0
+        for address, indices in zip(addresses, probed):
+            end = position + 1 + (count if indices is None else len(indices))
+            native_wei, *token_results = results[position:end]
+            position = end
+            # A failing native read fails its address: nothing is cached or recorded for it
+            if native_wei is None:
+                native_wei = self._native_read_failed(address)
+            if isinstance(native_wei, Exception):
+                balances.append(native_wei)
+                continue
+            if self.negative_cache is not None:
+                self.negative_cache.record(self.network_key, address, token_results, indices)
+            balances.append(self.balance_from_values(address, [native_wei, *expand(token_results, indices, count, 0)]))
+        return balances, block_number
+
+    async def close(self):
+        """Close the underlying RPC session if owned by this client"""
+        await self.rpc.close()
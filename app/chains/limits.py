@@ -0,0 +1,135 @@
+"""Adaptive per-endpoint request limits: a token bucket plus AIMD concurrency"""
+
+import asyncio
+import time
+from typing import Optional
+from ..config import (
+    RPC_RATE_LIMIT,
+    RPC_RATE_BURST,
+    RPC_CONCURRENCY_INITIAL,
+    RPC_CONCURRENCY_MIN,
+    RPC_CONCURRENCY_MAX,
+    RPC_SLOW_LATENCY,
+)
+from .scheduler import FairQueue
+
+# Multiplicative decrease applied to the concurrency limit on congestion
+BACKOFF_FACTOR = 0.5
+
+# Seconds to pause an endpoint after a 429 without a usable Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+
+class EndpointLimiter(FairQueue):
+    """
+    Rate and concurrency limit of one RPC endpoint
+
+    Requests first take a token from a bucket refilled at `rate` per second
+    (holding at most `burst`), then wait for one of `limit` in-flight slots,
+    which are shared by priority classes as in FairQueue.
+    The slot limit follows AIMD: each request answered within `slow_latency`
+    while the limit is in use adds 1/limit, so the limit grows by about one
+    per round trip; a 429 or 503 response or a timeout halves it. Responses
+    to requests sent before the last decrease do not decrease it again, so
+    one burst of rejections counts as a single congestion event. A 429 also
+    pauses the bucket for the Retry-After period.
+    """
+
+    def __init__(
+        self,
+        rate: float = RPC_RATE_LIMIT,
+        burst: float = RPC_RATE_BURST,
+        initial: float = RPC_CONCURRENCY_INITIAL,
+        minimum: float = RPC_CONCURRENCY_MIN,
+        maximum: float = RPC_CONCURRENCY_MAX,
+        slow_latency: float = RPC_SLOW_LATENCY
+    ):
+        """
+        Initialize the limiter
+
+        Args:
+            rate: Requests per second; 0 leaves the rate uncapped
+            burst: Requests that may be sent at once after idling (default: rate)
+            initial: Starting in-flight limit
+            minimum: Lowest in-flight limit after repeated backoff
+            maximum: Highest in-flight limit
+            slow_latency: Seconds above which a response no longer grows the limit
+        """
+        self.minimum = max(1.0, minimum)
+        self.maximum = max(self.minimum, maximum)
+        super().__init__(min(self.maximum, max(self.minimum, initial)))
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.slow_latency = slow_latency
+        self.throttled = 0
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._decreased_at = 0.0
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long to wait until it is valid"""
+        now = time.monotonic()
+        delay = max(0.0, self._paused_until - now)
+        if self.rate <= 0:
+            return delay
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        # Tokens may go negative: each waiter reserves the next free one in turn
+        self._tokens -= 1
+        if self._tokens < 0:
+            delay = max(delay, -self._tokens / self.rate)
+        return delay
+
+    async def acquire(self) -> str:
+        """
+        Wait for a token and an in-flight slot
+
+        Returns:
+            The priority class holding the slot; pass it to release()
+        """
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return await super().acquire()
+
+    def on_success(self, latency: float):
+        """Additive increase for a timely response while the limit is in use"""
+        # Growing an unused limit would only allow a larger burst later
+        if latency <= self.slow_latency and self.in_flight * 2 >= self.limit:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+    def on_congestion(self, started: float, retry_after: Optional[float] = None):
+        """
+        Multiplicative decrease after a rejection or timeout
+
+        Args:
+            started: time.monotonic() when the failed request was sent
+            retry_after: Seconds to pause new requests, for a 429 response
+        """
+        self.throttled += 1
+        now = time.monotonic()
+        if retry_after is not None:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        if started >= self._decreased_at:
+            self.limit = max(self.minimum, self.limit * BACKOFF_FACTOR)
+            self._decreased_at = now
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rate_limit": self.rate or None,
+            "throttled": self.throttled,
+            "priorities": super().stats()
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Seconds from a Retry-After header; HTTP dates and junk fall back to a default"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
@@ -0,0 +1,154 @@
+"""Multicall3 helpers for batching EVM read calls into a single eth_call"""
+
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+# Function selectors (first 4 bytes of keccak256 of the signature)
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")      # aggregate3((address,bool,bytes)[])
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")  # getEthBalance(address)
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")       # balanceOf(address)
+GET_BLOCK_NUMBER_SELECTOR = bytes.fromhex("42cbb15c")  # getBlockNumber()
+
+# A single call inside an aggregate3 batch: (target contract, calldata).
+# The target is a hex address or its raw 20 bytes.
+Call = Tuple[Union[str, bytes], bytes]
+
+_WORD = 32
+_TRUE_WORD = (1).to_bytes(_WORD, "big")
+# Offset of the calldata bytes inside an encoded (address,bool,bytes) tuple
+_CALLDATA_OFFSET_WORD = (3 * _WORD).to_bytes(_WORD, "big")
+
+
+def encode_address_arg(address: Union[str, bytes]) -> bytes:
+    """
+    ABI-encode an address as a single 32-byte word
+
+    Args:
+        address: Hex address (with or without checksum) or raw 20 bytes
+
+    Returns:
+        Left-padded 32-byte word
+    """
+    if isinstance(address, (bytes, bytearray)):
+        return bytes(12) + bytes(address)
+    return bytes(12) + bytes.fromhex(address[2:])
+
+
+def encode_balance_of(owner: Union[str, bytes]) -> bytes:
+    """Calldata for ERC20 balanceOf(owner)"""
+    return BALANCE_OF_SELECTOR + encode_address_arg(owner)
+
+
+def encode_get_eth_balance(owner: Union[str, bytes]) -> bytes:
+    """Calldata for Multicall3 getEthBalance(owner)"""
+    return GET_ETH_BALANCE_SELECTOR + encode_address_arg(owner)
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(_WORD, "big")
+
+
+def encode_aggregate3(calls: Sequence[Call]) -> str:
+    """
+    Encode an aggregate3 call where every sub-call is allowed to fail
+
+    The ABI layout is written directly instead of going through eth_abi,
+    which validates (and checksums) every address and dominates the cost
+    of batches with thousands of sub-calls.
+
+    Args:
+        calls: Sequence of (target, calldata) tuples
+
+    Returns:
+        Hex-encoded calldata for the Multicall3 contract
+    """
+    heads = []
+    tails = []
+    offset = len(calls) * _WORD
+    for target, calldata in calls:
+        padding = -len(calldata) % _WORD
+        heads.append(_word(offset))
+        tails.append(b"".join((
+            encode_address_arg(target),
+            _TRUE_WORD,
+            _CALLDATA_OFFSET_WORD,
+            _word(len(calldata)),
+            calldata,
+            bytes(padding)
+        )))
+        offset += 4 * _WORD + len(calldata) + padding
+
+    payload = b"".join((AGGREGATE3_SELECTOR, _word(_WORD), _word(len(calls)), *heads, *tails))
+    return "0x" + payload.hex()
+
+
+def decode_aggregate3(data: bytes) -> List[Tuple[bool, bytes]]:
+    """
+    Decode the return data of aggregate3
+
+    Args:
+        data: Raw eth_call result
+
+    Returns:
+        List of (success, return_data) tuples in call order
+
+    Raises:
+        ValueError: If the data is not a valid (bool,bytes)[] encoding
+    """
+    view = memoryview(bytes(data))
+
+    def read_word(position: int) -> int:
+        if position + _WORD > len(view):
+            raise ValueError("Truncated aggregate3 result")
+        return int.from_bytes(view[position:position + _WORD], "big")
+
+    array_start = read_word(0)
+    count = read_word(array_start)
+    elements_start = array_start + _WORD
+
+    results = []
+    for index in range(count):
+        tuple_start = elements_start + read_word(elements_start + index * _WORD)
+        success = read_word(tuple_start) != 0
+        data_start = tuple_start + read_word(tuple_start + _WORD)
+        length = read_word(data_start)
+        if data_start + _WORD + length > len(view):
+            raise ValueError("Truncated aggregate3 result")
+        results.append((success, bytes(view[data_start + _WORD:data_start + _WORD + length])))
+    return results
+
+
+def decode_uint256(success: bool, data: bytes) -> Optional[int]:
+    """
+    Decode a uint256 sub-call result
+
+    Returns:
+        The decoded integer, or None if the call reverted or returned garbage
+    """
+    if not success or len(data) < 32:
+        return None
+    return int.from_bytes(data[:32], "big")
+
+
+def build_balance_calls(multicall_address: str, owner: str, token_addresses: Sequence[Union[str, bytes]]) -> List[Call]:
+    """
+    Build the aggregate3 sub-calls for a native balance plus ERC20 balances
+
+    The first call is always getEthBalance(owner) on the Multicall3 contract,
+    followed by one balanceOf(owner) per token in the given order.
+    """
+    calls: List[Call] = [(multicall_address, encode_get_eth_balance(owner))]
+    balance_of = encode_balance_of(owner)
+    calls.extend((token_address, balance_of) for token_address in token_addresses)
+    return calls
+
+
+def chunk_calls(calls: Sequence[Call], chunk_size: int) -> Iterator[Sequence[Call]]:
+    """
+    Split sub-calls into aggregate3 batches of at most chunk_size calls
+
+    Keeps each eth_call under provider gas and response size limits. A
+    chunk_size below 1 is treated as 1.
+    """
+    chunk_size = max(1, chunk_size)
+    for start in range(0, len(calls), chunk_size):
+        yield calls[start:start + chunk_size]
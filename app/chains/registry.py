@@ -0,0 +1,272 @@
+"""Process-wide registry of long-lived chain clients with pooled connections"""
+
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import logging
+import aiohttp
+from ..cache import BalanceCache
+from ..config import (
+    CACHE_ENABLED,
+    CACHE_SHARED_PATH,
+    EVM_NETWORKS,
+    HTTP_POOL_SIZE,
+    HTTP_POOL_SIZE_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    PREWARM_CONNECTIONS,
+    RPC_TIMEOUT,
+    SOLANA_CONFIG,
+)
+from ..models import NetworkBalance
+from ..shared_cache import create_balance_cache
+from ..timings import span
+
+if TYPE_CHECKING:
+    from .evm_async import AsyncEVMClient
+    from .solana_async import AsyncSolanaClient
+
+# Cache token-set markers
+DEFAULT_TOKENS: tuple = ()
+DISCOVERED_TOKENS = ("*",)
+
+# Fetches a list of addresses: results in address order (failures as the
+# exception) and the block or slot they were read at, None if unknown
+FetchMany = Callable[[List[str]], Awaitable[Tuple[List[Union[NetworkBalance, Exception]], Optional[int]]]]
+
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """
+    Long-lived async clients for every supported network
+
+    All clients share one aiohttp session, so TCP/TLS connections to each
+    RPC endpoint are kept alive and reused across requests instead of being
+    re-established per call. Clients (and their chain libraries) are
+    created on first use unless preloaded, so a process that only queries
+    one chain never imports the other backend.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = HTTP_POOL_SIZE,
+        pool_size_per_host: int = HTTP_POOL_SIZE_PER_HOST,
+        keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+        cache: Optional[BalanceCache] = None
+    ):
+        """
+        Initialize the registry (call start() before use)
+
+        Args:
+            pool_size: Total number of pooled connections
+            pool_size_per_host: Pooled connections per RPC host
+            keepalive_timeout: Seconds an idle connection is kept open
+            cache: Balance cache (default: a new one when CACHE_ENABLED, shared
+                between workers when CACHE_SHARED_PATH is set)
+        """
+        self.cache = cache if cache is not None else (create_balance_cache(CACHE_SHARED_PATH) if CACHE_ENABLED else None)
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.evm_clients: Dict[str, "AsyncEVMClient"] = {}
+        self.solana_client: Optional["AsyncSolanaClient"] = None
+
+    async def start(self, prewarm: bool = PREWARM_CONNECTIONS, preload: bool = False):
+        """
+        Open the shared session
+
+        Args:
+            prewarm: Open a connection to every endpoint before serving
+            preload: Build every client now instead of on first use
+        """
+        if self.session is not None:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT)
+        )
+
+        if preload:
+            self.preload()
+
+        if prewarm:
+            await self.prewarm()
+
+    def preload(self):
+        """Create the client of every network now"""
+        for network_key in EVM_NETWORKS:
+            self.evm(network_key)
+        self.solana  # the property creates the client
+
+    async def prewarm(self):
+        """Issue a cheap request to every endpoint to establish keep-alive connections"""
+        evm_clients = [self.evm(network_key) for network_key in EVM_NETWORKS]
+        probes = [client.rpc.call("eth_chainId") for client in evm_clients]
+        probes.append(self.solana.rpc.call("getHealth"))
+
+        results = await asyncio.gather(*probes, return_exceptions=True)
+        names = [client.config["name"] for client in evm_clients] + [SOLANA_CONFIG["name"]]
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not connect to {name}: {result}")
+            else:
+                logger.info(f"Connected to {name}")
+
+    async def close(self):
+        """Close the shared session and all pooled connections"""
+        if self.session is not None:
+            await self.session.close()
+        self.session = None
+        self.evm_clients = {}
+        self.solana_client = None
+
+    async def __aenter__(self) -> "ClientRegistry":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _on_head(self) -> Optional[Callable[[str, int], None]]:
+        return self.cache.observe_head if self.cache is not None else None
+
+    def evm(self, network_key: str) -> "AsyncEVMClient":
+        """
+        Get the client for an EVM network, creating it on first use
+
+        Raises:
+            ValueError: If the network is not supported
+            RuntimeError: If the registry has not been started
+        """
+        client = self.evm_clients.get(network_key)
+        if client is not None:
+            return client
+        if network_key not in EVM_NETWORKS:
+            raise ValueError(f"Unsupported network: {network_key}")
+        if self.session is None:
+            raise RuntimeError("ClientRegistry has not been started")
+
+        with span("client", network=network_key):
+            from .evm_async import AsyncEVMClient
+            client = AsyncEVMClient(network_key, session=self.session, on_head=self._on_head())
+        self.evm_clients[network_key] = client
+        return client
+
+    @property
+    def solana(self) -> "AsyncSolanaClient":
+        """Get the Solana client, creating it on first use"""
+        if self.solana_client is None:
+            if self.session is None:
+                raise RuntimeError("ClientRegistry has not been started")
+            with span("client", network="solana"):
+                from .solana_async import AsyncSolanaClient
+                self.solana_client = AsyncSolanaClient(session=self.session, on_head=self._on_head())
+        return self.solana_client
+
+    def endpoint_stats(self) -> Dict[str, List[dict]]:
+        """Per-network RPC endpoint routing statistics of the clients created so far"""
+        stats = {network_key: client.rpc.pool.stats() for network_key, client in self.evm_clients.items()}
+        if self.solana_client is not None:
+            stats["solana"] = self.solana_client.rpc.pool.stats()
+        return stats
+
+    def queue_stats(self) -> Dict[str, Dict[str, dict]]:
+        """Per-network request queue depth, slots held and average wait by priority class"""
+        stats = {network_key: client.semaphore.stats() for network_key, client in self.evm_clients.items()}
+        if self.solana_client is not None:
+            stats["solana"] = self.solana_client.semaphore.stats()
+        return stats
+
+    async def _fetch_one(self, network_key: str, address: str, tokens: tuple,
+                         fetch: Callable[[], Awaitable[Tuple[NetworkBalance, Optional[int]]]]) -> NetworkBalance:
+        """Fetch one network balance through the cache, timed as a 'network' span"""
+        with span("network", network=network_key) as network_span:
+            if self.cache is None:
+                return (await fetch())[0]
+
+            # Lookups that neither fetch nor raise were served from the cache
+            # or joined another request's in-flight fetch
+            network_span.set("cache", "hit")
+
+            async def timed_fetch() -> Tuple[NetworkBalance, Optional[int]]:
+                network_span.set("cache", "miss")
+                return await fetch()
+
+            return await self.cache.get_or_fetch(BalanceCache.make_key(network_key, address, tokens), timed_fetch)
+
+    async def _fetch_many(
+        self,
+        network_key: str,
+        addresses: Sequence[str],
+        tokens: tuple,
+        fetch_many: FetchMany
+    ) -> List[Union[NetworkBalance, Exception]]:
+        """Serve cached addresses and fetch only the misses in one batch"""
+        results: List[Union[NetworkBalance, Exception, None]] = [None] * len(addresses)
+        missing = []
+
+        for index, address in enumerate(addresses):
+            cached = self.cache.get(BalanceCache.make_key(network_key, address, tokens)) if self.cache else None
+            if cached is None:
+                missing.append(index)
+            else:
+                results[index] = cached
+
+        if missing:
+            head = self.cache.head(network_key) if self.cache else -1
+            fetched, read_at = await fetch_many([addresses[index] for index in missing])
+            if read_at is not None:
+                head = read_at
+            for index, result in zip(missing, fetched):
+                results[index] = result
+                if self.cache is not None and not isinstance(result, Exception):
+                    self.cache.set(BalanceCache.make_key(network_key, addresses[index], tokens), result, head)
+
+        return results
+
+    async def fetch_balances(
+        self,
+        network_key: str,
+        addresses: Sequence[str],
+        tokens: tuple,
+        fetch_many: FetchMany
+    ) -> List[Union[NetworkBalance, Exception]]:
+        """
+        Fetch one network's balances of several addresses through the cache
+
+        A single address goes through get_or_fetch, so concurrent lookups of
+        it share one fetch; a group is fetched as one batch minus cache hits.
+
+        Args:
+            network_key: Network identifier
+            addresses: Normalized wallet addresses
+            tokens: Token-set part of the cache key
+            fetch_many: Fetches a list of addresses, returning failures as
+                exceptions, and the block the results were read at (see FetchMany)
+
+        Returns:
+            NetworkBalance objects in address order; failed addresses yield the exception
+        """
+        if len(addresses) != 1:
+            with span("network", network=network_key, addresses=len(addresses)):
+                return await self._fetch_many(network_key, addresses, tokens, fetch_many)
+
+        address = addresses[0]
+
+        async def fetch() -> Tuple[NetworkBalance, Optional[int]]:
+            (result,), read_at = await fetch_many([address])
+            if isinstance(result, Exception):
+                raise result
+            return result, read_at
+
+        try:
+            return [await self._fetch_one(network_key, address, tokens, fetch)]
+        except Exception as e:
+            return [e]
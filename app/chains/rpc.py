@@ -0,0 +1,344 @@
+"""Minimal asyncio JSON-RPC 2.0 transport built on aiohttp"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Any, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+import aiohttp
+from ..config import (
+    RPC_ADAPTIVE_LIMITS,
+    RPC_LIMITS,
+    RPC_TIMEOUT,
+    RPC_EWMA_ALPHA,
+    RPC_FAILURE_THRESHOLD,
+    RPC_FAILURE_COOLDOWN,
+    RPC_HEDGING,
+    RPC_HEDGE_MIN_DELAY,
+)
+from ..metrics import count_rpc_error, track_rpc
+from ..timings import span
+from .limits import EndpointLimiter, parse_retry_after
+
+# (method, params) pair used for batch requests
+RPCRequest = Tuple[str, list]
+
+# Latency samples kept per endpoint for percentile estimates
+LATENCY_WINDOW = 200
+
+# HTTP statuses that mean the endpoint is throttling or overloaded
+CONGESTION_STATUSES = (429, 503)
+
+
+class RPCError(Exception):
+    """Error returned by a JSON-RPC endpoint"""
+
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(f"RPC error {code}: {message}")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def endpoint_host(url: str) -> str:
+    """
+    Host and port of an RPC URL, safe to show in stats, metrics and timings
+
+    Provider URLs often carry an API key in the path or query string, or
+    credentials in the user info; none of these are kept.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    return f"{host}:{parts.port}" if parts.port else host
+
+
+class Endpoint:
+    """Health and latency statistics for one RPC URL"""
+
+    __slots__ = ("url", "host", "ewma", "latencies", "consecutive_failures", "unhealthy_until", "requests",
+                 "failures", "limiter")
+
+    def __init__(self, url: str, limiter: Optional[EndpointLimiter] = None):
+        self.url = url
+        self.host = endpoint_host(url)
+        self.limiter = limiter
+        self.ewma: Optional[float] = None
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def is_healthy(self, now: float) -> bool:
+        return self.unhealthy_until <= now
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile over the recent window, or None without samples"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class EndpointPool:
+    """
+    Set of interchangeable RPC endpoints for one chain
+
+    Endpoints are ranked by an exponentially weighted moving average of
+    their latency. An endpoint that fails RPC_FAILURE_THRESHOLD times in a
+    row is benched for RPC_FAILURE_COOLDOWN seconds. With `limits`, every
+    endpoint gets its own EndpointLimiter built from those settings.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        alpha: float = RPC_EWMA_ALPHA,
+        failure_threshold: int = RPC_FAILURE_THRESHOLD,
+        cooldown: float = RPC_FAILURE_COOLDOWN,
+        limits: Optional[dict] = None
+    ):
+        if not urls:
+            raise ValueError("At least one RPC endpoint is required")
+        self.endpoints = [
+            Endpoint(url, EndpointLimiter(**limits) if limits is not None else None) for url in urls
+        ]
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+    def ranked(self) -> List[Endpoint]:
+        """
+        Endpoints in preferred order
+
+        Healthy endpoints come first, fastest EWMA first; endpoints without
+        samples yet rank ahead so they get measured. Benched endpoints follow
+        in order of recovery so a request is still attempted when all are down.
+        """
+        now = time.monotonic()
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.is_healthy(now)]
+        benched = [endpoint for endpoint in self.endpoints if not endpoint.is_healthy(now)]
+        healthy.sort(key=lambda endpoint: endpoint.ewma if endpoint.ewma is not None else 0.0)
+        benched.sort(key=lambda endpoint: endpoint.unhealthy_until)
+        return healthy + benched
+
+    def record_success(self, endpoint: Endpoint, latency: float):
+        endpoint.requests += 1
+        endpoint.consecutive_failures = 0
+        endpoint.unhealthy_until = 0.0
+        endpoint.latencies.append(latency)
+        endpoint.ewma = latency if endpoint.ewma is None else self.alpha * latency + (1 - self.alpha) * endpoint.ewma
+
+    def record_failure(self, endpoint: Endpoint):
+        endpoint.requests += 1
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.failure_threshold:
+            endpoint.unhealthy_until = time.monotonic() + self.cooldown
+
+    def hedge_delay(self, endpoint: Endpoint, min_delay: float = RPC_HEDGE_MIN_DELAY) -> float:
+        """Delay before hedging a request to this endpoint: its p95 latency"""
+        p95 = endpoint.percentile(0.95)
+        return max(min_delay, p95) if p95 is not None else min_delay
+
+    def stats(self) -> List[dict]:
+        """Per-endpoint routing statistics"""
+        now = time.monotonic()
+        return [
+            {
+                "host": endpoint.host,
+                "healthy": endpoint.is_healthy(now),
+                "ewma_ms": round(endpoint.ewma * 1000, 2) if endpoint.ewma is not None else None,
+                "p95_ms": round(endpoint.percentile(0.95) * 1000, 2) if endpoint.latencies else None,
+                "requests": endpoint.requests,
+                "failures": endpoint.failures,
+                **(endpoint.limiter.stats() if endpoint.limiter is not None else {})
+            }
+            for endpoint in self.endpoints
+        ]
+
+
+class AsyncRPCClient:
+    """JSON-RPC client that routes requests across a pool of HTTP endpoints"""
+
+    def __init__(
+        self,
+        rpc_urls: Union[str, Sequence[str]],
+        session: Optional[aiohttp.ClientSession] = None,
+        hedge: bool = RPC_HEDGING,
+        network: str = "",
+        adaptive_limits: bool = RPC_ADAPTIVE_LIMITS
+    ):
+        """
+        Initialize the RPC client
+
+        Args:
+            rpc_urls: One HTTP(S) JSON-RPC endpoint or a list of equivalent ones
+            session: Shared aiohttp session; one is created lazily when omitted
+            hedge: Send a duplicate request to the next endpoint when the first
+                is slower than its p95 latency, and use whichever answers first
+            network: Network key used to label metrics and pick RPC_LIMITS
+            adaptive_limits: Rate- and concurrency-limit each endpoint
+        """
+        self.pool = EndpointPool(
+            [rpc_urls] if isinstance(rpc_urls, str) else list(rpc_urls),
+            limits=RPC_LIMITS.get(network, {}) if adaptive_limits else None
+        )
+        self.hedge = hedge
+        self.network = network
+        self._session = session
+        self._owns_session = session is None
+        self._ids = itertools.count(1)
+
+    @property
+    def rpc_url(self) -> str:
+        """Currently preferred endpoint"""
+        return self.pool.ranked()[0].url
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the aiohttp session, creating an owned one if needed"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT))
+            self._owns_session = True
+        return self._session
+
+    async def _post_to(self, endpoint: Endpoint, payload: Union[dict, list]) -> Any:
+        limiter = endpoint.limiter
+        if limiter is not None:
+            with span("throttle", endpoint=endpoint.host):
+                slot = await limiter.acquire()
+        start = time.monotonic()
+        try:
+            with span("attempt", endpoint=endpoint.host):
+                async with self.session.post(endpoint.url, json=payload) as response:
+                    response.raise_for_status()
+                    reply = await response.json(content_type=None)
+        except Exception as e:
+            self.pool.record_failure(endpoint)
+            if limiter is not None:
+                if isinstance(e, asyncio.TimeoutError):
+                    limiter.on_congestion(start)
+                elif isinstance(e, aiohttp.ClientResponseError) and e.status in CONGESTION_STATUSES:
+                    retry_after = e.headers.get("Retry-After") if e.headers else None
+                    limiter.on_congestion(start, parse_retry_after(retry_after) if e.status == 429 else None)
+            raise
+        finally:
+            if limiter is not None:
+                limiter.release(slot)
+        latency = time.monotonic() - start
+        self.pool.record_success(endpoint, latency)
+        if limiter is not None:
+            limiter.on_success(latency)
+        return reply
+
+    async def _post_hedged(self, payload: Union[dict, list], primary: Endpoint, backup: Endpoint) -> Any:
+        first = asyncio.ensure_future(self._post_to(primary, payload))
+        done, _ = await asyncio.wait({first}, timeout=self.pool.hedge_delay(primary))
+        if first in done and first.exception() is None:
+            return first.result()
+
+        # The primary is slow (still running) or failed (hedge immediately)
+        pending = {first} if first not in done else set()
+        pending.add(asyncio.ensure_future(self._post_to(backup, payload)))
+        error: Optional[BaseException] = first.exception() if first in done else None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Retrieve every exception so none is reported as unhandled
+                errors = [task.exception() for task in done]
+                for task, task_error in zip(done, errors):
+                    if task_error is None:
+                        return task.result()
+                    error = task_error
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _post(self, payload: Union[dict, list]) -> Any:
+        endpoints = self.pool.ranked()
+        if self.hedge and len(endpoints) > 1:
+            return await self._post_hedged(payload, endpoints[0], endpoints[1])
+
+        # Fail over to the next endpoint on transport errors
+        error: Optional[Exception] = None
+        for endpoint in endpoints:
+            try:
+                return await self._post_to(endpoint, payload)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+        raise error
+
+    @staticmethod
+    def _unwrap(reply: dict) -> Any:
+        if "error" in reply and reply["error"] is not None:
+            error = reply["error"]
+            return RPCError(error.get("code", -1), error.get("message", ""), error.get("data"))
+        return reply.get("result")
+
+    async def call(self, method: str, params: Optional[list] = None) -> Any:
+        """
+        Send a single JSON-RPC request
+
+        Args:
+            method: RPC method name
+            params: Positional parameters
+
+        Returns:
+            The `result` field of the response
+
+        Raises:
+            RPCError: If the endpoint returned a JSON-RPC error
+        """
+        with track_rpc(self.network, method), span("rpc", network=self.network, method=method):
+            reply = await self._post({
+                "jsonrpc": "2.0",
+                "id": next(self._ids),
+                "method": method,
+                "params": params or []
+            })
+            result = self._unwrap(reply)
+            if isinstance(result, RPCError):
+                raise result
+        return result
+
+    async def batch(self, requests: Sequence[RPCRequest]) -> List[Any]:
+        """
+        Send several requests in one JSON-RPC batch
+
+        Args:
+            requests: Sequence of (method, params) pairs
+
+        Returns:
+            Results in request order; failed entries are RPCError instances
+        """
+        if not requests:
+            return []
+
+        ids = [next(self._ids) for _ in requests]
+        methods = {method for method, _ in requests}
+        label = methods.pop() if len(methods) == 1 else "batch"
+        with track_rpc(self.network, label), span("rpc", network=self.network, method=label, requests=len(requests)):
+            replies = await self._post([
+                {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+                for request_id, (method, params) in zip(ids, requests)
+            ])
+
+        # Batch replies may arrive in any order
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = [
+            self._unwrap(by_id[request_id]) if request_id in by_id
+            else RPCError(-32603, "Missing response in batch")
+            for request_id in ids
+        ]
+        for (method, _), result in zip(requests, results):
+            if isinstance(result, RPCError):
+                count_rpc_error(self.network, method, "RPCError")
+        return results
+
+    async def close(self):
+        """Close the session if this client created it"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
@@ -0,0 +1,172 @@
+"""Priority classes and weighted fair queuing of RPC request slots
+
+Every RPC request runs under a priority class taken from a context variable:
+interactive lookups (the default), watchlist refreshes and bulk batch
+lookups. Code starting background or bulk work wraps it in
+`priority(...)`; tasks it creates inherit the class. Slots of a FairQueue
+are handed to waiting classes in proportion to their weights, and a share
+of the slots is kept free for interactive requests, so a large batch never
+queues a UI lookup behind thousands of its own requests.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from ..config import RPC_INTERACTIVE_SHARE, RPC_PRIORITY_WEIGHTS
+from ..metrics import observe_queue_wait, track_queued
+
+INTERACTIVE = "interactive"
+WATCHLIST = "watchlist"
+BULK = "bulk"
+PRIORITY_CLASSES = (INTERACTIVE, WATCHLIST, BULK)
+
+_PRIORITY: ContextVar[str] = ContextVar("rpc_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(name: str) -> Iterator[None]:
+    """
+    Run the enclosed RPC requests, and tasks started within, under a priority class
+
+    Args:
+        name: One of PRIORITY_CLASSES
+    """
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {name}")
+    token = _PRIORITY.set(name)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority() -> str:
+    """Priority class of the running task"""
+    return _PRIORITY.get()
+
+
+class FairQueue:
+    """
+    Bounded set of request slots shared by priority classes
+
+    Waiting classes are served by weighted fair queuing: each grant advances
+    its class's virtual finish time by 1/weight, and the class with the
+    earliest next finish time goes first, so backlogged classes get slots in
+    proportion to their weights. A class returning from idle starts at the
+    current virtual time rather than redeeming its idle period. Watchlist and
+    bulk requests together never hold more than (1 - interactive_share) of
+    the slots (at least one), leaving the rest for interactive requests.
+    """
+
+    def __init__(self, limit: float, weights: Optional[Dict[str, float]] = None,
+                 interactive_share: float = RPC_INTERACTIVE_SHARE):
+        """
+        Initialize the queue
+
+        Args:
+            limit: Number of slots; may be changed later (e.g. by AIMD)
+            weights: Weight per priority class (default RPC_PRIORITY_WEIGHTS)
+            interactive_share: Fraction of slots reserved for interactive requests
+        """
+        self.limit = limit
+        self.weights = weights or RPC_PRIORITY_WEIGHTS
+        self.interactive_share = interactive_share
+        self.in_flight = 0
+        self._in_flight = {name: 0 for name in PRIORITY_CLASSES}
+        self._queues: Dict[str, deque] = {name: deque() for name in PRIORITY_CLASSES}
+        self._finish = {name: 0.0 for name in PRIORITY_CLASSES}
+        self._virtual = 0.0
+        # Per class: [granted, total seconds waited]
+        self._waits = {name: [0, 0.0] for name in PRIORITY_CLASSES}
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _can_start(self, name: str) -> bool:
+        slots = int(self.limit)
+        if self.in_flight >= slots:
+            return False
+        if name == INTERACTIVE:
+            return True
+        background = self.in_flight - self._in_flight[INTERACTIVE]
+        return background < max(1, int(slots * (1 - self.interactive_share)))
+
+    def _next_finish(self, name: str) -> float:
+        return self._finish[name] + 1 / self.weights.get(name, 1.0)
+
+    def _grant(self, name: str, waited: float):
+        self.in_flight += 1
+        self._in_flight[name] += 1
+        self._virtual = max(self._virtual, self._finish[name])
+        self._finish[name] = self._next_finish(name)
+        stats = self._waits[name]
+        stats[0] += 1
+        stats[1] += waited
+        observe_queue_wait(name, waited)
+
+    async def acquire(self) -> str:
+        """
+        Wait for a slot under the current priority class
+
+        Returns:
+            The priority class holding the slot; pass it to release()
+        """
+        name = _PRIORITY.get()
+        if not self._queues[name]:
+            # An idle class resumes at the current virtual time
+            self._finish[name] = max(self._finish[name], self._virtual)
+            if self._can_start(name):
+                self._grant(name, 0.0)
+                return name
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[name].append((waiter, time.monotonic()))
+        track_queued(name, 1)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation
+                self.release(name)
+            else:
+                queue = self._queues[name]
+                remaining = deque(entry for entry in queue if entry[0] is not waiter)
+                if len(remaining) < len(queue):
+                    self._queues[name] = remaining
+                    track_queued(name, -1)
+            raise
+        return name
+
+    def release(self, name: str):
+        """Free a slot held by a priority class"""
+        self.in_flight -= 1
+        self._in_flight[name] -= 1
+        self._wake()
+
+    def _wake(self):
+        while True:
+            ready = [name for name in PRIORITY_CLASSES if self._queues[name] and self._can_start(name)]
+            if not ready:
+                return
+            name = min(ready, key=self._next_finish)
+            waiter, enqueued = self._queues[name].popleft()
+            track_queued(name, -1)
+            if not waiter.done():
+                self._grant(name, time.monotonic() - enqueued)
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, dict]:
+        """Queue depth, slots held and average wait per priority class"""
+        return {
+            name: {
+                "queued": len(self._queues[name]),
+                "in_flight": self._in_flight[name],
+                "granted": granted,
+                "avg_wait_ms": round(waited / granted * 1000, 2) if granted else None
+            }
+            for name, (granted, waited) in self._waits.items()
+        }
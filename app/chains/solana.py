@@ -1,24 +1,47 @@
 """Solana blockchain client"""
 
-from solana.rpc.api import Client
+import struct
 from solders.pubkey import Pubkey
 from spl.token.instructions import get_associated_token_address
-from typing import List, Optional
+from typing import Callable, List, Optional, Sequence
 import logging
+from ..cache import NEGATIVE_CACHE, NegativeCache, expand
 from ..config import SOLANA_CONFIG
+from ..metrics import track_rpc
 from ..models import NetworkBalance, TokenBalance
-from ..tokens import SOLANA_POPULAR_TOKENS
+from ..tokens import SOLANA_NETWORK, TOKENS, Token
+from ..validators import Address
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# getMultipleAccounts accepts at most 100 pubkeys per request
+MAX_MULTIPLE_ACCOUNTS = 100
+
+# SPL Token and Token-2022 program IDs (token accounts share the same base layout)
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+TOKEN_2022_PROGRAM_ID = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+
+# SPL token account layout: mint (32) | owner (32) | amount (u64 LE) | ...
+TOKEN_ACCOUNT_MINT_OFFSET = 0
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64
+_U64 = struct.Struct("<Q")
+
 
 class SolanaClient:
     """Client for interacting with Solana blockchain"""
 
-    def __init__(self):
-        """Initialize Solana client"""
+    def __init__(self, negative_cache: Optional[NegativeCache] = NEGATIVE_CACHE):
+        """
+        Initialize Solana client
+
+        Args:
+            negative_cache: Skips token accounts a wallet was recently seen not to have
+        """
+        from solana.rpc.api import Client
+
         self.config = SOLANA_CONFIG
+        self.negative_cache = negative_cache
         self.client = Client(self.config["rpc_url"])
 
         # Test connection
@@ -39,13 +62,13 @@ class SolanaClient:
             Tuple of (raw_balance_lamports, formatted_balance_sol)
         """
         try:
-            pubkey = Pubkey.from_string(address)
-            response = self.client.get_balance(pubkey)
+            pubkey = to_pubkey(address)
+            with track_rpc(SOLANA_NETWORK, "getBalance"):
+                response = self.client.get_balance(pubkey)
 
             if response.value is not None:
                 lamports = response.value
-                sol = lamports / (10 ** self.config["decimals"])
-                return str(lamports), f"{sol:.6f}".rstrip('0').rstrip('.')
+                return str(lamports), format_amount(lamports, self.config["decimals"])
             else:
                 return "0", "0"
 
@@ -66,19 +89,19 @@ class SolanaClient:
             Tuple of (raw_balance, formatted_balance)
         """
         try:
-            owner_pubkey = Pubkey.from_string(address)
+            owner_pubkey = to_pubkey(address)
             mint_pubkey = Pubkey.from_string(mint_address)
 
             # Get associated token account
             token_account = get_associated_token_address(owner_pubkey, mint_pubkey)
 
             # Get token account balance
-            response = self.client.get_token_account_balance(token_account)
+            with track_rpc(SOLANA_NETWORK, "getTokenAccountBalance"):
+                response = self.client.get_token_account_balance(token_account)
 
             if response.value is not None:
                 raw_balance = response.value.amount
-                formatted_balance = float(raw_balance) / (10 ** decimals)
-                return raw_balance, f"{formatted_balance:.6f}".rstrip('0').rstrip('.')
+                return raw_balance, format_amount(int(raw_balance), decimals)
             else:
                 return "0", "0"
 
@@ -87,6 +110,32 @@ class SolanaClient:
             logger.debug(f"Error getting token balance for {mint_address}: {e}")
             return "0", "0"
 
+    def get_token_balances(self, address: str, tokens: Sequence[Token]) -> List[tuple[str, str]]:
+        """
+        Get several SPL token balances with getMultipleAccounts
+
+        All associated token accounts are derived locally and fetched in one
+        request per 100 accounts. Accounts that do not exist come back as
+        null entries and are reported as zero.
+
+        Args:
+            address: Wallet address
+            tokens: Tokens to read
+
+        Returns:
+            List of (raw_balance, formatted_balance) in token order
+        """
+        token_accounts = derive_token_accounts(address, [token.address for token in tokens])
+        accounts_data: List[Optional[bytes]] = []
+
+        for start in range(0, len(token_accounts), MAX_MULTIPLE_ACCOUNTS):
+            chunk = token_accounts[start:start + MAX_MULTIPLE_ACCOUNTS]
+            with track_rpc(SOLANA_NETWORK, "getMultipleAccounts"):
+                response = self.client.get_multiple_accounts(chunk, encoding="base64")
+            accounts_data.extend(account.data if account is not None else None for account in response.value)
+
+        return token_values_from_accounts(tokens, accounts_data)
+
     def get_all_balances(self, address: str) -> NetworkBalance:
         """
         Get all balances (SOL + popular SPL tokens) for an address
@@ -101,51 +150,152 @@ class SolanaClient:
             # Get native SOL balance
             native_raw, native_formatted = self.get_native_balance(address)
 
-            # Get SPL token balances
-            token_balances = []
-
-            for token_info in SOLANA_POPULAR_TOKENS:
-                raw_balance, formatted_balance = self.get_token_balance(
-                    address,
-                    token_info["mint"],
-                    int(token_info["decimals"])
-                )
-
-                # Only include tokens with non-zero balance
-                if float(formatted_balance) > 0:
-                    token_balances.append(
-                        TokenBalance(
-                            symbol=token_info["symbol"],
-                            name=token_info["name"],
-                            balance=raw_balance,
-                            balance_formatted=formatted_balance,
-                            decimals=int(token_info["decimals"]),
-                            contract_address=token_info["mint"]
-                        )
-                    )
-
-            return NetworkBalance(
-                network=self.config["name"],
-                chain_id=None,  # Solana doesn't use chain_id
-                native_token=self.config["native_token"],
-                native_balance=native_raw,
-                native_balance_formatted=native_formatted,
-                tokens=token_balances,
-                explorer_url=f"{self.config['explorer']}/account/{address}"
+            # Get SPL token balances, skipping accounts known not to exist
+            token_values = probe_token_values(
+                self.negative_cache, address, lambda tokens: self.get_token_balances(address, tokens)
             )
 
+            return build_network_balance(address, native_raw, native_formatted, token_values)
+
         except Exception as e:
             logger.error(f"Error getting Solana balances: {e}")
-            return NetworkBalance(
-                network=self.config["name"],
-                chain_id=None,
-                native_token=self.config["native_token"],
-                native_balance="0",
-                native_balance_formatted="0",
-                tokens=[],
-                explorer_url=f"{self.config['explorer']}/account/{address}"
+            return empty_network_balance(address)
+
+
+def to_pubkey(address: str) -> Pubkey:
+    """Pubkey of an address, built from the raw bytes of a normalized Address"""
+    if isinstance(address, Address):
+        return Pubkey.from_bytes(address.raw)
+    return Pubkey.from_string(address)
+
+
+def derive_token_accounts(address: str, mints: Sequence[str]) -> List[Pubkey]:
+    """Derive the associated token account of an owner for each mint"""
+    owner_pubkey = to_pubkey(address)
+    return [get_associated_token_address(owner_pubkey, Pubkey.from_string(mint)) for mint in mints]
+
+
+def decode_token_account_amount(data: bytes) -> int:
+    """
+    Read the amount field of a raw SPL token account
+
+    The u64 is unpacked in place from a memoryview at its layout offset,
+    without slicing or copying the account data.
+    """
+    return _U64.unpack_from(memoryview(data), TOKEN_ACCOUNT_AMOUNT_OFFSET)[0]
+
+
+def decode_token_account_mint(data: bytes) -> str:
+    """Read the mint field of a raw SPL token account as a base58 string"""
+    view = memoryview(data)
+    return str(Pubkey.from_bytes(bytes(view[TOKEN_ACCOUNT_MINT_OFFSET:TOKEN_ACCOUNT_MINT_OFFSET + 32])))
+
+
+def token_values_from_accounts(tokens: Sequence[Token],
+                               accounts_data: Sequence[Optional[bytes]]) -> List[tuple[str, str]]:
+    """
+    Convert raw token account data into (raw, formatted) balance pairs
+
+    Args:
+        tokens: Tokens aligned with accounts_data
+        accounts_data: Raw account data, or None for missing accounts
+
+    Returns:
+        List of (raw_balance, formatted_balance); missing accounts are zero
+    """
+    token_values = []
+    for token, data in zip(tokens, accounts_data):
+        if data is None:
+            token_values.append(("0", "0"))
+            continue
+        amount = decode_token_account_amount(data)
+        token_values.append((str(amount), token.format(amount)))
+    return token_values
+
+
+def probe_token_values(negative_cache: Optional[NegativeCache], address: str,
+                       read: Callable[[Sequence[Token]], List[tuple[str, str]]]) -> List[tuple[str, str]]:
+    """
+    Read the popular token balances of a wallet through the negative cache
+
+    Args:
+        negative_cache: Cache of empty or nonexistent token accounts, or None
+        address: Wallet address
+        read: Reads the (raw, formatted) values of the given tokens
+
+    Returns:
+        (raw, formatted) pairs aligned with the popular tokens
+    """
+    tokens = TOKENS.popular(SOLANA_NETWORK)
+    if negative_cache is None:
+        return read(tokens)
+    probed = negative_cache.probes(SOLANA_NETWORK, address, len(tokens))
+    values = read(tokens if probed is None else [tokens[index] for index in probed])
+    negative_cache.record(SOLANA_NETWORK, address, [int(raw) for raw, _ in values], probed)
+    return expand(values, probed, len(tokens), ("0", "0"))
+
+
+def format_amount(amount: int, decimals: int) -> str:
+    """Format a raw lamport or token amount with up to 6 decimal places"""
+    formatted = amount / (10 ** decimals)
+    return f"{formatted:.6f}".rstrip('0').rstrip('.')
+
+
+def build_network_balance(address: str, native_raw: str, native_formatted: str,
+                          token_values: List[tuple[str, str]],
+                          tokens: Sequence[Token] = TOKENS.popular(SOLANA_NETWORK)) -> NetworkBalance:
+    """
+    Assemble a Solana NetworkBalance from fetched values
+
+    Args:
+        address: Wallet address
+        native_raw: SOL balance in lamports
+        native_formatted: SOL balance
+        token_values: (raw, formatted) pairs aligned with tokens
+        tokens: Tokens the values belong to
+
+    Returns:
+        NetworkBalance object including only tokens with non-zero balance
+    """
+    token_balances = []
+
+    for token, (raw_balance, formatted_balance) in zip(tokens, token_values):
+        # Only include tokens with a non-zero balance at display precision
+        if formatted_balance != "0":
+            token_balances.append(
+                TokenBalance(
+                    symbol=token.symbol,
+                    name=token.name,
+                    balance=raw_balance,
+                    balance_formatted=formatted_balance,
+                    decimals=token.decimals,
+                    contract_address=token.address
+                )
             )
 
+    return NetworkBalance(
+        network=SOLANA_CONFIG["name"],
+        chain_id=None,  # Solana doesn't use chain_id
+        native_token=SOLANA_CONFIG["native_token"],
+        native_balance=native_raw,
+        native_balance_formatted=native_formatted,
+        tokens=token_balances,
+        explorer_url=f"{SOLANA_CONFIG['explorer']}/account/{address}"
+    )
+
+
+def empty_network_balance(address: str) -> NetworkBalance:
+    """Zero-balance NetworkBalance returned when Solana could not be queried"""
+    return NetworkBalance(
+        network=SOLANA_CONFIG["name"],
+        chain_id=None,
+        native_token=SOLANA_CONFIG["native_token"],
+        native_balance="0",
+        native_balance_formatted="0",
+        tokens=[],
+        explorer_url=f"{SOLANA_CONFIG['explorer']}/account/{address}"
+    )
+
 
 def get_solana_balances(address: str) -> NetworkBalance:
     """
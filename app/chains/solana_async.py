@@ -0,0 +1,329 @@
+"""Asyncio Solana client built on aiohttp JSON-RPC"""
+
+import asyncio
+import base64
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+import logging
+import aiohttp
+from ..cache import NEGATIVE_CACHE, NegativeCache, expand, oldest
+from ..config import SOLANA_CONFIG, MAX_CONCURRENT_REQUESTS
+from ..models import NetworkBalance
+from ..timings import span
+from ..tokens import SOLANA_NETWORK, TOKENS, MINT_METADATA, MintMetadataCache, Token
+from ..tokens.mints import decode_mint_decimals
+from .solana import (
+    MAX_MULTIPLE_ACCOUNTS,
+    TOKEN_PROGRAM_ID,
+    TOKEN_2022_PROGRAM_ID,
+    build_network_balance,
+    decode_token_account_amount,
+    decode_token_account_mint,
+    derive_token_accounts,
+    format_amount,
+    token_values_from_accounts,
+)
+from .rpc import AsyncRPCClient
+from .scheduler import FairQueue
+
+logger = logging.getLogger(__name__)
+
+
+def context_slot(result) -> Optional[int]:
+    """Slot a Solana RPC response was served at, if it carries one"""
+    if isinstance(result, dict) and "context" in result:
+        return result["context"].get("slot")
+    return None
+
+
+class AsyncSolanaClient:
+    """Asyncio client for the Solana blockchain"""
+
+    def __init__(
+        self,
+        rpc_url: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        semaphore: Optional[FairQueue] = None,
+        mint_metadata: MintMetadataCache = MINT_METADATA,
+        on_head: Optional[Callable[[str, int], None]] = None,
+        negative_cache: Optional[NegativeCache] = NEGATIVE_CACHE
+    ):
+        """
+        Initialize async Solana client
+
+        Args:
+            rpc_url: Override the configured RPC endpoints
+            session: Shared aiohttp session
+            semaphore: Bounds the number of in-flight RPC requests, shared fairly by priority class
+            mint_metadata: Mint metadata table used by token discovery
+            on_head: Called with ("solana", slot) when a newer slot is seen
+            negative_cache: Skips token accounts a wallet was recently seen not to have
+        """
+        self.config = SOLANA_CONFIG
+        self.mint_metadata = mint_metadata
+        self.rpc = AsyncRPCClient(rpc_url or self.config["rpc_urls"], session, network="solana")
+        self.semaphore = semaphore or FairQueue(MAX_CONCURRENT_REQUESTS)
+        self.on_head = on_head
+        self.negative_cache = negative_cache
+        self.head: Optional[int] = None
+
+    async def _call(self, method: str, params: list):
+        # Time spent waiting for a semaphore slot is reported separately
+        with span("queue"):
+            slot = await self.semaphore.acquire()
+        try:
+            result = await self.rpc.call(method, params)
+        finally:
+            self.semaphore.release(slot)
+        # Most Solana RPC responses carry the slot they were served at
+        self._observe_head(context_slot(result))
+        return result
+
+    def _observe_head(self, slot: Optional[int]):
+        """Record the latest slot seen in a response"""
+        if slot is None or (self.head is not None and slot <= self.head):
+            return
+        self.head = slot
+        if self.on_head is not None:
+            self.on_head("solana", slot)
+
+    async def _get_lamports(self, address: str) -> Tuple[int, Optional[int]]:
+        """Lamports of an address and the slot they were read at"""
+        result = await self._call("getBalance", [address])
+        lamports = result.get("value") if result else None
+        return (lamports if lamports is not None else 0), context_slot(result)
+
+    async def get_multiple_accounts_info(self, pubkeys: Sequence[str]) -> Tuple[List[Optional[dict]], Optional[int]]:
+        """
+        Fetch account info for many accounts
+
+        Requests are split into chunks of 100 pubkeys and sent concurrently.
+
+        Args:
+            pubkeys: Base58 account addresses
+
+        Returns:
+            Account info objects in input order (None for missing accounts),
+            and the slot they were read at: the oldest of the requests, or
+            None if one did not report it
+        """
+        chunks = [pubkeys[start:start + MAX_MULTIPLE_ACCOUNTS] for start in range(0, len(pubkeys), MAX_MULTIPLE_ACCOUNTS)]
+        results = await asyncio.gather(*[
+            self._call("getMultipleAccounts", [list(chunk), {"encoding": "base64"}])
+            for chunk in chunks
+        ])
+        return [account for result in results for account in result["value"]], oldest([context_slot(result) for result in results])
+
+    async def get_multiple_accounts(self, pubkeys: Sequence[str]) -> List[Optional[bytes]]:
+        """
+        Fetch raw account data for many accounts
+
+        Args:
+            pubkeys: Base58 account addresses
+
+        Returns:
+            Decoded account data in input order, None for missing accounts
+        """
+        accounts, _ = await self.get_multiple_accounts_info(pubkeys)
+        return [base64.b64decode(account["data"][0]) if account is not None else None for account in accounts]
+
+    async def get_token_accounts_by_owner(self, address: str, program_id: str) -> Tuple[List[bytes], Optional[int]]:
+        """
+        Fetch the raw data of every token account an address owns under a program
+
+        Args:
+            address: Wallet address
+            program_id: SPL Token or Token-2022 program ID
+
+        Returns:
+            Raw token account data, and the slot it was read at
+        """
+        result = await self._call("getTokenAccountsByOwner", [
+            address,
+            {"programId": program_id},
+            {"encoding": "base64"}
+        ])
+        return [base64.b64decode(item["account"]["data"][0]) for item in result["value"]], context_slot(result)
+
+    async def discover_token_balances(self, address: str) -> tuple[List[Token], List[tuple[str, str]], Optional[int]]:
+        """
+        Enumerate every non-zero SPL Token and Token-2022 balance of an address
+
+        Token accounts are listed with one getTokenAccountsByOwner call per
+        program. Decimals and symbols come from the mint metadata table; mints
+        not yet in the table are resolved with a single getMultipleAccounts
+        call and cached for later requests.
+
+        Args:
+            address: Wallet address
+
+        Returns:
+            Tuple of (tokens, (raw, formatted) values) in matching order, and
+            the oldest slot the token accounts were read at
+        """
+        listed = await asyncio.gather(
+            self.get_token_accounts_by_owner(address, TOKEN_PROGRAM_ID),
+            self.get_token_accounts_by_owner(address, TOKEN_2022_PROGRAM_ID)
+        )
+
+        # An owner can hold several accounts for the same mint
+        amounts: Dict[str, int] = {}
+        for accounts, _ in listed:
+            for data in accounts:
+                amount = decode_token_account_amount(data)
+                if amount:
+                    mint = decode_token_account_mint(data)
+                    amounts[mint] = amounts.get(mint, 0) + amount
+
+        missing = self.mint_metadata.missing(amounts)
+        if missing:
+            for mint, data in zip(missing, await self.get_multiple_accounts(missing)):
+                if data is not None:
+                    self.mint_metadata.add(mint, decode_mint_decimals(data))
+
+        tokens = []
+        token_values = []
+        for mint, amount in amounts.items():
+            token = self.mint_metadata.get(mint)
+            if token is None:
+                logger.debug(f"Skipping token account for unknown mint {mint}")
+                continue
+            tokens.append(token)
+            token_values.append((str(amount), token.format(amount)))
+
+        return tokens, token_values, oldest([slot for _, slot in listed])
+
+    async def fetch_all_balances(self, address: str) -> Tuple[NetworkBalance, Optional[int]]:
+        """
+        Get SOL and every SPL token an address holds, by token discovery
+
+        Args:
+            address: Wallet address
+
+        Returns:
+            NetworkBalance object with all discovered balances, and the
+            oldest slot they were read at
+
+        Raises:
+            Exception: If Solana could not be queried
+        """
+        (lamports, lamports_slot), (tokens, token_values, tokens_slot) = await asyncio.gather(
+            self._get_lamports(address),
+            self.discover_token_balances(address)
+        )
+        return build_network_balance(
+            address, str(lamports), format_amount(lamports, self.config["decimals"]), token_values, tokens
+        ), oldest([lamports_slot, tokens_slot])
+
+    async def fetch_all_balances_many(self, addresses: Sequence[str],
+                                      discover: bool = False) -> Tuple[List[Union[NetworkBalance, Exception]], Optional[int]]:
+        """
+        Get all balances for several addresses
+
+        Owner accounts (for lamports) and every derived token account are
+        fetched together with getMultipleAccounts, 100 accounts per request.
+        Discovery cannot be batched across owners and runs per address.
+
+        Args:
+            addresses: Wallet addresses
+            discover: Enumerate every token account instead of popular tokens
+
+        Returns:
+            NetworkBalance objects in address order (addresses that could not
+            be queried yield the exception instead), and the oldest slot the
+            balances were read at
+        """
+        if discover:
+            results = await asyncio.gather(
+                *[self.fetch_all_balances(address) for address in addresses],
+                return_exceptions=True
+            )
+            read = [result for result in results if not isinstance(result, BaseException)]
+            return [
+                result if isinstance(result, BaseException) else result[0] for result in results
+            ], oldest([slot for _, slot in read])
+
+        try:
+            popular_tokens = TOKENS.popular(SOLANA_NETWORK)
+            mints = [token.address for token in popular_tokens]
+            pubkeys = []
+            for address in addresses:
+                pubkeys.append(address)
+                pubkeys.extend(str(account) for account in derive_token_accounts(address, mints))
+            accounts, slot = await self.get_multiple_accounts_info(pubkeys)
+        except Exception as e:
+            return [e for _ in addresses], None
+
+        stride = len(mints) + 1
+        balances = []
+        for index, address in enumerate(addresses):
+            owner, *token_accounts = accounts[index * stride:(index + 1) * stride]
+            lamports = owner["lamports"] if owner is not None else 0
+            token_values = token_values_from_accounts(popular_tokens, [
+                base64.b64decode(account["data"][0]) if account is not None else None
+                for account in token_accounts
+            ])
+            balances.append(build_network_balance(
+                address, str(lamports), format_amount(lamports, self.config["decimals"]), token_values
+            ))
+        return balances, slot
+
+    async def fetch_selected_balances_many(
+        self, addresses: Sequence[str], token_indices: Optional[Sequence[int]] = None
+    ) -> Tuple[List[Union[NetworkBalance, Exception]], Optional[int]]:
+        """
+        Get the SOL and selected popular token balances of several addresses
+
+        Owner accounts and the token accounts of the selected tokens, minus
+        those the negative cache knows do not exist, are fetched together
+        with getMultipleAccounts, 100 accounts per request. Unread tokens
+        count as zero.
+
+        Args:
+            addresses: Wallet addresses
+            token_indices: Indices into the popular tokens to read (default: all)
+
+        Returns:
+            NetworkBalance objects in address order (addresses that could not
+            be queried yield the exception instead), and the slot they were
+            read at
+        """
+        popular_tokens = TOKENS.popular(SOLANA_NETWORK)
+        count = len(popular_tokens)
+        selected = []
+        for address in addresses:
+            if self.negative_cache is not None:
+                indices = self.negative_cache.probes(SOLANA_NETWORK, address, count, token_indices)
+            else:
+                indices = None if token_indices is None else list(token_indices)
+            selected.append((indices, popular_tokens if indices is None else [popular_tokens[index] for index in indices]))
+
+        try:
+            pubkeys = []
+            for address, (_, tokens) in zip(addresses, selected):
+                pubkeys.append(address)
+                pubkeys.extend(str(account) for account in derive_token_accounts(address, [token.address for token in tokens]))
+            accounts, slot = await self.get_multiple_accounts_info(pubkeys)
+        except Exception as e:
+            return [e for _ in addresses], None
+
+        balances = []
+        position = 0
+        for address, (indices, tokens) in zip(addresses, selected):
+            owner, *token_accounts = accounts[position:position + 1 + len(tokens)]
+            position += 1 + len(tokens)
+            lamports = owner["lamports"] if owner is not None else 0
+            token_values = token_values_from_accounts(tokens, [
+                base64.b64decode(account["data"][0]) if account is not None else None
+                for account in token_accounts
+            ])
+            if self.negative_cache is not None:
+                self.negative_cache.record(SOLANA_NETWORK, address, [int(raw) for raw, _ in token_values], indices)
+            balances.append(build_network_balance(
+                address, str(lamports), format_amount(lamports, self.config["decimals"]),
+                expand(token_values, indices, count, ("0", "0"))
+            ))
+        return balances, slot
+
+    async def close(self):
+        """Close the underlying RPC session if owned by this client"""
+        await self.rpc.close()
@@ -0,0 +1,154 @@
+"""Incremental EVM balance change detection from ERC20 Transfer logs"""
+
+import json
+import os
+import time
+from typing import Dict, Mapping, Optional, Set
+import logging
+from ..config import TRANSFER_BLOCK_RANGE, TRANSFER_CONFIRMATIONS_BY_NETWORK, TRANSFER_CURSOR_PATH, TRANSFER_MAX_LAG
+from ..tokens import TOKENS
+from .evm_async import AsyncEVMClient
+
+logger = logging.getLogger(__name__)
+
+# Seconds between cursor file writes; the latest cursors are also written on flush()
+CURSOR_SAVE_INTERVAL = 5.0
+
+
+class CursorStore:
+    """Last processed block per chain, optionally persisted to a JSON file"""
+
+    def __init__(self, path: str = TRANSFER_CURSOR_PATH):
+        """
+        Load saved cursors
+
+        Args:
+            path: JSON file to persist cursors to; empty keeps them in memory
+        """
+        self.path = path
+        self._cursors: Dict[str, int] = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self._cursors = {key: int(value) for key, value in json.load(f).items()}
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning(f"Ignoring unreadable transfer cursor file {path}: {e}")
+
+    def get(self, network_key: str) -> Optional[int]:
+        return self._cursors.get(network_key)
+
+    def set(self, network_key: str, block_number: int):
+        self._cursors[network_key] = block_number
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= CURSOR_SAVE_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """Write the cursors if they changed since the last write"""
+        if not self.path or not self._dirty:
+            return
+        # Write-then-rename so a crash never leaves a truncated file
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._cursors, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save transfer cursors to {self.path}: {e}")
+            return
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+
+class TransferLogTracker:
+    """
+    Finds the (holder, token) pairs whose balance may have changed
+
+    Transfer logs of every tracked token contract of a chain are read with
+    eth_getLogs from the block after the cursor up to `confirmations` blocks
+    below the head, in ranges of block_range blocks: newer blocks can still
+    be reorged out, and a replacement block at a height the cursor has
+    passed would never be read. Only the holders of interest are reported,
+    so a poll costs one eth_getLogs per range no matter how many wallets are
+    watched.
+    """
+
+    def __init__(self, client: AsyncEVMClient, cursors: CursorStore,
+                 block_range: int = TRANSFER_BLOCK_RANGE, max_lag: int = TRANSFER_MAX_LAG,
+                 confirmations: Optional[int] = None):
+        """
+        Initialize the tracker
+
+        Args:
+            client: Client of the chain to track
+            cursors: Shared cursor store
+            block_range: Blocks per eth_getLogs request
+            max_lag: Larger gaps between cursor and head are skipped, not replayed
+            confirmations: Blocks below the head left unread (default: the
+                chain's TRANSFER_CONFIRMATIONS)
+        """
+        self.client = client
+        self.network_key = client.network_key
+        self.cursors = cursors
+        self.block_range = block_range
+        self.max_lag = max_lag
+        self.confirmations = max(0, TRANSFER_CONFIRMATIONS_BY_NETWORK.get(self.network_key, 0)
+                                 if confirmations is None else confirmations)
+        self.contracts = TOKENS.addresses(self.network_key)
+        # Raw contract address -> index into TOKENS.for_network
+        self._token_index = {
+            contract if isinstance(contract, bytes) else bytes.fromhex(contract[2:]): index
+            for index, contract in enumerate(self.contracts)
+        }
+
+    def _record(self, log: dict, holders: Mapping[bytes, str], touched: Dict[str, Set[int]]):
+        topics = log.get("topics") or []
+        # ERC20 and ERC721 Transfers index from and to; older tokens that do not are skipped
+        if len(topics) < 3:
+            return
+        index = self._token_index.get(bytes.fromhex(log["address"][2:]))
+        if index is None:
+            return
+        for topic in topics[1:3]:
+            holder = holders.get(bytes.fromhex(topic[-40:]))
+            if holder is not None:
+                touched.setdefault(holder, set()).add(index)
+
+    async def poll(self, holders: Mapping[bytes, str]) -> Optional[Dict[str, Set[int]]]:
+        """
+        Read new confirmed Transfer logs and advance the cursor
+
+        Args:
+            holders: Raw 20-byte address -> address, for the wallets of interest
+
+        Returns:
+            Token indices (into TOKENS.for_network) per holder that sent or
+            received tokens since the last poll, or None when the logs since
+            the cursor are unknown (first poll, or lag beyond max_lag) and
+            every holder must be re-read
+        """
+        # Unconfirmed blocks are read on a later poll, once they can no longer be reorged out
+        head = await self.client.get_block_number() - self.confirmations
+        cursor = self.cursors.get(self.network_key)
+        if cursor is None or head - cursor > self.max_lag:
+            self.cursors.set(self.network_key, head)
+            return None
+
+        touched: Dict[str, Set[int]] = {}
+        for start in range(cursor + 1, head + 1, self.block_range):
+            end = min(head, start + self.block_range - 1)
+            try:
+                logs = await self.client.get_transfer_logs(start, end, self.contracts)
+            except Exception as e:
+                if start == cursor + 1:
+                    raise
+                # Report the ranges read so far; the rest is retried on the next poll
+                logger.warning(f"Reading Transfer logs on {self.network_key} stopped at block {start}: {e}")
+                break
+            for log in logs:
+                if not log.get("removed"):
+                    self._record(log, holders, touched)
+            self.cursors.set(self.network_key, end)
+        return touched
@@ -1,72 +1,221 @@
 """Configuration for blockchain networks and RPC endpoints"""
 
 import os
-from typing import Dict
+from typing import Dict, List
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+def _rpc_urls(env_var: str, default: str) -> List[str]:
+    """Read a comma-separated list of RPC endpoints from the environment"""
+    return [url.strip() for url in os.getenv(env_var, default).split(",") if url.strip()]
+
+
+def _network_setting(env_var: str, network_key: str, default: float) -> float:
+    """Read a per-network override <env_var>_<NETWORK> (e.g. RPC_RATE_LIMIT_SOLANA)"""
+    return float(os.getenv(f"{env_var}_{network_key.upper()}", default))
+
+
+def _per_network(env_var: str, default: float) -> Dict[str, float]:
+    """Read a setting for every network, each overridable with <env_var>_<NETWORK>"""
+    return {network_key: _network_setting(env_var, network_key, default) for network_key in [*EVM_NETWORKS, "solana"]}
+
+
 # EVM Networks Configuration
 EVM_NETWORKS = {
     "ethereum": {
         "name": "Ethereum",
         "chain_id": 1,
-        "rpc_url": os.getenv("ETHEREUM_RPC", "https://eth.llamarpc.com"),
+        "rpc_urls": _rpc_urls("ETHEREUM_RPC", "https://eth.llamarpc.com"),
         "native_token": "ETH",
         "decimals": 18,
-        "explorer": "https://etherscan.io"
+        "explorer": "https://etherscan.io",
+        "block_time": 12
     },
     "arbitrum": {
         "name": "Arbitrum One",
         "chain_id": 42161,
-        "rpc_url": os.getenv("ARBITRUM_RPC", "https://arb1.arbitrum.io/rpc"),
+        "rpc_urls": _rpc_urls("ARBITRUM_RPC", "https://arb1.arbitrum.io/rpc"),
         "native_token": "ETH",
         "decimals": 18,
-        "explorer": "https://arbiscan.io"
+        "explorer": "https://arbiscan.io",
+        "block_time": 0.25
     },
     "optimism": {
         "name": "Optimism",
         "chain_id": 10,
-        "rpc_url": os.getenv("OPTIMISM_RPC", "https://mainnet.optimism.io"),
+        "rpc_urls": _rpc_urls("OPTIMISM_RPC", "https://mainnet.optimism.io"),
         "native_token": "ETH",
         "decimals": 18,
-        "explorer": "https://optimistic.etherscan.io"
+        "explorer": "https://optimistic.etherscan.io",
+        "block_time": 2
     },
     "base": {
         "name": "Base",
         "chain_id": 8453,
-        "rpc_url": os.getenv("BASE_RPC", "https://mainnet.base.org"),
+        "rpc_urls": _rpc_urls("BASE_RPC", "https://mainnet.base.org"),
         "native_token": "ETH",
         "decimals": 18,
-        "explorer": "https://basescan.org"
+        "explorer": "https://basescan.org",
+        "block_time": 2
     },
     "bnb": {
         "name": "BNB Smart Chain",
         "chain_id": 56,
-        "rpc_url": os.getenv("BNB_RPC", "https://bsc-dataseed.binance.org"),
+        "rpc_urls": _rpc_urls("BNB_RPC", "https://bsc-dataseed.binance.org"),
         "native_token": "BNB",
         "decimals": 18,
-        "explorer": "https://bscscan.com"
+        "explorer": "https://bscscan.com",
+        "block_time": 3
     },
     "polygon": {
         "name": "Polygon",
         "chain_id": 137,
-        "rpc_url": os.getenv("POLYGON_RPC", "https://polygon-rpc.com"),
+        "rpc_urls": _rpc_urls("POLYGON_RPC", "https://polygon-rpc.com"),
         "native_token": "MATIC",
         "decimals": 18,
-        "explorer": "https://polygonscan.com"
+        "explorer": "https://polygonscan.com",
+        "block_time": 2
     }
 }
 
 # Solana Configuration
 SOLANA_CONFIG = {
     "name": "Solana",
-    "rpc_url": os.getenv("SOLANA_RPC", "https://api.mainnet-beta.solana.com"),
+    "rpc_urls": _rpc_urls("SOLANA_RPC", "https://api.mainnet-beta.solana.com"),
     "native_token": "SOL",
     "decimals": 9,
-    "explorer": "https://solscan.io"
+    "explorer": "https://solscan.io",
+    "block_time": 0.4
+}
+
+# The first endpoint of each chain is the default for single-endpoint clients
+for _network in [*EVM_NETWORKS.values(), SOLANA_CONFIG]:
+    _network["rpc_url"] = _network["rpc_urls"][0]
+
+# Multicall3 is deployed at the same address on every supported EVM network
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+
+# Batch native + token balances into one aggregate3 eth_call per network
+USE_MULTICALL = os.getenv("USE_MULTICALL", "true").lower() in ("1", "true", "yes")
+
+# Maximum sub-calls per aggregate3 eth_call; larger batches are split to stay
+# under provider gas and response size limits (at least 1)
+MULTICALL_CHUNK_SIZE = max(1, int(os.getenv("MULTICALL_CHUNK_SIZE", "500")))
+
+# Optional Uniswap-style token list (JSON) or compiled token table tracked in
+# addition to the popular tokens
+TOKEN_LIST_PATH = os.getenv("TOKEN_LIST_PATH", "")
+
+# Async client settings
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "16"))
+
+# Shared HTTP connection pool used by the client registry
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+HTTP_POOL_SIZE_PER_HOST = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "20"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+PREWARM_CONNECTIONS = os.getenv("PREWARM_CONNECTIONS", "false").lower() in ("1", "true", "yes")
+
+# Multi-endpoint routing: latency EWMA weight, failures before an endpoint is
+# benched, how long it stays benched, and optional hedged requests
+RPC_EWMA_ALPHA = float(os.getenv("RPC_EWMA_ALPHA", "0.3"))
+RPC_FAILURE_THRESHOLD = int(os.getenv("RPC_FAILURE_THRESHOLD", "3"))
+RPC_FAILURE_COOLDOWN = float(os.getenv("RPC_FAILURE_COOLDOWN", "30"))
+RPC_HEDGING = os.getenv("RPC_HEDGING", "false").lower() in ("1", "true", "yes")
+RPC_HEDGE_MIN_DELAY = float(os.getenv("RPC_HEDGE_MIN_DELAY", "0.05"))
+
+# Per-endpoint limits: a token bucket caps the request rate (0 = uncapped) and
+# an AIMD limit on in-flight requests halves on 429/503 responses and timeouts
+# and grows while responses arrive within RPC_SLOW_LATENCY seconds. Every value
+# is overridable per chain with <NAME>_<NETWORK> (e.g. RPC_RATE_LIMIT_ETHEREUM)
+RPC_ADAPTIVE_LIMITS = os.getenv("RPC_ADAPTIVE_LIMITS", "true").lower() in ("1", "true", "yes")
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "0"))
+RPC_RATE_BURST = float(os.getenv("RPC_RATE_BURST", "0"))
+RPC_CONCURRENCY_INITIAL = float(os.getenv("RPC_CONCURRENCY_INITIAL", "8"))
+RPC_CONCURRENCY_MIN = float(os.getenv("RPC_CONCURRENCY_MIN", "1"))
+RPC_CONCURRENCY_MAX = float(os.getenv("RPC_CONCURRENCY_MAX", "64"))
+RPC_SLOW_LATENCY = float(os.getenv("RPC_SLOW_LATENCY", "2"))
+RPC_LIMITS = {
+    network_key: {
+        "rate": _network_setting("RPC_RATE_LIMIT", network_key, RPC_RATE_LIMIT),
+        "burst": _network_setting("RPC_RATE_BURST", network_key, RPC_RATE_BURST),
+        "initial": _network_setting("RPC_CONCURRENCY_INITIAL", network_key, RPC_CONCURRENCY_INITIAL),
+        "minimum": _network_setting("RPC_CONCURRENCY_MIN", network_key, RPC_CONCURRENCY_MIN),
+        "maximum": _network_setting("RPC_CONCURRENCY_MAX", network_key, RPC_CONCURRENCY_MAX),
+        "slow_latency": _network_setting("RPC_SLOW_LATENCY", network_key, RPC_SLOW_LATENCY)
+    }
+    for network_key in [*EVM_NETWORKS, "solana"]
+}
+
+# RPC request slots (per client and per endpoint) are shared by priority classes
+# with weighted fair queuing; watchlist and bulk requests together never hold
+# more than 1 - RPC_INTERACTIVE_SHARE of the slots
+RPC_PRIORITY_WEIGHTS = {
+    "interactive": float(os.getenv("RPC_WEIGHT_INTERACTIVE", "8")),
+    "watchlist": float(os.getenv("RPC_WEIGHT_WATCHLIST", "2")),
+    "bulk": float(os.getenv("RPC_WEIGHT_BULK", "1"))
+}
+RPC_INTERACTIVE_SHARE = float(os.getenv("RPC_INTERACTIVE_SHARE", "0.25"))
+
+# Batch lookups: addresses per shared RPC batch, batches in flight, request size limit
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "25"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_ADDRESSES = int(os.getenv("BATCH_MAX_ADDRESSES", "10000"))
+
+# Normalized addresses memoized by the validators, and the size limit of /validate/batch
+ADDRESS_CACHE_SIZE = int(os.getenv("ADDRESS_CACHE_SIZE", "16384"))
+VALIDATE_MAX_ADDRESSES = int(os.getenv("VALIDATE_MAX_ADDRESSES", "100000"))
+
+# Prometheus metrics at /metrics; instrumentation is a no-op when disabled
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Balance cache: entries live for CACHE_TTL_BLOCKS block times of their chain
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+CACHE_TTL_BLOCKS = float(os.getenv("CACHE_TTL_BLOCKS", "1"))
+
+# Optional cache shared by all worker processes of a host: a memory-mapped file
+# (preferably on tmpfs, e.g. /dev/shm/balance-tracker.cache) of CACHE_SHARED_SLOTS
+# entries of CACHE_SHARED_SLOT_SIZE bytes each; empty keeps the cache per process
+CACHE_SHARED_PATH = os.getenv("CACHE_SHARED_PATH", "")
+CACHE_SHARED_SLOTS = int(os.getenv("CACHE_SHARED_SLOTS", "8192"))
+CACHE_SHARED_SLOT_SIZE = int(os.getenv("CACHE_SHARED_SLOT_SIZE", "4096"))
+
+# Negative cache: tokens a wallet was seen not to hold are skipped for NEGATIVE_CACHE_TTL
+# seconds, overridable per chain with NEGATIVE_CACHE_TTL_<NETWORK> (e.g. NEGATIVE_CACHE_TTL_SOLANA)
+NEGATIVE_CACHE_ENABLED = os.getenv("NEGATIVE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+NEGATIVE_CACHE_MAX_SIZE = int(os.getenv("NEGATIVE_CACHE_MAX_SIZE", "100000"))
+NEGATIVE_CACHE_TTL = float(os.getenv("NEGATIVE_CACHE_TTL", "600"))
+NEGATIVE_CACHE_TTLS = _per_network("NEGATIVE_CACHE_TTL", NEGATIVE_CACHE_TTL)
+
+# Watchlist: watched addresses are refreshed every WATCHLIST_INTERVAL_BLOCKS block
+# times (at least WATCHLIST_MIN_INTERVAL seconds); unchanged wallets back off up to
+# WATCHLIST_MAX_BACKOFF seconds, and snapshots older than WATCHLIST_MAX_AGE are not served
+WATCHLIST_MAX_ADDRESSES = int(os.getenv("WATCHLIST_MAX_ADDRESSES", "10000"))
+WATCHLIST_INTERVAL_BLOCKS = float(os.getenv("WATCHLIST_INTERVAL_BLOCKS", "1"))
+WATCHLIST_MIN_INTERVAL = float(os.getenv("WATCHLIST_MIN_INTERVAL", "1"))
+WATCHLIST_MAX_BACKOFF = float(os.getenv("WATCHLIST_MAX_BACKOFF", "120"))
+WATCHLIST_MAX_AGE = float(os.getenv("WATCHLIST_MAX_AGE", "300"))
+WATCHLIST_CHUNK_SIZE = int(os.getenv("WATCHLIST_CHUNK_SIZE", "200"))
+
+# Watched EVM wallets re-read token balances only for tokens seen in Transfer logs;
+# other refreshes read the native balance, with a full re-read every WATCHLIST_RESYNC_INTERVAL
+# seconds. Log cursors are saved to TRANSFER_CURSOR_PATH (not persisted when empty), and a
+# chain more than TRANSFER_MAX_LAG blocks behind is resynced instead of replayed. Logs are read
+# up to TRANSFER_CONFIRMATIONS blocks below the head, overridable per chain with
+# TRANSFER_CONFIRMATIONS_<NETWORK>, so blocks past the cursor are no longer reorged out
+TRANSFER_TRACKING = os.getenv("TRANSFER_TRACKING", "true").lower() in ("1", "true", "yes")
+TRANSFER_CURSOR_PATH = os.getenv("TRANSFER_CURSOR_PATH", "")
+TRANSFER_BLOCK_RANGE = int(os.getenv("TRANSFER_BLOCK_RANGE", "1000"))
+TRANSFER_MAX_LAG = int(os.getenv("TRANSFER_MAX_LAG", "10000"))
+TRANSFER_CONFIRMATIONS = int(os.getenv("TRANSFER_CONFIRMATIONS", "12"))
+TRANSFER_CONFIRMATIONS_BY_NETWORK = {
+    network_key: int(confirmations)
+    for network_key, confirmations in _per_network("TRANSFER_CONFIRMATIONS", TRANSFER_CONFIRMATIONS).items()
 }
+WATCHLIST_RESYNC_INTERVAL = float(os.getenv("WATCHLIST_RESYNC_INTERVAL", "600"))
 
 # ERC20 ABI for balanceOf function
 ERC20_ABI = [
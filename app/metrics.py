@@ -0,0 +1,303 @@
+"""Prometheus-style metrics for the API and the chain clients
+
+Metrics are kept in-process and rendered in the Prometheus text exposition
+format by `GET /metrics`. Every recording helper checks METRICS_ENABLED
+first, so instrumentation is a no-op when metrics are disabled.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from .config import METRICS_ENABLED
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; covers cached API hits through slow multi-chain lookups
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds; most slot waits are zero or a fraction of one RPC round trip
+QUEUE_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Labelled metric family; label values are passed positionally in declared order"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = self._header()
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "balance_tracker_http_request_duration_seconds",
+    "API request latency until the response starts, by route template",
+    ("path", "method", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "balance_tracker_http_requests_in_flight",
+    "API requests currently being served"
+)
+RPC_REQUEST_DURATION = Histogram(
+    "balance_tracker_rpc_request_duration_seconds",
+    "JSON-RPC request latency including failover and hedging",
+    ("network", "method")
+)
+RPC_ERRORS = Counter(
+    "balance_tracker_rpc_errors_total",
+    "Failed JSON-RPC requests by exception type",
+    ("network", "method", "error")
+)
+RPC_REQUESTS_IN_FLIGHT = Gauge(
+    "balance_tracker_rpc_requests_in_flight",
+    "JSON-RPC requests currently awaiting a response",
+    ("network",)
+)
+RPC_QUEUE_WAIT = Histogram(
+    "balance_tracker_rpc_queue_wait_seconds",
+    "Time RPC requests waited for a client or endpoint slot, by priority class",
+    ("priority",),
+    QUEUE_WAIT_BUCKETS
+)
+RPC_QUEUED = Gauge(
+    "balance_tracker_rpc_queued",
+    "RPC requests waiting for a client or endpoint slot, by priority class",
+    ("priority",)
+)
+
+METRICS = (HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, RPC_REQUEST_DURATION, RPC_ERRORS, RPC_REQUESTS_IN_FLIGHT,
+           RPC_QUEUE_WAIT, RPC_QUEUED)
+
+
+class _RPCTracker:
+    """Times one RPC request and records it on exit"""
+
+    __slots__ = ("network", "method", "started")
+
+    def __init__(self, network: str, method: str):
+        self.network = network
+        self.method = method
+
+    def __enter__(self) -> "_RPCTracker":
+        RPC_REQUESTS_IN_FLIGHT.inc(self.network)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        RPC_REQUESTS_IN_FLIGHT.dec(self.network)
+        # Cancellation is not a result of the request itself
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            return False
+        RPC_REQUEST_DURATION.observe(time.perf_counter() - self.started, self.network, self.method)
+        if exc_type is not None:
+            RPC_ERRORS.inc(self.network, self.method, exc_type.__name__)
+        return False
+
+
+class _NoopTracker:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopTracker":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_TRACKER = _NoopTracker()
+
+
+def track_rpc(network: str, method: str):
+    """
+    Context manager recording one RPC request's latency and outcome
+
+    Shared by the async RPC transport and the synchronous EVM and Solana
+    clients. An exception leaving the block counts as an error labelled
+    with its type.
+
+    Args:
+        network: Network key, e.g. 'ethereum' or 'solana'
+        method: JSON-RPC method name
+    """
+    return _RPCTracker(network, method) if METRICS_ENABLED else _NOOP_TRACKER
+
+
+def count_rpc_error(network: str, method: str, error: str):
+    """Count an RPC error that did not raise, e.g. a failed entry of a batch"""
+    if METRICS_ENABLED:
+        RPC_ERRORS.inc(network, method, error)
+
+
+def observe_queue_wait(priority: str, seconds: float):
+    """Record how long a request of a priority class waited for a slot"""
+    if METRICS_ENABLED:
+        RPC_QUEUE_WAIT.observe(seconds, priority)
+
+
+def track_queued(priority: str, amount: int):
+    """Adjust the number of queued requests of a priority class"""
+    if METRICS_ENABLED:
+        RPC_QUEUED.inc(priority, amount=amount)
+
+
+def web3_rpc_middleware(network: str) -> Callable:
+    """web3.py middleware feeding every request of a Web3 instance into track_rpc"""
+    def middleware(make_request, w3):
+        def handle(method, params):
+            with track_rpc(network, method):
+                response = make_request(method, params)
+            if isinstance(response, dict) and response.get("error"):
+                count_rpc_error(network, method, "RPCError")
+            return response
+        return handle
+    return middleware
+
+
+def cache_metrics(stats: dict) -> List[str]:
+    """Render BalanceCache.stats() as metric lines"""
+    lines = []
+    for key, kind, documentation in (
+        ("hits", "counter", "Balance cache lookups served from the cache"),
+        ("misses", "counter", "Balance cache lookups that fetched from RPC"),
+        ("coalesced", "counter", "Balance cache lookups that joined an in-flight fetch"),
+        ("evictions", "counter", "Balance cache entries evicted for space"),
+        ("size", "gauge", "Balance cache entries"),
+        ("hit_ratio", "gauge", "Share of balance cache lookups not fetched from RPC")
+    ):
+        name = f"balance_tracker_cache_{key}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}", f"{name} {_format_value(stats[key])}"]
+    return lines
+
+
+def endpoint_limit_metrics(endpoint_stats: Dict[str, List[dict]]) -> List[str]:
+    """Render ClientRegistry.endpoint_stats() limiter state as metric lines, labelled by endpoint host"""
+    lines = []
+    for key, kind, documentation in (
+        ("concurrency_limit", "gauge", "Current adaptive in-flight request limit of an RPC endpoint"),
+        ("rate_limit", "gauge", "Configured requests per second of an RPC endpoint"),
+        ("queued", "gauge", "Requests waiting for an in-flight slot of an RPC endpoint"),
+        ("throttled", "counter", "429/503 responses and timeouts that reduced an RPC endpoint's limit")
+    ):
+        name = f"balance_tracker_rpc_endpoint_{key}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+        for network, endpoints in endpoint_stats.items():
+            for endpoint in endpoints:
+                if endpoint.get(key) is None:
+                    continue
+                labels = _format_labels(("network", "endpoint"), (network, endpoint["host"]))
+                lines.append(f"{name}{labels} {_format_value(endpoint[key])}")
+    return lines
+
+
+def render(extra: Optional[List[str]] = None) -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    if extra:
+        lines += extra
+    return "\n".join(lines) + "\n"
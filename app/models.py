@@ -1,7 +1,7 @@
 """Data models for balance tracker"""
 
-from typing import List, Optional, Dict
-from pydantic import BaseModel, Field
+from typing import Any, List, Optional, Dict
+from pydantic import BaseModel, Field, model_serializer
 
 
 class TokenBalance(BaseModel):
@@ -25,6 +25,15 @@ class NetworkBalance(BaseModel):
     explorer_url: Optional[str] = None
 
 
+class TimingSpan(BaseModel):
+    """One timed step of a request; times are in milliseconds from the request start"""
+    name: str
+    start_ms: float
+    duration_ms: Optional[float] = None
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+    children: List["TimingSpan"] = Field(default_factory=list)
+
+
 class BalanceResponse(BaseModel):
     """Complete balance response"""
     address: str
@@ -32,6 +41,35 @@ class BalanceResponse(BaseModel):
     total_networks_checked: int
     success: bool = True
     error: Optional[str] = None
+    snapshot_age_seconds: Optional[float] = None
+    timings: Optional[TimingSpan] = None
+
+    @model_serializer(mode="wrap")
+    def _omit_unset_extras(self, handler):
+        # Only set for watched addresses or on request; other responses keep their usual shape
+        data = handler(self)
+        for field in ("snapshot_age_seconds", "timings"):
+            if data.get(field) is None:
+                data.pop(field, None)
+        return data
+
+
+class BatchBalanceRequest(BaseModel):
+    """Bulk balance lookup request"""
+    addresses: List[str]
+    networks: Optional[List[str]] = None
+    tokens: Optional[List[str]] = None
+    discover: bool = False
+
+
+class BatchValidateRequest(BaseModel):
+    """Bulk address validation request"""
+    addresses: List[str]
+
+
+class WatchlistRequest(BaseModel):
+    """Addresses to add to the watchlist"""
+    addresses: List[str]
 
 
 class ErrorResponse(BaseModel):
@@ -39,3 +77,20 @@ class ErrorResponse(BaseModel):
     success: bool = False
     error: str
     details: Optional[str] = None
+
+
+def to_json(model: BaseModel) -> bytes:
+    """
+    Serialize a model straight to JSON bytes
+
+    Uses the model's compiled pydantic-core serializer, so the output has
+    the same shape as model_dump_json() without the intermediate dict,
+    re-validation or str round trip.
+
+    Args:
+        model: Model instance
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    return model.__pydantic_serializer__.to_json(model)
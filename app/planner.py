@@ -0,0 +1,352 @@
+"""Query planning: compile address × network × token requests into batched RPCs
+
+A balance query (addresses, a network filter and an optional token filter)
+is planned before anything is sent. Filters are pushed down into the reads:
+each address is only queried on the selected networks of its type, and only
+the selected tokens are read instead of being fetched and dropped. Repeated
+addresses are read once. Each network's reads are then packed into the
+fewest batched requests: Multicall3 aggregate3 eth_calls of
+MULTICALL_CHUNK_SIZE sub-calls on EVM networks, getMultipleAccounts calls on
+Solana. Balance cache hits and tokens the negative cache knows are empty are
+subtracted when the plan runs, so a plan's request count is an upper bound.
+"""
+
+import asyncio
+import math
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import logging
+from .config import EVM_NETWORKS, MULTICALL_CHUNK_SIZE, USE_MULTICALL
+from .models import BalanceResponse, NetworkBalance
+from .timings import span
+from .tokens import SOLANA_NETWORK, TOKENS
+from .validators import INVALID_ADDRESS_MESSAGE, Address, normalize_address
+
+if TYPE_CHECKING:
+    from .chains.registry import ClientRegistry
+
+# Solana discovery per address: getBalance and getTokenAccountsByOwner for both token programs
+DISCOVERY_REQUESTS = 3
+
+logger = logging.getLogger(__name__)
+
+# Network key -> token address (lowercase hex on EVM) -> index in the network's token list
+_TOKEN_INDEXES: Dict[str, Dict[str, int]] = {}
+
+
+def parse_token_filter(tokens: Optional[Union[str, Iterable[str]]]) -> Optional[tuple]:
+    """
+    Normalize a token filter
+
+    Args:
+        tokens: Symbols or contract/mint addresses, as a comma-separated
+            string or a list whose items may contain commas
+
+    Returns:
+        Tuple of filter words, or None for no filter
+    """
+    if tokens is None:
+        return None
+    if isinstance(tokens, str):
+        tokens = [tokens]
+    words = tuple(dict.fromkeys(word.strip() for item in tokens for word in item.split(",") if word.strip()))
+    return words or None
+
+
+def _token_index(network_key: str) -> Dict[str, int]:
+    index = _TOKEN_INDEXES.get(network_key)
+    if index is None:
+        if network_key == SOLANA_NETWORK:
+            index = {token.address: position for position, token in enumerate(TOKENS.popular(SOLANA_NETWORK))}
+        else:
+            index = {
+                "0x" + address.hex() if isinstance(address, bytes) else address.lower(): position
+                for position, address in enumerate(TOKENS.addresses(network_key))
+            }
+        _TOKEN_INDEXES[network_key] = index
+    return index
+
+
+def resolve_token_filter(network_key: str, tokens: Sequence[str]) -> Dict[str, int]:
+    """
+    Find the filtered tokens on a network
+
+    Args:
+        network_key: Network identifier
+        tokens: Symbols (case-insensitive) or contract/mint addresses
+
+    Returns:
+        Filter word -> index in TOKENS.for_network (the popular tokens on
+        Solana), for the words the network knows
+    """
+    index = _token_index(network_key)
+    matches = {}
+    for word in tokens:
+        token = TOKENS.by_address(network_key, word) or TOKENS.by_symbol(network_key, word)
+        if token is None:
+            continue
+        position = index.get(token.address if network_key == SOLANA_NETWORK else token.address.lower())
+        if position is not None:
+            matches[word] = position
+    return matches
+
+
+class NetworkPlan:
+    """Reads planned on one network: which addresses, which tokens and how many requests"""
+
+    __slots__ = ("network_key", "addresses", "tokens", "token_indices", "discover")
+
+    def __init__(self, network_key: str, addresses: List[Address], tokens: Optional[tuple] = None,
+                 token_indices: Optional[List[int]] = None, discover: bool = False):
+        """
+        Args:
+            network_key: Network identifier
+            addresses: Distinct normalized addresses to read
+            tokens: Token filter words, or None for no filter
+            token_indices: Tokens to read (see resolve_token_filter), or None for all
+            discover: Solana only: enumerate every token account instead
+        """
+        self.network_key = network_key
+        self.addresses = addresses
+        self.tokens = tokens
+        self.token_indices = token_indices
+        self.discover = discover
+
+    @property
+    def kind(self) -> str:
+        return "solana" if self.network_key == SOLANA_NETWORK else "evm"
+
+    @property
+    def tokens_per_address(self) -> Optional[int]:
+        """Token reads per address before negative cache skips; None when discovered"""
+        if self.discover:
+            return None
+        if self.token_indices is not None:
+            return len(self.token_indices)
+        if self.network_key == SOLANA_NETWORK:
+            return len(TOKENS.popular(SOLANA_NETWORK))
+        return len(TOKENS.for_network(self.network_key))
+
+    @property
+    def reads(self) -> int:
+        """Multicall sub-calls (EVM) or accounts (Solana), native balances included"""
+        if self.discover:
+            return len(self.addresses)
+        return len(self.addresses) * (1 + self.tokens_per_address)
+
+    @property
+    def requests(self) -> int:
+        """RPC requests the plan sends on this network at most"""
+        if self.discover:
+            return DISCOVERY_REQUESTS * len(self.addresses)
+        if self.network_key == SOLANA_NETWORK:
+            from .chains.solana import MAX_MULTIPLE_ACCOUNTS
+            return math.ceil(self.reads / MAX_MULTIPLE_ACCOUNTS)
+        return math.ceil(self.reads / MULTICALL_CHUNK_SIZE) if USE_MULTICALL else self.reads
+
+    @property
+    def cache_tokens(self) -> tuple:
+        """Token-set part of the balance cache keys of this network's results"""
+        from .chains.registry import DEFAULT_TOKENS, DISCOVERED_TOKENS
+
+        if self.discover:
+            return DISCOVERED_TOKENS
+        if self.token_indices is None:
+            return DEFAULT_TOKENS
+        tokens = TOKENS.popular(SOLANA_NETWORK) if self.network_key == SOLANA_NETWORK else TOKENS.for_network(self.network_key)
+        return tuple(tokens[index].address for index in self.token_indices)
+
+    def select(self, balance: NetworkBalance) -> NetworkBalance:
+        """Apply the token filter to a balance read without it, e.g. a discovery or a watchlist snapshot"""
+        if self.tokens is None:
+            return balance
+        if self.discover:
+            symbols = {word.upper() for word in self.tokens}
+            kept = [token for token in balance.tokens
+                    if token.symbol.upper() in symbols or token.contract_address in self.tokens]
+        else:
+            selected = set(self.cache_tokens)
+            kept = [token for token in balance.tokens if token.contract_address in selected]
+        return balance if len(kept) == len(balance.tokens) else balance.model_copy(update={"tokens": kept})
+
+    def to_dict(self) -> dict:
+        return {
+            "network": self.network_key,
+            "addresses": len(self.addresses),
+            "tokens_per_address": self.tokens_per_address,
+            "reads": self.reads,
+            "requests": self.requests,
+            "method": ("discovery" if self.discover
+                       else "getMultipleAccounts" if self.network_key == SOLANA_NETWORK
+                       else "aggregate3" if USE_MULTICALL else "eth_call")
+        }
+
+
+class QueryPlan:
+    """Planned reads of a balance query, per network, and how to assemble the responses"""
+
+    __slots__ = ("inputs", "wallets", "networks", "tokens")
+
+    def __init__(self, inputs: List[str], wallets: List[Optional[Address]], networks: List[NetworkPlan],
+                 tokens: Optional[tuple] = None):
+        self.inputs = inputs
+        self.wallets = wallets
+        self.networks = networks
+        self.tokens = tokens
+
+    @property
+    def requests(self) -> int:
+        """RPC requests of the whole plan at most"""
+        return sum(network.requests for network in self.networks)
+
+    def to_dict(self) -> dict:
+        return {
+            "addresses": len(self.inputs),
+            "unique_addresses": len({wallet for wallet in self.wallets if wallet is not None}),
+            "invalid_addresses": sum(wallet is None for wallet in self.wallets),
+            "tokens": list(self.tokens) if self.tokens is not None else None,
+            "networks": [network.to_dict() for network in self.networks],
+            "requests": self.requests
+        }
+
+
+def plan_balances(
+    addresses: Iterable[str],
+    evm_keys: Optional[Sequence[str]] = None,
+    include_solana: bool = True,
+    tokens: Optional[Union[str, Iterable[str]]] = None,
+    discover: bool = False
+) -> QueryPlan:
+    """
+    Plan a balance query
+
+    Args:
+        addresses: Wallet addresses (EVM and Solana may be mixed; invalid ones are reported)
+        evm_keys: EVM networks to query (default: all supported)
+        include_solana: Whether to query Solana
+        tokens: Token filter (symbols or contract/mint addresses); native
+            balances are always read
+        discover: Discover all Solana token holdings (the token filter then
+            applies to the discovered tokens)
+
+    Returns:
+        QueryPlan to pass to execute_plan
+
+    Raises:
+        ValueError: If a filtered token exists on none of the selected networks
+    """
+    inputs = [address.strip() for address in addresses]
+    wallets = []
+    distinct = {"evm": {}, "solana": {}}
+    for address in inputs:
+        try:
+            wallet = normalize_address(address)
+        except ValueError:
+            wallets.append(None)
+            continue
+        wallets.append(wallet)
+        distinct[wallet.kind].setdefault(wallet, None)
+
+    tokens = parse_token_filter(tokens)
+    keys = list(EVM_NETWORKS) if evm_keys is None else list(evm_keys)
+    matched = set()
+    networks = []
+    for network_key in keys + ([SOLANA_NETWORK] if include_solana else []):
+        token_indices = None
+        if tokens is not None and not (discover and network_key == SOLANA_NETWORK):
+            matches = resolve_token_filter(network_key, tokens)
+            matched.update(matches)
+            token_indices = sorted(set(matches.values()))
+        elif tokens is not None:
+            # Any token may turn up in a discovery
+            matched.update(tokens)
+
+        kind = "solana" if network_key == SOLANA_NETWORK else "evm"
+        if distinct[kind]:
+            networks.append(NetworkPlan(network_key, list(distinct[kind]), tokens, token_indices,
+                                        discover and kind == "solana"))
+
+    unknown = [word for word in tokens or () if word not in matched]
+    if unknown:
+        raise ValueError(f"Unknown token{'s' if len(unknown) > 1 else ''} on the selected networks: {', '.join(unknown)}")
+
+    return QueryPlan(inputs, wallets, networks, tokens)
+
+
+def check_token_filter(tokens: Optional[Union[str, Iterable[str]]], evm_keys: Optional[Sequence[str]] = None,
+                       include_solana: bool = True, discover: bool = False):
+    """
+    Validate a token filter before any address is planned
+
+    Raises:
+        ValueError: If a filtered token exists on none of the selected networks
+    """
+    plan_balances((), evm_keys, include_solana, tokens, discover)
+
+
+def _empty_balance(network_key: str, address: str) -> NetworkBalance:
+    if network_key == SOLANA_NETWORK:
+        from .chains.solana import empty_network_balance
+        return empty_network_balance(address)
+    from .chains.evm import empty_network_balance
+    return empty_network_balance(network_key, address)
+
+
+async def _execute_network(registry: "ClientRegistry", network: NetworkPlan) -> List[NetworkBalance]:
+    network_key = network.network_key
+
+    async def fetch(missing: List[str]) -> Tuple[List[Union[NetworkBalance, Exception]], Optional[int]]:
+        if network.discover:
+            return await registry.solana.fetch_all_balances_many(missing, discover=True)
+        client = registry.solana if network_key == SOLANA_NETWORK else registry.evm(network_key)
+        return await client.fetch_selected_balances_many(missing, network.token_indices)
+
+    try:
+        results = await registry.fetch_balances(network_key, network.addresses, network.cache_tokens, fetch)
+    except Exception as e:
+        results = [e for _ in network.addresses]
+
+    balances = []
+    for address, result in zip(network.addresses, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Error getting balances for {network_key}: {result}")
+            result = _empty_balance(network_key, address)
+        elif network.discover:
+            result = network.select(result)
+        balances.append(result)
+    return balances
+
+
+async def execute_plan(registry: "ClientRegistry", plan: QueryPlan) -> List[BalanceResponse]:
+    """
+    Run a plan, querying every network concurrently
+
+    Args:
+        registry: Started client registry
+        plan: Plan from plan_balances
+
+    Returns:
+        One BalanceResponse per input address, in input order; a network
+        that could not be queried reads as zero balances
+    """
+    results = await asyncio.gather(*[_execute_network(registry, network) for network in plan.networks])
+    by_network = [dict(zip(network.addresses, balances)) for network, balances in zip(plan.networks, results)]
+
+    responses = []
+    for address, wallet in zip(plan.inputs, plan.wallets):
+        if wallet is None:
+            responses.append(BalanceResponse(address=address, networks=[], total_networks_checked=0,
+                                             success=False, error=INVALID_ADDRESS_MESSAGE))
+            continue
+        balances = [found[wallet] for network, found in zip(plan.networks, by_network) if network.kind == wallet.kind]
+        responses.append(BalanceResponse(address=wallet, networks=balances, total_networks_checked=len(balances),
+                                         success=True))
+    return responses
+
+
+async def query_balances(registry: "ClientRegistry", addresses: Iterable[str], evm_keys: Optional[Sequence[str]] = None,
+                         include_solana: bool = True, tokens: Optional[Union[str, Iterable[str]]] = None,
+                         discover: bool = False) -> List[BalanceResponse]:
+    """Plan and run a balance query; see plan_balances and execute_plan"""
+    with span("plan"):
+        plan = plan_balances(addresses, evm_keys, include_solana, tokens, discover)
+    return await execute_plan(registry, plan)
@@ -0,0 +1,305 @@
+"""Balance cache shared by the worker processes of one host through a memory-mapped file
+
+Each uvicorn worker keeps its in-process BalanceCache (fast hits without
+decoding, coalescing of concurrent misses) and backs it with a fixed-size
+hash table in a file mapped by every worker, ideally on tmpfs (/dev/shm).
+Reads take no lock: every slot carries a CRC of its contents, and a slot
+caught mid-write simply reads as a miss. Writers overwrite slots in place,
+so memory stays at the size the file was created with. Only chain head
+updates are locked (a byte-range lock on the head's 8 bytes), since an
+interleaved read-compare-write could move a head backwards.
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Optional, Tuple
+import logging
+from .cache import BalanceCache, CacheKey
+from .config import (
+    EVM_NETWORKS,
+    CACHE_MAX_SIZE,
+    CACHE_TTL_BLOCKS,
+    CACHE_SHARED_SLOTS,
+    CACHE_SHARED_SLOT_SIZE,
+)
+from .models import NetworkBalance
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BTCACHE1"
+# magic, slot count, slot size
+FILE_HEADER = struct.Struct("<8sII")
+# Latest block (or slot) seen per network by any worker
+HEADS_OFFSET = FILE_HEADER.size
+MAX_NETWORKS = 32
+HEAD = struct.Struct("<q")
+SLOTS_OFFSET = HEADS_OFFSET + MAX_NETWORKS * HEAD.size
+# fingerprint, expiry (wall clock), head, payload length, CRC32
+SLOT_HEADER = struct.Struct("<QdqII")
+# Slots per bucket: a key may live in any slot of its bucket
+WAYS = 4
+
+NETWORK_INDEX = {network_key: index for index, network_key in enumerate([*EVM_NETWORKS, "solana"])}
+
+
+def fingerprint(key: CacheKey) -> int:
+    """64-bit hash of a cache key, stable across processes"""
+    network_key, address, tokens = key
+    data = "\0".join((network_key, str(address), *tokens)).encode()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+class SharedMemoryStore:
+    """
+    Fixed-size table of serialized NetworkBalance payloads in a shared mmap
+
+    Keys hash to a bucket of WAYS slots. A write replaces the key's slot,
+    else an expired one, else the one expiring soonest; payloads larger than
+    a slot are not stored.
+    """
+
+    def __init__(self, path: str, slots: int = CACHE_SHARED_SLOTS, slot_size: int = CACHE_SHARED_SLOT_SIZE):
+        """
+        Open or create the table
+
+        Args:
+            path: Backing file, shared by every worker (e.g. /dev/shm/balance-tracker.cache)
+            slots: Number of entries; rounded up to a multiple of WAYS
+            slot_size: Bytes per entry, including a 32-byte header
+
+        Raises:
+            ValueError: If the file exists with a different geometry
+        """
+        self.path = path
+        self.slots = -(-slots // WAYS) * WAYS
+        self.slot_size = slot_size
+        self.buckets = self.slots // WAYS
+        self.size = SLOTS_OFFSET + self.slots * slot_size
+
+        # Kept open for the head locks; closing any descriptor of the file would drop them
+        self._fd = fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # Only initialization is serialized, so workers starting together agree on the layout
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                header = os.pread(fd, FILE_HEADER.size, 0)
+                if len(header) < FILE_HEADER.size or header[:8] != MAGIC:
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.size)
+                    os.pwrite(fd, FILE_HEADER.pack(MAGIC, self.slots, slot_size), 0)
+                elif FILE_HEADER.unpack(header)[1:] != (self.slots, slot_size):
+                    raise ValueError(
+                        f"Shared cache {path} was created with a different CACHE_SHARED_SLOTS or "
+                        f"CACHE_SHARED_SLOT_SIZE; remove it or use another path"
+                    )
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._mmap = mmap.mmap(fd, self.size)
+        except BaseException:
+            os.close(fd)
+            raise
+
+    def _bucket(self, fp: int) -> range:
+        first = SLOTS_OFFSET + (fp % self.buckets) * WAYS * self.slot_size
+        return range(first, first + WAYS * self.slot_size, self.slot_size)
+
+    def get(self, fp: int, min_head: int) -> Optional[Tuple[bytes, float]]:
+        """
+        Read a payload
+
+        Args:
+            fp: Key fingerprint
+            min_head: Entries stored at an older chain head are stale
+
+        Returns:
+            The payload and its expiry (wall clock), or None if absent,
+            expired, stale or mid-write
+        """
+        now = time.time()
+        for offset in self._bucket(fp):
+            slot_fp, expires_at, head, length, crc = SLOT_HEADER.unpack_from(self._mmap, offset)
+            if slot_fp != fp:
+                continue
+            if expires_at <= now or head < min_head or length > self.slot_size - SLOT_HEADER.size:
+                return None
+            start = offset + SLOT_HEADER.size
+            payload = self._mmap[start:start + length]
+            if zlib.crc32(payload, zlib.crc32(SLOT_HEADER.pack(fp, expires_at, head, length, 0))) != crc:
+                return None
+            return payload, expires_at
+        return None
+
+    def set(self, fp: int, payload: bytes, expires_at: float, head: int) -> Optional[bool]:
+        """
+        Write a payload
+
+        Returns:
+            None if the payload does not fit a slot, else whether a live
+            entry of another key was evicted
+        """
+        if len(payload) > self.slot_size - SLOT_HEADER.size:
+            return None
+        now = time.time()
+        target, target_expires = None, None
+        for offset in self._bucket(fp):
+            slot_fp, slot_expires = struct.unpack_from("<Qd", self._mmap, offset)
+            if slot_fp == fp or slot_expires <= now:
+                target, target_expires = offset, None
+                break
+            if target is None or slot_expires < target_expires:
+                target, target_expires = offset, slot_expires
+
+        # Payload first, header last: a reader racing this write fails the CRC check
+        start = target + SLOT_HEADER.size
+        self._mmap[start:start + len(payload)] = payload
+        crc = zlib.crc32(payload, zlib.crc32(SLOT_HEADER.pack(fp, expires_at, head, len(payload), 0)))
+        SLOT_HEADER.pack_into(self._mmap, target, fp, expires_at, head, len(payload), crc)
+        return target_expires is not None
+
+    def head(self, network_key: str) -> int:
+        """Latest chain head any worker has seen, or -1"""
+        index = NETWORK_INDEX.get(network_key)
+        if index is None:
+            return -1
+        return HEAD.unpack_from(self._mmap, HEADS_OFFSET + index * HEAD.size)[0] or -1
+
+    def observe_head(self, network_key: str, head: int):
+        """Record a chain head; the shared head only ever moves forward"""
+        index = NETWORK_INDEX.get(network_key)
+        if index is None or head <= self.head(network_key):
+            return
+        offset = HEADS_OFFSET + index * HEAD.size
+        # Compare and write under the lock, so a slower worker cannot overwrite a newer head
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, HEAD.size, offset)
+        try:
+            if head > HEAD.unpack_from(self._mmap, offset)[0]:
+                HEAD.pack_into(self._mmap, offset, head)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, HEAD.size, offset)
+
+    def live_entries(self) -> int:
+        """Number of unexpired entries (scans every slot header)"""
+        now = time.time()
+        return sum(
+            1 for offset in range(SLOTS_OFFSET, self.size, self.slot_size)
+            if struct.unpack_from("<d", self._mmap, offset + 8)[0] > now
+        )
+
+    def clear(self):
+        for offset in range(SLOTS_OFFSET, self.size, self.slot_size):
+            SLOT_HEADER.pack_into(self._mmap, offset, 0, 0.0, 0, 0, 0)
+
+    def close(self):
+        self._mmap.close()
+        os.close(self._fd)
+
+
+class SharedBalanceCache(BalanceCache):
+    """
+    BalanceCache backed by a SharedMemoryStore
+
+    Local misses are looked up in the shared table before fetching, and
+    fetched values are written to both, so a balance fetched by one worker
+    is served by every worker until it expires or a newer block is seen.
+    Chain heads are shared as well.
+    """
+
+    def __init__(self, path: str, max_size: int = CACHE_MAX_SIZE, ttl_blocks: float = CACHE_TTL_BLOCKS,
+                 slots: int = CACHE_SHARED_SLOTS, slot_size: int = CACHE_SHARED_SLOT_SIZE):
+        """
+        Initialize the cache
+
+        Args:
+            path: Backing file of the shared table
+            max_size: Maximum in-process entries before LRU eviction
+            ttl_blocks: Entry lifetime measured in block times of its chain
+            slots: Shared table entries
+            slot_size: Bytes per shared table entry
+        """
+        super().__init__(max_size, ttl_blocks)
+        self.store = SharedMemoryStore(path, slots, slot_size)
+        self.shared_hits = 0
+        self.shared_writes = 0
+        self.shared_evictions = 0
+        self.shared_oversized = 0
+
+    def observe_head(self, network_key: str, head: int):
+        super().observe_head(network_key, head)
+        self.store.observe_head(network_key, head)
+
+    def head(self, network_key: str) -> int:
+        """Latest head of a chain observed by any worker"""
+        head = self.store.head(network_key)
+        if head > self._heads.get(network_key, -1):
+            self._heads[network_key] = head
+        return self._heads.get(network_key, -1)
+
+    def _lookup(self, key: CacheKey) -> Optional[NetworkBalance]:
+        head = self.head(key[0])
+
+        value = super()._lookup(key)
+        if value is not None:
+            return value
+
+        entry = self.store.get(fingerprint(key), head)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        try:
+            value = NetworkBalance.model_validate_json(payload)
+        except ValueError:
+            return None
+        self.shared_hits += 1
+        # Keep it locally for the rest of its lifetime
+        self._put(key, value, head, expires_at - time.time())
+        return value
+
+    def set(self, key: CacheKey, value: NetworkBalance, head: int):
+        super().set(key, value, head)
+        ttl = self.ttls.get(key[0], 0)
+        if ttl <= 0:
+            return
+        evicted = self.store.set(fingerprint(key), value.model_dump_json().encode(), time.time() + ttl, head)
+        if evicted is None:
+            self.shared_oversized += 1
+            return
+        self.shared_writes += 1
+        self.shared_evictions += evicted
+
+    def clear(self):
+        super().clear()
+        self.store.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and occupancy; hits include this worker's shared-table hits"""
+        return {
+            **super().stats(),
+            "shared": {
+                "path": self.store.path,
+                "size": self.store.live_entries(),
+                "max_size": self.store.slots,
+                "hits": self.shared_hits,
+                "writes": self.shared_writes,
+                "evictions": self.shared_evictions,
+                "oversized": self.shared_oversized
+            }
+        }
+
+
+def create_balance_cache(shared_path: str = "") -> BalanceCache:
+    """
+    Build the balance cache: shared between workers when a path is set
+
+    Falls back to a process-local cache when the shared table cannot be opened.
+    """
+    if shared_path:
+        try:
+            return SharedBalanceCache(shared_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Shared balance cache unavailable, using a per-process cache: {e}")
+    return BalanceCache()
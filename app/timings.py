@@ -0,0 +1,107 @@
+"""Opt-in per-request timing spans
+
+A trace is started for a request that asked for timings; code on the
+request path opens nested spans with `span(...)`. The current span is kept
+in a context variable, so tasks started with asyncio.gather attach their
+spans to the span that was current when they were created. Outside a trace
+`span()` returns a shared no-op, so instrumented code costs next to nothing
+for regular requests.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+_CURRENT: ContextVar[Optional["Span"]] = ContextVar("timing_span", default=None)
+
+
+class Span:
+    """One timed step of a request with its nested steps"""
+
+    __slots__ = ("name", "attributes", "children", "started", "ended")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.children: List["Span"] = []
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+
+    def set(self, key: str, value: Any):
+        """Attach an attribute, e.g. whether a lookup hit the cache"""
+        self.attributes[key] = value
+
+    def to_dict(self, origin: Optional[float] = None) -> dict:
+        """
+        Span tree as plain data
+
+        Times are in milliseconds; start_ms is relative to the trace start.
+        Spans still running (e.g. a losing hedged request) have no duration.
+        """
+        origin = self.started if origin is None else origin
+        return {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round((self.ended - self.started) * 1000, 3) if self.ended is not None else None,
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin) for child in sorted(self.children, key=lambda c: c.started)]
+        }
+
+
+class _SpanScope:
+    __slots__ = ("span", "_token")
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._token = _CURRENT.set(self.span)
+        self.span.started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.span.ended = time.perf_counter()
+        if exc_type is not None:
+            self.span.attributes["error"] = exc_type.__name__
+        _CURRENT.reset(self._token)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Context manager timing a step as a child of the current span
+
+    Args:
+        name: Step name, e.g. 'network' or 'rpc'
+        **attributes: Details such as the network key or RPC method
+
+    Returns:
+        A context manager yielding the Span (a no-op outside a trace)
+    """
+    parent = _CURRENT.get()
+    if parent is None:
+        return _NOOP_SPAN
+    child = Span(name, attributes)
+    parent.children.append(child)
+    return _SpanScope(child)
+
+
+def trace(name: str, **attributes: Any) -> _SpanScope:
+    """Context manager starting a new span tree for one request"""
+    return _SpanScope(Span(name, attributes))
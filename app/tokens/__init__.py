@@ -1,5 +1,16 @@
 """Tokens configuration"""
 
 from .tokens_config import POPULAR_TOKENS, SOLANA_POPULAR_TOKENS
+from .registry import SOLANA_NETWORK, TOKENS, Token, TokenRegistry
+from .mints import MINT_METADATA, MintMetadataCache
 
-__all__ = ["POPULAR_TOKENS", "SOLANA_POPULAR_TOKENS"]
+__all__ = [
+    "POPULAR_TOKENS",
+    "SOLANA_POPULAR_TOKENS",
+    "SOLANA_NETWORK",
+    "TOKENS",
+    "Token",
+    "TokenRegistry",
+    "MINT_METADATA",
+    "MintMetadataCache",
+]
@@ -0,0 +1,68 @@
+"""Cached SPL mint metadata used by Solana token discovery"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from .registry import SOLANA_NETWORK, TOKENS, Token, TokenRegistry
+
+# SPL mint layout: mint_authority COption<Pubkey> (36) | supply u64 (8) | decimals u8 | ...
+MINT_DECIMALS_OFFSET = 44
+
+
+class MintMetadataCache:
+    """
+    Bounded table of mint -> Token
+
+    Seeded with the popular tokens and backed by the token registry, so
+    mints from a loaded token list resolve with their real symbol and name.
+    Other mints discovered at runtime are added once their decimals have
+    been read from chain and evicted oldest-first when the table is full.
+    Seeded entries are never evicted.
+    """
+
+    def __init__(self, seed: Iterable[Token] = TOKENS.popular(SOLANA_NETWORK), max_size: int = 10_000,
+                 registry: Optional[TokenRegistry] = TOKENS):
+        self.max_size = max_size
+        self.registry = registry
+        self._pinned: Dict[str, Token] = {token.address: token for token in seed}
+        self._discovered: "OrderedDict[str, Token]" = OrderedDict()
+
+    def _known(self, mint: str) -> Optional[Token]:
+        token = self._pinned.get(mint)
+        if token is None and self.registry is not None:
+            token = self.registry.by_address(SOLANA_NETWORK, mint)
+        return token
+
+    def get(self, mint: str) -> Optional[Token]:
+        """Get the token for a mint, or None if unknown"""
+        token = self._known(mint)
+        if token is not None:
+            return token
+        token = self._discovered.get(mint)
+        if token is not None:
+            self._discovered.move_to_end(mint)
+        return token
+
+    def missing(self, mints: Iterable[str]) -> List[str]:
+        """Return the mints that have no cached metadata, without duplicates"""
+        return [mint for mint in dict.fromkeys(mints) if mint not in self._discovered and self._known(mint) is None]
+
+    def add(self, mint: str, decimals: int):
+        """
+        Cache metadata for a mint discovered on chain
+
+        Symbol and name are not stored on the mint account itself, so
+        unknown mints are labelled with an abbreviated mint address.
+        """
+        self._discovered[mint] = Token(SOLANA_NETWORK, f"{mint[:4]}...{mint[-4:]}", mint, mint, decimals)
+        self._discovered.move_to_end(mint)
+        while len(self._discovered) > self.max_size:
+            self._discovered.popitem(last=False)
+
+
+def decode_mint_decimals(data: bytes) -> int:
+    """Read the decimals byte of a raw SPL mint account"""
+    return memoryview(data)[MINT_DECIMALS_OFFSET]
+
+
+# Process-wide mint metadata table
+MINT_METADATA = MintMetadataCache()
@@ -0,0 +1,249 @@
+"""Token registry compiled once at import from the token configuration"""
+
+import logging
+from array import array
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple, Union
+from ..config import TOKEN_LIST_PATH
+from ..validators import to_checksum_address
+from .tokens_config import POPULAR_TOKENS, SOLANA_POPULAR_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Network key of the Solana token table
+SOLANA_NETWORK = "solana"
+
+
+class Token:
+    """
+    Immutable, pre-parsed token entry
+
+    `address` is the checksummed contract address on EVM networks and the
+    mint address on Solana. Decimals are stored as an int together with
+    their scale factor (10 ** decimals), so formatting needs no parsing.
+    """
+
+    __slots__ = ("network", "symbol", "name", "address", "decimals", "scale")
+
+    def __init__(self, network: str, symbol: str, name: str, address: str, decimals: int):
+        self.network = network
+        self.symbol = symbol
+        self.name = name
+        self.address = address
+        self.decimals = decimals
+        self.scale = 10 ** decimals
+
+    def format(self, amount: int) -> str:
+        """Format a raw amount with up to 6 decimal places"""
+        return f"{amount / self.scale:.6f}".rstrip('0').rstrip('.')
+
+    def __repr__(self) -> str:
+        return f"Token({self.network}:{self.symbol} {self.address})"
+
+
+class NetworkTokens(Sequence):
+    """
+    Tokens of one network: the popular tokens followed by token-list rows
+
+    Token-list rows stay in the memory-mapped table and are turned into
+    Token objects only when indexed.
+    """
+
+    __slots__ = ("network", "_popular", "_table", "_rows")
+
+    def __init__(self, network: str, popular: Tuple[Token, ...], table=None, rows: Sequence[int] = ()):
+        self.network = network
+        self._popular = popular
+        self._table = table
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._popular) + len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("token index out of range")
+        if index < len(self._popular):
+            return self._popular[index]
+        return self._table.token(self._rows[index - len(self._popular)], self.network)
+
+    def __iter__(self):
+        yield from self._popular
+        for row in self._rows:
+            yield self._table.token(row, self.network)
+
+
+def _address_key(network_key: str, address: str) -> str:
+    # Base58 mint addresses are case-sensitive; hex addresses are not
+    return address if network_key == SOLANA_NETWORK else address.lower()
+
+
+def _raw_address(network_key: str, address: str) -> Optional[bytes]:
+    """Raw bytes of a contract or mint address, or None if it is not one"""
+    try:
+        if network_key == SOLANA_NETWORK:
+            from solders.pubkey import Pubkey
+            return bytes(Pubkey.from_string(address))
+        raw = bytes.fromhex(address[2:]) if address[:2] in ("0x", "0X") else b""
+    except ValueError:
+        return None
+    return raw if len(raw) == 20 else None
+
+
+class TokenRegistry:
+    """
+    Tokens of every network with lookup indexes
+
+    The popular tokens from the configuration come first, in configured
+    order, followed by any token-list entries not already among them.
+    Symbol and address lookups are scoped to a network; symbols are
+    case-insensitive, as are EVM addresses. Token-list entries are found by
+    binary search in the table and only looked-up tokens are kept.
+    """
+
+    def __init__(self, evm_tokens: Mapping[str, Sequence[Mapping[str, str]]],
+                 solana_tokens: Sequence[Mapping[str, str]] = (), table=None):
+        """
+        Compile raw token configuration
+
+        Args:
+            evm_tokens: Network key -> entries with symbol, name, address, decimals
+            solana_tokens: Entries with symbol, name, mint, decimals
+            table: Optional TokenTable with additional token-list entries
+        """
+        self.table = table
+        self._popular: Dict[str, Tuple[Token, ...]] = {}
+        self._tokens: Dict[str, NetworkTokens] = {}
+        self._addresses: Dict[str, Tuple[Union[str, bytes], ...]] = {}
+        self._by_symbol: Dict[Tuple[str, str], Token] = {}
+        self._by_address: Dict[Tuple[str, str], Token] = {}
+        # Raw addresses of the popular tokens, whose token-list rows are skipped
+        self._popular_raw: Dict[str, set] = {}
+
+        for network_key, entries in evm_tokens.items():
+            self._add_network(network_key, (
+                Token(network_key, entry["symbol"], entry["name"], to_checksum_address(entry["address"]), int(entry["decimals"]))
+                for entry in entries
+            ))
+        self._add_network(SOLANA_NETWORK, (
+            Token(SOLANA_NETWORK, entry["symbol"], entry["name"], entry["mint"], int(entry["decimals"]))
+            for entry in solana_tokens
+        ))
+
+        if table is not None:
+            for network_key in table.networks():
+                self._attach_table_rows(network_key)
+
+    def _add_network(self, network_key: str, tokens: Iterable[Token]):
+        tokens = tuple(tokens)
+        self._popular[network_key] = tokens
+        self._tokens[network_key] = NetworkTokens(network_key, tokens)
+        for token in tokens:
+            self._by_symbol.setdefault((network_key, token.symbol.upper()), token)
+            self._by_address[(network_key, _address_key(network_key, token.address))] = token
+
+    def _attach_table_rows(self, network_key: str):
+        """Append a network's token-list rows, skipping popular tokens"""
+        popular = self._popular.get(network_key, ())
+        rows = self.table.rows(network_key)
+
+        if network_key == SOLANA_NETWORK:
+            from solders.pubkey import Pubkey
+            popular_raw = {bytes(Pubkey.from_string(token.address)) for token in popular}
+        else:
+            popular_raw = {bytes.fromhex(token.address[2:]) for token in popular}
+
+        self._popular_raw[network_key] = popular_raw
+        if popular_raw:
+            width = self.table.address_width(network_key)
+            kept = array("I", (row for row in rows if self.table.raw_address(row, width) not in popular_raw))
+            if len(kept) < len(rows):
+                rows = kept
+
+        self._tokens[network_key] = NetworkTokens(network_key, popular, self.table, rows)
+        self._addresses.pop(network_key, None)
+
+    def _find_symbol(self, network_key: str, symbol: str) -> Optional[Token]:
+        """First token-list entry of a network with a symbol"""
+        popular_raw = self._popular_raw.get(network_key, ())
+        width = self.table.address_width(network_key)
+        for row in self.table.find_symbol(network_key, symbol):
+            if self.table.raw_address(row, width) not in popular_raw:
+                return self.table.token(row, network_key)
+        return None
+
+    def _find_address(self, network_key: str, address: str) -> Optional[Token]:
+        """Token-list entry of a network with an address"""
+        raw = _raw_address(network_key, address)
+        row = self.table.find_address(network_key, raw) if raw is not None else None
+        return self.table.token(row, network_key) if row is not None else None
+
+    def for_network(self, network_key: str) -> Sequence[Token]:
+        """Tokens of a network: popular tokens first, then token-list entries"""
+        return self._tokens.get(network_key, ())
+
+    def popular(self, network_key: str) -> Tuple[Token, ...]:
+        """Only the configured popular tokens of a network"""
+        return self._popular.get(network_key, ())
+
+    def addresses(self, network_key: str) -> Tuple[Union[str, bytes], ...]:
+        """
+        Multicall targets of a network, aligned with for_network
+
+        Popular tokens are checksummed hex strings; token-list entries are
+        their raw address bytes, which encode without any checksum work.
+        """
+        addresses = self._addresses.get(network_key)
+        if addresses is None:
+            tokens = self._tokens.get(network_key)
+            if tokens is None:
+                return ()
+            popular = self._popular[network_key]
+            width = self.table.address_width(network_key) if self.table is not None else 20
+            addresses = tuple(token.address for token in popular) + tuple(
+                self.table.raw_address(row, width) for row in tokens._rows
+            )
+            self._addresses[network_key] = addresses
+        return addresses
+
+    def by_symbol(self, network_key: str, symbol: str) -> Optional[Token]:
+        """Find a token by symbol on a network"""
+        key = (network_key, symbol.upper())
+        token = self._by_symbol.get(key)
+        if token is None and self.table is not None:
+            token = self._find_symbol(network_key, symbol)
+            if token is not None:
+                self._by_symbol[key] = token
+        return token
+
+    def by_address(self, network_key: str, address: str) -> Optional[Token]:
+        """Find a token by contract or mint address on a network"""
+        key = (network_key, _address_key(network_key, address))
+        token = self._by_address.get(key)
+        if token is None and self.table is not None:
+            token = self._find_address(network_key, address)
+            if token is not None:
+                self._by_address[key] = token
+        return token
+
+    def networks(self) -> Tuple[str, ...]:
+        """Network keys with a token table"""
+        return tuple(self._tokens)
+
+
+def _open_configured_table():
+    if not TOKEN_LIST_PATH:
+        return None
+    from .tokenlist import open_token_table
+    try:
+        return open_token_table(TOKEN_LIST_PATH)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load token list {TOKEN_LIST_PATH}: {e}")
+        return None
+
+
+# Process-wide registry of the popular tokens plus the configured token list
+TOKENS = TokenRegistry(POPULAR_TOKENS, SOLANA_POPULAR_TOKENS, _open_configured_table())
@@ -0,0 +1,317 @@
+"""Uniswap-style token lists compiled into a memory-mapped columnar table"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from ..config import EVM_NETWORKS
+from ..validators import to_checksum_address
+from .registry import SOLANA_NETWORK, Token
+
+logger = logging.getLogger(__name__)
+
+# chainId used for Solana mainnet in Solana token lists
+SOLANA_CHAIN_ID = 101
+
+# Table layout (little-endian):
+#   header     magic, version, network count, token count, string blob size
+#   networks   one (key, first row, row count, address width) entry per network
+#   decimals   u8 per token
+#   addresses  32-byte slot per token (raw address, zero-padded)
+#   offsets    u32 per token + 1 into the string blob
+#   by address u32 row per token; each network's rows sorted by raw address
+#   by symbol  u32 row per token; each network's rows sorted by upper-case symbol, then row
+#   strings    utf-8 "address\0symbol\0name" per token
+MAGIC = b"TKNL"
+VERSION = 2
+_HEADER = struct.Struct("<4sHHII")
+_NETWORK = struct.Struct("<16sIII")
+_U32 = struct.Struct("<I")
+ADDRESS_SLOT = 32
+
+
+def default_chain_ids() -> Dict[int, str]:
+    """Map token-list chainIds to network keys"""
+    chain_ids = {config["chain_id"]: network_key for network_key, config in EVM_NETWORKS.items()}
+    chain_ids[SOLANA_CHAIN_ID] = SOLANA_NETWORK
+    return chain_ids
+
+
+def load_token_list(path: str) -> List[dict]:
+    """
+    Read the token entries of a token-list JSON file
+
+    Accepts the Uniswap token-list schema ({"tokens": [...]}) or a bare
+    list of token entries.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["tokens"] if isinstance(data, dict) else data
+
+
+def _parse_entry(entry: Mapping, network_key: str) -> Tuple[bytes, str, str, str, int]:
+    """Validate one entry and return (raw address, address text, symbol, name, decimals)"""
+    decimals = int(entry["decimals"])
+    if not 0 <= decimals <= 255:
+        raise ValueError(f"decimals out of range: {decimals}")
+
+    if network_key == SOLANA_NETWORK:
+        from solders.pubkey import Pubkey
+        mint = str(entry["address"])
+        return bytes(Pubkey.from_string(mint)), mint, str(entry["symbol"]), str(entry["name"]), decimals
+
+    address = to_checksum_address(entry["address"])
+    return bytes.fromhex(address[2:]), address, str(entry["symbol"]), str(entry["name"]), decimals
+
+
+def compile_token_lists(paths: Sequence[str], out_path: str,
+                        chain_ids: Optional[Mapping[int, str]] = None) -> int:
+    """
+    Compile token-list JSON files into a token table
+
+    Entries are grouped by network in configuration order; within a network
+    the first occurrence of an address wins. Entries for unknown chains or
+    with invalid fields are skipped. The table is written to a temporary
+    file and renamed into place, so concurrent readers never see a partial
+    table.
+
+    Args:
+        paths: Token-list JSON files
+        out_path: Destination of the compiled table
+        chain_ids: chainId -> network key (default: supported networks)
+
+    Returns:
+        Number of tokens written
+    """
+    chain_ids = chain_ids if chain_ids is not None else default_chain_ids()
+    order = list(dict.fromkeys(chain_ids.values()))
+    rows: Dict[str, Dict[bytes, Tuple[bytes, str, str, str, int]]] = {network_key: {} for network_key in order}
+    skipped = 0
+
+    for path in paths:
+        for entry in load_token_list(path):
+            network_key = chain_ids.get(entry.get("chainId"))
+            if network_key is None:
+                continue
+            try:
+                parsed = _parse_entry(entry, network_key)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.debug(f"Skipping token-list entry {entry.get('address')}: {e}")
+                skipped += 1
+                continue
+            rows[network_key].setdefault(parsed[0], parsed)
+
+    if skipped:
+        logger.warning(f"Skipped {skipped} invalid token-list entries")
+
+    networks = []
+    decimals = bytearray()
+    addresses = bytearray()
+    offsets = bytearray()
+    by_address = bytearray()
+    by_symbol = bytearray()
+    strings = bytearray()
+    for network_key in order:
+        start = len(decimals)
+        width = 32 if network_key == SOLANA_NETWORK else 20
+        symbols = []
+        for raw, address, symbol, name, token_decimals in rows[network_key].values():
+            symbol = symbol.replace("\0", "")
+            symbols.append(symbol.upper())
+            decimals.append(token_decimals)
+            addresses += raw.ljust(ADDRESS_SLOT, b"\0")
+            offsets += _U32.pack(len(strings))
+            strings += "\0".join((address, symbol, name.replace("\0", ""))).encode("utf-8")
+        raws = list(rows[network_key])
+        by_address += b"".join(_U32.pack(start + i) for i in sorted(range(len(raws)), key=raws.__getitem__))
+        by_symbol += b"".join(_U32.pack(start + i) for i in sorted(range(len(symbols)), key=symbols.__getitem__))
+        if len(decimals) > start:
+            networks.append((network_key, start, len(decimals) - start, width))
+    offsets += _U32.pack(len(strings))
+
+    directory = os.path.dirname(os.path.abspath(out_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(networks), len(decimals), len(strings)))
+            for network_key, start, count, width in networks:
+                f.write(_NETWORK.pack(network_key.encode("ascii"), start, count, width))
+            f.write(decimals)
+            f.write(addresses)
+            f.write(offsets)
+            f.write(by_address)
+            f.write(by_symbol)
+            f.write(strings)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return len(decimals)
+
+
+class TokenTable:
+    """
+    Read-only view of a compiled token table
+
+    The file is memory-mapped, so worker processes that open the same table
+    share its pages instead of each holding a private copy. Token objects
+    are only built for the rows that are actually accessed, and lookups by
+    address or symbol binary-search the sorted row indexes in place.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a compiled token table
+
+        Raises:
+            ValueError: If the file is not a token table of a supported version
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, network_count, self._count, blob_size = _HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} token table")
+
+        self._networks: Dict[str, Tuple[int, int, int]] = {}
+        position = _HEADER.size
+        for _ in range(network_count):
+            key, start, count, width = _NETWORK.unpack_from(self._view, position)
+            self._networks[key.rstrip(b"\0").decode("ascii")] = (start, count, width)
+            position += _NETWORK.size
+
+        self._decimals_at = position
+        self._addresses_at = self._decimals_at + self._count
+        self._offsets_at = self._addresses_at + self._count * ADDRESS_SLOT
+        self._by_address_at = self._offsets_at + (self._count + 1) * _U32.size
+        self._by_symbol_at = self._by_address_at + self._count * _U32.size
+        self._strings_at = self._by_symbol_at + self._count * _U32.size
+        if self._strings_at + blob_size > len(self._view):
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def networks(self) -> Tuple[str, ...]:
+        """Network keys present in the table"""
+        return tuple(self._networks)
+
+    def rows(self, network_key: str) -> range:
+        """Row numbers of a network's tokens"""
+        start, count, _ = self._networks.get(network_key, (0, 0, 0))
+        return range(start, start + count)
+
+    def address_width(self, network_key: str) -> int:
+        """Raw address length of a network (20 for EVM, 32 for Solana)"""
+        return self._networks.get(network_key, (0, 0, ADDRESS_SLOT))[2]
+
+    def decimals(self, row: int) -> int:
+        return self._view[self._decimals_at + row]
+
+    def raw_address(self, row: int, width: int = 20) -> bytes:
+        """Raw address bytes of a row"""
+        position = self._addresses_at + row * ADDRESS_SLOT
+        return bytes(self._view[position:position + width])
+
+    def entry(self, row: int) -> Tuple[str, str, str]:
+        """(address, symbol, name) of a row"""
+        start = _U32.unpack_from(self._view, self._offsets_at + row * _U32.size)[0]
+        end = _U32.unpack_from(self._view, self._offsets_at + (row + 1) * _U32.size)[0]
+        address, symbol, name = bytes(
+            self._view[self._strings_at + start:self._strings_at + end]
+        ).decode("utf-8").split("\0")
+        return address, symbol, name
+
+    def _indexed_row(self, index_at: int, position: int) -> int:
+        return _U32.unpack_from(self._view, index_at + position * _U32.size)[0]
+
+    def find_address(self, network_key: str, raw: bytes) -> Optional[int]:
+        """Row of a raw address on a network, or None"""
+        start, count, _ = self._networks.get(network_key, (0, 0, 0))
+        slot = raw.ljust(ADDRESS_SLOT, b"\0")
+
+        def slot_at(position: int) -> bytes:
+            row = self._indexed_row(self._by_address_at, position)
+            return self.raw_address(row, ADDRESS_SLOT)
+
+        position = bisect_left(range(start, start + count), slot, key=slot_at)
+        if position < count and slot_at(start + position) == slot:
+            return self._indexed_row(self._by_address_at, start + position)
+        return None
+
+    def find_symbol(self, network_key: str, symbol: str) -> Iterator[int]:
+        """Rows with a symbol (case-insensitive) on a network, in row order"""
+        start, count, _ = self._networks.get(network_key, (0, 0, 0))
+        symbol = symbol.upper()
+
+        def symbol_at(position: int) -> str:
+            return self.entry(self._indexed_row(self._by_symbol_at, position))[1].upper()
+
+        position = start + bisect_left(range(start, start + count), symbol, key=symbol_at)
+        while position < start + count and symbol_at(position) == symbol:
+            yield self._indexed_row(self._by_symbol_at, position)
+            position += 1
+
+    def token(self, row: int, network_key: str) -> Token:
+        """Build the Token of a row"""
+        address, symbol, name = self.entry(row)
+        return Token(network_key, symbol, name, address, self.decimals(row))
+
+    def close(self):
+        """Release the memory map"""
+        self._view.release()
+        self._mmap.close()
+
+
+def open_token_table(path: str) -> TokenTable:
+    """
+    Open a token table, compiling it first when given a token-list JSON file
+
+    A JSON file is compiled to a sibling ".tokens" file, which is reused
+    until the JSON file changes or the table format does.
+
+    Args:
+        path: Compiled table or token-list JSON file
+
+    Returns:
+        Opened TokenTable
+    """
+    if not path.endswith(".json"):
+        return TokenTable(path)
+
+    compiled = os.path.splitext(path)[0] + ".tokens"
+    if os.path.exists(compiled) and os.path.getmtime(compiled) >= os.path.getmtime(path):
+        try:
+            return TokenTable(compiled)
+        except ValueError:
+            pass
+    count = compile_token_lists([path], compiled)
+    logger.info(f"Compiled {count} tokens from {path} into {compiled}")
+    return TokenTable(compiled)
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    """Compile token-list JSON files from the command line"""
+    parser = argparse.ArgumentParser(description="Compile token-list JSON files into a token table")
+    parser.add_argument("lists", nargs="+", help="Token-list JSON files")
+    parser.add_argument("-o", "--output", required=True, help="Compiled table path")
+    args = parser.parse_args(argv)
+
+    count = compile_token_lists(args.lists, args.output)
+    table = TokenTable(args.output)
+    print(f"Wrote {count} tokens to {args.output}")
+    for network_key in table.networks():
+        print(f"  {network_key}: {len(table.rows(network_key))}")
+    table.close()
+
+
+if __name__ == "__main__":
+    main()
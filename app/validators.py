@@ -1,69 +1,251 @@
 """Address validators for EVM and Solana"""
 
-from web3 import Web3
-import base58
-from typing import Tuple
+from functools import lru_cache
+from eth_hash.auto import keccak
+from solders.pubkey import Pubkey
+from typing import Dict, Iterable, List, Tuple, Union
+from .config import ADDRESS_CACHE_SIZE
 
+INVALID_ADDRESS_MESSAGE = "Invalid address format. Must be valid EVM (0x...) or Solana (base58) address."
 
-def validate_evm_address(address: str) -> Tuple[bool, str]:
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+_BASE58_DIGITS = frozenset("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz")
+
+
+class Address(str):
     """
-    Validate EVM (Ethereum-compatible) address
+    Normalized wallet address
+
+    The string value is the canonical form (checksummed hex for EVM, base58
+    for Solana), so an Address can be passed anywhere an address string is
+    expected. `kind` is 'evm' or 'solana' and `raw` holds the decoded bytes
+    (20 for EVM, 32 for Solana).
+    """
+
+    kind: str
+    raw: bytes
+
+    def __new__(cls, canonical: str, kind: str, raw: bytes):
+        address = super().__new__(cls, canonical)
+        address.kind = kind
+        address.raw = raw
+        return address
+
+    @property
+    def canonical(self) -> str:
+        return str.__str__(self)
+
+    def __reduce__(self):
+        return Address, (self.canonical, self.kind, self.raw)
+
+
+def _to_checksum(raw: bytes) -> str:
+    """EIP-55 checksum of raw address bytes, hashing the hex digits directly"""
+    digits = raw.hex()
+    digest = keccak(digits.encode("ascii")).hex()
+    return "0x" + "".join([upper if nibble > "7" else lower
+                           for lower, upper, nibble in zip(digits, digits.upper(), digest)])
+
+
+def to_checksum_address(address: Union[str, bytes]) -> str:
+    """
+    EIP-55 checksummed form of an EVM address
 
     Args:
-        address: Address string to validate
+        address: Hex address (with or without 0x) or 20 raw bytes
 
-    Returns:
-        Tuple of (is_valid, message)
+    Raises:
+        ValueError: If the address is not 20 bytes of hex
     """
+    raw = address if isinstance(address, bytes) else bytes.fromhex(address[2:] if address[:2] in ("0x", "0X") else address)
+    if len(raw) != 20:
+        raise ValueError(f"EVM address must be 20 bytes, got {len(raw)}")
+    return _to_checksum(raw)
+
+
+def _parse_evm(address: str) -> Address:
+    if not address:
+        raise ValueError("Address cannot be empty")
+
+    if not address.startswith("0x"):
+        raise ValueError("EVM address must start with '0x'")
+
+    if len(address) != 42:
+        raise ValueError(f"EVM address must be 42 characters long, got {len(address)}")
+
+    digits = address[2:]
+    if not _HEX_DIGITS.issuperset(digits):
+        raise ValueError("Invalid EVM address format")
+
+    raw = bytes.fromhex(digits)
+    return Address(_to_checksum(raw), "evm", raw)
+
+
+def _parse_solana(address: str) -> Address:
+    if not address:
+        raise ValueError("Address cannot be empty")
+
+    # Solana addresses are base58 encoded and typically 32-44 characters
+    if len(address) < 32 or len(address) > 44:
+        raise ValueError(f"Solana address length should be between 32-44 characters, got {len(address)}")
+
+    if not _BASE58_DIGITS.issuperset(address):
+        raise ValueError("Invalid Solana address: not valid base58")
+
+    # With the alphabet checked, the native decoder can only fail on size
     try:
-        if not address:
-            return False, "Address cannot be empty"
+        raw = bytes(Pubkey.from_string(address))
+    except ValueError:
+        raise ValueError("Invalid Solana address: decoded length must be 32 bytes")
 
-        if not address.startswith("0x"):
-            return False, "EVM address must start with '0x'"
+    return Address(address, "solana", raw)
 
-        if len(address) != 42:
-            return False, f"EVM address must be 42 characters long, got {len(address)}"
 
-        if not Web3.is_address(address):
-            return False, "Invalid EVM address format"
+_normalize_evm = lru_cache(maxsize=ADDRESS_CACHE_SIZE)(_parse_evm)
+_normalize_solana = lru_cache(maxsize=ADDRESS_CACHE_SIZE)(_parse_solana)
 
-        # Convert to checksum address
-        checksum_address = Web3.to_checksum_address(address)
-        return True, checksum_address
 
-    except Exception as e:
-        return False, f"Address validation error: {str(e)}"
+def normalize_evm_address(address: str) -> Address:
+    """
+    Normalize an EVM address
 
+    Results are memoized, so the checksum (a keccak hash) is computed once
+    per distinct address string.
 
-def validate_solana_address(address: str) -> Tuple[bool, str]:
+    Args:
+        address: Hex address in any letter case
+
+    Returns:
+        Checksummed Address
+
+    Raises:
+        ValueError: If the address is not a valid EVM address
     """
-    Validate Solana address
+    if isinstance(address, Address) and address.kind == "evm":
+        return address
+    return _normalize_evm(address)
+
+
+def normalize_solana_address(address: str) -> Address:
+    """
+    Normalize a Solana address
+
+    Raises:
+        ValueError: If the address is not valid base58 for 32 bytes
+    """
+    if isinstance(address, Address) and address.kind == "solana":
+        return address
+    return _normalize_solana(address)
+
+
+def normalize_address(address: str) -> Address:
+    """
+    Detect the kind of an address and normalize it in one pass
+
+    Args:
+        address: EVM or Solana address string
+
+    Returns:
+        Address with its kind, canonical form and raw bytes
+
+    Raises:
+        ValueError: If the address is neither a valid EVM nor Solana address
+    """
+    if isinstance(address, Address):
+        return address
+
+    if address.startswith("0x") and len(address) == 42:
+        try:
+            return _normalize_evm(address)
+        except ValueError:
+            raise ValueError(INVALID_ADDRESS_MESSAGE)
+
+    if 32 <= len(address) <= 44:
+        try:
+            return _normalize_solana(address)
+        except ValueError:
+            raise ValueError(INVALID_ADDRESS_MESSAGE)
+
+    raise ValueError(INVALID_ADDRESS_MESSAGE)
+
+
+def validate_addresses(addresses: Iterable[str]) -> List[Tuple[bool, str]]:
+    """
+    Validate many addresses at once
+
+    Each address is classified by length and prefix, and its characters are
+    checked against the hex or base58 alphabet before any decoding. Repeated
+    addresses in the input are validated once. The per-address memo used by
+    normalize_address is bypassed, so a large batch does not evict the
+    addresses of regular lookups.
+
+    Args:
+        addresses: EVM and/or Solana address strings
+
+    Returns:
+        One (is_valid, message) tuple per input, in input order; on success
+        the message is the normalized Address
+    """
+    seen: Dict[str, Tuple[bool, str]] = {}
+    results = []
+    append = results.append
+
+    for address in addresses:
+        result = seen.get(address)
+        if result is None:
+            if isinstance(address, Address):
+                result = (True, address)
+            elif len(address) == 42 and address.startswith("0x"):
+                try:
+                    result = (True, _parse_evm(address))
+                except ValueError as e:
+                    result = (False, str(e))
+            elif 32 <= len(address) <= 44:
+                try:
+                    result = (True, _parse_solana(address))
+                except ValueError as e:
+                    result = (False, str(e))
+            else:
+                result = (False, INVALID_ADDRESS_MESSAGE)
+            seen[address] = result
+        append(result)
+
+    return results
+
+
+def validate_evm_address(address: str) -> Tuple[bool, str]:
+    """
+    Validate EVM (Ethereum-compatible) address
 
     Args:
         address: Address string to validate
 
     Returns:
-        Tuple of (is_valid, message)
+        Tuple of (is_valid, message); on success the message is the
+        checksummed Address
     """
     try:
-        if not address:
-            return False, "Address cannot be empty"
+        return True, normalize_evm_address(address)
+    except ValueError as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"Address validation error: {str(e)}"
 
-        # Solana addresses are base58 encoded and typically 32-44 characters
-        if len(address) < 32 or len(address) > 44:
-            return False, f"Solana address length should be between 32-44 characters, got {len(address)}"
 
-        # Try to decode base58
-        try:
-            decoded = base58.b58decode(address)
-            if len(decoded) != 32:
-                return False, "Invalid Solana address: decoded length must be 32 bytes"
-        except Exception:
-            return False, "Invalid Solana address: not valid base58"
+def validate_solana_address(address: str) -> Tuple[bool, str]:
+    """
+    Validate Solana address
 
-        return True, address
+    Args:
+        address: Address string to validate
 
+    Returns:
+        Tuple of (is_valid, message); on success the message is the Address
+    """
+    try:
+        return True, normalize_solana_address(address)
+    except ValueError as e:
+        return False, str(e)
     except Exception as e:
         return False, f"Address validation error: {str(e)}"
 
@@ -78,12 +260,7 @@ def detect_address_type(address: str) -> str:
     Returns:
         'evm', 'solana', or 'unknown'
     """
-    if address.startswith("0x") and len(address) == 42:
-        is_valid, _ = validate_evm_address(address)
-        return "evm" if is_valid else "unknown"
-
-    if len(address) >= 32 and len(address) <= 44:
-        is_valid, _ = validate_solana_address(address)
-        return "solana" if is_valid else "unknown"
-
-    return "unknown"
+    try:
+        return normalize_address(address).kind
+    except ValueError:
+        return "unknown"
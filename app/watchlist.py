@@ -0,0 +1,451 @@
+"""Watched addresses refreshed in the background and served from memory"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import logging
+from .chains.registry import DEFAULT_TOKENS, ClientRegistry
+from .chains.scheduler import WATCHLIST, priority
+from .chains.transfers import CursorStore, TransferLogTracker
+from .cache import BalanceCache
+from .config import (
+    EVM_NETWORKS,
+    SOLANA_CONFIG,
+    TRANSFER_TRACKING,
+    WATCHLIST_CHUNK_SIZE,
+    WATCHLIST_INTERVAL_BLOCKS,
+    WATCHLIST_MAX_ADDRESSES,
+    WATCHLIST_MAX_AGE,
+    WATCHLIST_MAX_BACKOFF,
+    WATCHLIST_MIN_INTERVAL,
+    WATCHLIST_RESYNC_INTERVAL,
+)
+from .models import NetworkBalance
+from .validators import Address, normalize_address
+
+logger = logging.getLogger(__name__)
+
+# Backoff doubles per unchanged refresh; the exponent is capped to keep it finite
+_MAX_BACKOFF_STEPS = 16
+
+
+class _Snapshot:
+    # values: raw [native, *tokens] of EVM snapshots kept for incremental updates
+    __slots__ = ("value", "values", "checked_at", "synced_at", "next_due", "unchanged")
+
+    def __init__(self, value: NetworkBalance, checked_at: float, next_due: float):
+        self.value = value
+        self.values: Optional[List[Optional[int]]] = None
+        self.checked_at = checked_at
+        self.synced_at = checked_at
+        self.next_due = next_due
+        self.unchanged = 0
+
+
+class Watchlist:
+    """
+    Addresses whose balances are kept fresh by a background scheduler
+
+    Every chain has its own refresh loop ticking once per block time (at
+    least min_interval seconds). Each tick refreshes the watched addresses
+    that are due, chunk_size addresses per shared RPC batch. A wallet whose
+    balances did not change is checked half as often after every unchanged
+    refresh, up to max_backoff seconds apart; any change resets it to the
+    block-time cadence.
+
+    With transfer tracking, EVM chains read the Transfer logs of their
+    tracked tokens every tick and re-read only the (wallet, token) balances
+    that appear in them. Other refreshes read just the native balance, and
+    every wallet is fully re-read once per resync_interval to pick up changes
+    no log announces. A partial re-read that fails, in whole or in part, is
+    replaced by a full re-read on the next tick, since the logs that asked
+    for it have already been consumed.
+    """
+
+    def __init__(
+        self,
+        registry: ClientRegistry,
+        max_addresses: int = WATCHLIST_MAX_ADDRESSES,
+        interval_blocks: float = WATCHLIST_INTERVAL_BLOCKS,
+        min_interval: float = WATCHLIST_MIN_INTERVAL,
+        max_backoff: float = WATCHLIST_MAX_BACKOFF,
+        max_age: float = WATCHLIST_MAX_AGE,
+        chunk_size: int = WATCHLIST_CHUNK_SIZE,
+        transfer_tracking: bool = TRANSFER_TRACKING,
+        resync_interval: float = WATCHLIST_RESYNC_INTERVAL,
+        cursors: Optional[CursorStore] = None
+    ):
+        """
+        Initialize the watchlist (call start() to begin refreshing)
+
+        Args:
+            registry: Started client registry to query through
+            max_addresses: Maximum number of watched addresses
+            interval_blocks: Refresh cadence measured in block times of each chain
+            min_interval: Shortest refresh interval in seconds
+            max_backoff: Longest interval between refreshes of an unchanged wallet
+            max_age: Snapshots older than this many seconds are not served
+            chunk_size: Addresses per shared RPC batch
+            transfer_tracking: Update EVM snapshots incrementally from Transfer logs
+            resync_interval: Seconds between full re-reads of a tracked EVM wallet
+            cursors: Transfer log cursors (default: loaded from TRANSFER_CURSOR_PATH)
+        """
+        self.registry = registry
+        self.max_addresses = max_addresses
+        self.max_backoff = max_backoff
+        self.max_age = max_age
+        self.chunk_size = chunk_size
+        self.transfer_tracking = transfer_tracking
+        self.resync_interval = resync_interval
+        self.cursors = cursors if cursors is not None else CursorStore()
+        self.intervals: Dict[str, float] = {
+            network_key: max(min_interval, config["block_time"] * interval_blocks)
+            for network_key, config in EVM_NETWORKS.items()
+        }
+        self.intervals["solana"] = max(min_interval, SOLANA_CONFIG["block_time"] * interval_blocks)
+
+        # Insertion-ordered sets of watched addresses by address type
+        self._addresses: Dict[str, Dict[Address, None]] = {"evm": {}, "solana": {}}
+        self._snapshots: Dict[str, Dict[Address, _Snapshot]] = {network_key: {} for network_key in self.intervals}
+        self._wake: Dict[str, asyncio.Event] = {network_key: asyncio.Event() for network_key in self.intervals}
+        self._tasks: List[asyncio.Task] = []
+        self._trackers: Dict[str, Optional[TransferLogTracker]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {
+            network_key: {"refreshed": 0, "changed": 0, "errors": 0, "touched": 0} for network_key in self.intervals
+        }
+
+    def __len__(self) -> int:
+        return len(self._addresses["evm"]) + len(self._addresses["solana"])
+
+    def __contains__(self, address: str) -> bool:
+        try:
+            wallet = normalize_address(address)
+        except ValueError:
+            return False
+        return wallet in self._addresses[wallet.kind]
+
+    @staticmethod
+    def _networks(kind: str) -> List[str]:
+        return list(EVM_NETWORKS) if kind == "evm" else ["solana"]
+
+    def addresses(self) -> List[str]:
+        """Watched addresses in registration order, EVM first"""
+        return [*self._addresses["evm"], *self._addresses["solana"]]
+
+    def add(self, address: str) -> bool:
+        """
+        Watch an address; it is refreshed on the next tick of each of its chains
+
+        Args:
+            address: Wallet address (EVM or Solana)
+
+        Returns:
+            True if the address was not watched before
+
+        Raises:
+            ValueError: If the address is invalid or the watchlist is full
+        """
+        wallet = normalize_address(address)
+        watched = self._addresses[wallet.kind]
+        if wallet in watched:
+            return False
+        if len(self) >= self.max_addresses:
+            raise ValueError(f"Watchlist is full ({self.max_addresses} addresses)")
+
+        watched[wallet] = None
+        for network_key in self._networks(wallet.kind):
+            self._wake[network_key].set()
+        return True
+
+    def remove(self, address: str) -> bool:
+        """
+        Stop watching an address and drop its snapshots
+
+        Returns:
+            True if the address was watched
+        """
+        try:
+            wallet = normalize_address(address)
+        except ValueError:
+            return False
+        if self._addresses[wallet.kind].pop(wallet, False) is False:
+            return False
+        for network_key in self._networks(wallet.kind):
+            self._snapshots[network_key].pop(wallet, None)
+        return True
+
+    def snapshot(self, wallet: Address,
+                 network_keys: Optional[Sequence[str]] = None) -> Optional[Tuple[List[NetworkBalance], float]]:
+        """
+        Balances of a watched address from the in-memory snapshot
+
+        Args:
+            wallet: Normalized wallet address
+            network_keys: Networks wanted (default: every network of the address type)
+
+        Returns:
+            Tuple of (NetworkBalance objects in network order, age in seconds
+            of the oldest of them), or None unless every wanted network has a
+            snapshot younger than max_age
+        """
+        if wallet not in self._addresses[wallet.kind]:
+            return None
+
+        keys = self._networks(wallet.kind) if network_keys is None else network_keys
+        balances = []
+        oldest = now = time.monotonic()
+        for network_key in keys:
+            snapshot = self._snapshots[network_key].get(wallet)
+            if snapshot is None:
+                return None
+            balances.append(snapshot.value)
+            oldest = min(oldest, snapshot.checked_at)
+
+        age = now - oldest
+        return (balances, age) if age <= self.max_age else None
+
+    async def _fetch_many(self, network_key: str,
+                          addresses: List[Address]) -> Tuple[List[Union[NetworkBalance, Exception]], Optional[int]]:
+        try:
+            if network_key == "solana":
+                return await self.registry.solana.fetch_all_balances_many(addresses)
+            return await self.registry.evm(network_key).fetch_all_balances_many(addresses)
+        except Exception as e:
+            return [e for _ in addresses], None
+
+    def _head(self, network_key: str) -> int:
+        """Chain head taken before a fetch, to tag cached values with when the read reports no block"""
+        return self.registry.cache.head(network_key) if self.registry.cache is not None else -1
+
+    def _store(self, network_key: str, address: Address, result: NetworkBalance, checked_at: float, head: int,
+               values: Optional[List[Optional[int]]] = None, synced: bool = True):
+        """Record a refreshed balance and schedule the next refresh"""
+        interval = self.intervals[network_key]
+        snapshots = self._snapshots[network_key]
+        stats = self._stats[network_key]
+        stats["refreshed"] += 1
+
+        snapshot = snapshots.get(address)
+        if snapshot is None:
+            snapshot = snapshots[address] = _Snapshot(result, checked_at, checked_at + interval)
+        elif snapshot.value == result:
+            snapshot.unchanged = min(snapshot.unchanged + 1, _MAX_BACKOFF_STEPS)
+            snapshot.checked_at = checked_at
+            snapshot.next_due = checked_at + min(interval * 2 ** snapshot.unchanged, max(interval, self.max_backoff))
+        else:
+            stats["changed"] += 1
+            snapshot.value = result
+            snapshot.unchanged = 0
+            snapshot.checked_at = checked_at
+            snapshot.next_due = checked_at + interval
+
+        snapshot.values = values
+        if synced:
+            snapshot.synced_at = checked_at
+
+        if self.registry.cache is not None:
+            self.registry.cache.set(BalanceCache.make_key(network_key, address, DEFAULT_TOKENS), result, head)
+
+    def _failed(self, network_key: str, address: Address, error: Exception, checked_at: float):
+        self._stats[network_key]["errors"] += 1
+        logger.debug(f"Watchlist refresh of {address} on {network_key} failed: {error}")
+        snapshot = self._snapshots[network_key].get(address)
+        if snapshot is not None:
+            snapshot.next_due = checked_at + self.intervals[network_key]
+
+    def _partial_failed(self, network_key: str, address: Address, error: Exception, checked_at: float):
+        """Record a failed partial re-read; the Transfer logs that asked for it are already consumed"""
+        snapshot = self._snapshots[network_key].get(address)
+        if snapshot is not None:
+            # Without its raw values the wallet is fully re-read on the next tick
+            snapshot.values = None
+        self._failed(network_key, address, error, checked_at)
+
+    def _tracker(self, network_key: str) -> Optional[TransferLogTracker]:
+        if network_key not in self._trackers:
+            tracker = None
+            if self.transfer_tracking and network_key != "solana":
+                client = self.registry.evm(network_key)
+                # Incremental updates patch Multicall3 results
+                if client.use_multicall:
+                    tracker = TransferLogTracker(client, self.cursors)
+            self._trackers[network_key] = tracker
+        return self._trackers[network_key]
+
+    async def refresh(self, network_key: str, force: bool = False) -> int:
+        """
+        Refresh the due addresses of one chain
+
+        Args:
+            network_key: Network to refresh
+            force: Fully re-read every watched address, due or not
+
+        Returns:
+            Number of addresses queried
+        """
+        tracker = self._tracker(network_key)
+        if tracker is not None:
+            return await self._refresh_tracked(network_key, tracker, force)
+
+        kind = "solana" if network_key == "solana" else "evm"
+        snapshots = self._snapshots[network_key]
+
+        now = time.monotonic()
+        due = [
+            address for address in self._addresses[kind]
+            if force or address not in snapshots or snapshots[address].next_due <= now
+        ]
+
+        for start in range(0, len(due), self.chunk_size):
+            chunk = due[start:start + self.chunk_size]
+            head = self._head(network_key)
+            results, read_at = await self._fetch_many(network_key, chunk)
+            if read_at is not None:
+                head = read_at
+            checked_at = time.monotonic()
+
+            for address, result in zip(chunk, results):
+                # The address may have been removed while the chunk was in flight
+                if address not in self._addresses[kind]:
+                    continue
+                if isinstance(result, Exception):
+                    self._failed(network_key, address, result, checked_at)
+                else:
+                    self._store(network_key, address, result, checked_at, head)
+
+        return len(due)
+
+    async def _refresh_tracked(self, network_key: str, tracker: TransferLogTracker, force: bool) -> int:
+        """Refresh an EVM chain from its Transfer logs, re-reading only what may have changed"""
+        watched = self._addresses["evm"]
+        if not watched:
+            # Nothing to report; the cursor catches up (or resyncs) once an address is added
+            return 0
+        snapshots = self._snapshots[network_key]
+        client = tracker.client
+
+        try:
+            touched = await tracker.poll({address.raw: address for address in watched})
+        except Exception as e:
+            # The cursor did not move; these logs are read again on the next tick
+            logger.warning(f"Could not read Transfer logs on {network_key}: {e}")
+            self._stats[network_key]["errors"] += 1
+            touched = {}
+        if touched:
+            self._stats[network_key]["touched"] += len(touched)
+
+        now = time.monotonic()
+        full: List[Address] = []
+        partial: List[Tuple[Address, List[int]]] = []
+        for address in watched:
+            snapshot = snapshots.get(address)
+            if (force or touched is None or snapshot is None or snapshot.values is None
+                    or now - snapshot.synced_at >= self.resync_interval):
+                full.append(address)
+            elif address in touched:
+                partial.append((address, sorted(touched[address])))
+            elif snapshot.next_due <= now:
+                # No Transfer logs: only the native balance can have changed
+                partial.append((address, []))
+
+        for start in range(0, len(full), self.chunk_size):
+            chunk = full[start:start + self.chunk_size]
+            head = self._head(network_key)
+            try:
+                values, read_at = await client.get_balance_values_many(chunk)
+                if read_at is not None:
+                    head = read_at
+            except Exception as e:
+                values = [e for _ in chunk]
+            checked_at = time.monotonic()
+            for address, address_values in zip(chunk, values):
+                if address not in watched:
+                    continue
+                if isinstance(address_values, Exception):
+                    self._failed(network_key, address, address_values, checked_at)
+                elif address_values[0] is None:
+                    self._failed(network_key, address, RuntimeError("native balance read failed"), checked_at)
+                else:
+                    self._store(network_key, address, client.balance_from_values(address, address_values),
+                                checked_at, head, address_values)
+
+        for start in range(0, len(partial), self.chunk_size):
+            chunk = partial[start:start + self.chunk_size]
+            reads = [(address, index) for address, indices in chunk for index in (None, *indices)]
+            head = self._head(network_key)
+            try:
+                results, read_at = await client.read_balances(reads)
+                if read_at is not None:
+                    head = read_at
+            except Exception as e:
+                checked_at = time.monotonic()
+                for address, _ in chunk:
+                    self._partial_failed(network_key, address, e, checked_at)
+                continue
+
+            checked_at = time.monotonic()
+            position = 0
+            for address, indices in chunk:
+                read = results[position:position + len(indices) + 1]
+                position += len(indices) + 1
+                snapshot = snapshots.get(address)
+                if address not in watched or snapshot is None:
+                    continue
+                failed = sum(balance is None for balance in read)
+                if failed:
+                    self._partial_failed(network_key, address,
+                                         RuntimeError(f"{failed} of {len(read)} balance reads failed"), checked_at)
+                    continue
+                # Patch the re-read balances in
+                values = list(snapshot.values)
+                for index, balance in zip((-1, *indices), read):
+                    values[index + 1] = balance
+                self._store(network_key, address, client.balance_from_values(address, values),
+                            checked_at, head, values, synced=False)
+
+        return len(full) + len(partial)
+
+    async def _run(self, network_key: str):
+        wake = self._wake[network_key]
+        interval = self.intervals[network_key]
+        while True:
+            wake.clear()
+            try:
+                with priority(WATCHLIST):
+                    await self.refresh(network_key)
+            except Exception as e:
+                logger.error(f"Watchlist refresh failed on {network_key}: {e}")
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start one refresh loop per chain"""
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._run(network_key)) for network_key in self.intervals]
+
+    async def stop(self):
+        """Stop the refresh loops and save the transfer log cursors"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.cursors.flush()
+
+    def stats(self) -> dict:
+        """Watched address counts and per-chain refresh counters"""
+        return {
+            "addresses": len(self),
+            "max_addresses": self.max_addresses,
+            "networks": {
+                network_key: {
+                    "interval": self.intervals[network_key],
+                    "snapshots": len(self._snapshots[network_key]),
+                    "transfer_tracking": self._trackers.get(network_key) is not None,
+                    "cursor": self.cursors.get(network_key),
+                    **self._stats[network_key]
+                }
+                for network_key in self.intervals
+            }
+        }
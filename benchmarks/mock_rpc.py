@@ -0,0 +1,317 @@
+"""
+Local mock JSON-RPC node for offline benchmarks
+
+Speaks the EVM and Solana methods the balance clients use, including
+JSON-RPC batch arrays and Multicall3 aggregate3 eth_calls. Balances are
+derived deterministically from the owner and token, so repeated runs return
+the same data. Latency and transport errors (HTTP 503) can be injected.
+
+Usage as a standalone server:
+    python benchmarks/mock_rpc.py [--port 8545] [--latency 0.02] [--error-rate 0.01]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from eth_abi import decode, encode
+from solders.pubkey import Pubkey
+
+AGGREGATE3_SELECTOR = "82ad56cb"
+GET_ETH_BALANCE_SELECTOR = "4d2301cc"
+GET_BLOCK_NUMBER_SELECTOR = "42cbb15c"
+BALANCE_OF_SELECTOR = "70a08231"
+DECIMALS_SELECTOR = "313ce567"
+
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+BLOCK_NUMBER = 19_000_000
+SLOT = 250_000_000
+
+
+def _digest(*parts: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(b"|".join(parts), digest_size=8).digest(), "big")
+
+
+def amount_for(owner: bytes, token: bytes) -> int:
+    """Deterministic balance: about one in three holdings is non-zero"""
+    value = _digest(owner, token)
+    return 0 if value % 3 else value % 10**24
+
+
+class MockRPCServer:
+    """
+    Threaded mock node on localhost
+
+    Attributes:
+        latency: Seconds added to every HTTP request
+        jitter: Extra random latency of up to this many seconds
+        error_rate: Fraction of HTTP requests answered with 503
+        discover_accounts: Token accounts returned by getTokenAccountsByOwner
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 discover_accounts: int = 20, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.discover_accounts = discover_accounts
+        self.host = host
+        self.port = port
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._mints: set = set()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.methods: Counter = Counter()
+        self.http_requests = 0
+        self.injected_errors = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "MockRPCServer":
+        handler = type("Handler", (_Handler,), {"mock": self})
+        self._server = _Server((self.host, self.port), handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "MockRPCServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def reset(self):
+        """Clear the request counters"""
+        with self._lock:
+            self.methods.clear()
+            self.http_requests = 0
+            self.injected_errors = 0
+
+    def snapshot(self) -> dict:
+        """Copy of the request counters"""
+        with self._lock:
+            return {
+                "http_requests": self.http_requests,
+                "rpc_calls": sum(self.methods.values()),
+                "injected_errors": self.injected_errors,
+                "methods": dict(self.methods)
+            }
+
+    def _admit(self) -> bool:
+        """Count an HTTP request, sleep the injected latency and decide whether it fails"""
+        with self._lock:
+            self.http_requests += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.injected_errors += 1
+        if delay:
+            time.sleep(delay)
+        return not failed
+
+    def handle(self, request: dict) -> dict:
+        method = request.get("method")
+        params = request.get("params") or []
+        with self._lock:
+            self.methods[method] += 1
+
+        handler = getattr(self, "_rpc_" + str(method), None)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32601, "message": f"Method not found: {method}"}}
+        try:
+            result = handler(params)
+        except _RPCFailure as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": e.code, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    # EVM
+
+    def _rpc_web3_clientVersion(self, params):
+        return "MockRPC/1.0"
+
+    def _rpc_eth_chainId(self, params):
+        return "0x1"
+
+    def _rpc_net_version(self, params):
+        return "1"
+
+    def _rpc_eth_blockNumber(self, params):
+        return hex(BLOCK_NUMBER)
+
+    def _rpc_eth_getBalance(self, params):
+        return hex(amount_for(bytes.fromhex(params[0][2:]), b"native"))
+
+    def _rpc_eth_call(self, params):
+        target = bytes.fromhex(params[0]["to"][2:])
+        data = bytes.fromhex(params[0].get("data", params[0].get("input", "0x"))[2:])
+        if data[:4].hex() == AGGREGATE3_SELECTOR:
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = [self._evm_subcall(bytes.fromhex(call_target[2:]), call_data)
+                       for call_target, _, call_data in calls]
+            return "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+        success, output = self._evm_subcall(target, data)
+        if not success:
+            raise _RPCFailure(3, "execution reverted")
+        return "0x" + output.hex()
+
+    def _rpc_eth_getLogs(self, params):
+        # Balances never change, so no Transfer events are ever emitted
+        return []
+
+    def _evm_subcall(self, target: bytes, data: bytes):
+        selector = data[:4].hex()
+        if selector == GET_BLOCK_NUMBER_SELECTOR:
+            return True, encode(["uint256"], [BLOCK_NUMBER])
+        if selector == GET_ETH_BALANCE_SELECTOR:
+            return True, encode(["uint256"], [amount_for(data[16:36], b"native")])
+        if selector == BALANCE_OF_SELECTOR:
+            return True, encode(["uint256"], [amount_for(data[16:36], target)])
+        if selector == DECIMALS_SELECTOR:
+            return True, encode(["uint8"], [18])
+        return False, b""
+
+    # Solana
+
+    def _rpc_getHealth(self, params):
+        return "ok"
+
+    def _rpc_getSlot(self, params):
+        return SLOT
+
+    def _rpc_getBalance(self, params):
+        owner = bytes(Pubkey.from_string(params[0]))
+        return {"context": {"slot": SLOT}, "value": amount_for(owner, b"native") % 10**15}
+
+    def _rpc_getTokenAccountBalance(self, params):
+        account = bytes(Pubkey.from_string(params[0]))
+        amount = amount_for(account, b"token") % 10**15
+        if not amount:
+            raise _RPCFailure(-32602, "Invalid param: could not find account")
+        return {"context": {"slot": SLOT},
+                "value": {"amount": str(amount), "decimals": 6, "uiAmount": amount / 10**6,
+                          "uiAmountString": str(amount / 10**6)}}
+
+    def _rpc_getMultipleAccounts(self, params):
+        return {"context": {"slot": SLOT}, "value": [self._account(key) for key in params[0]]}
+
+    def _account(self, key: str) -> Optional[dict]:
+        raw = bytes(Pubkey.from_string(key))
+        with self._lock:
+            is_mint = key in self._mints
+        if is_mint:
+            # Mint layout: mint_authority COption (36) | supply u64 | decimals u8 | initialized | freeze_authority
+            data = bytes(36) + struct.pack("<QBB", 10**15, 6 + raw[0] % 13, 1) + bytes(36)
+        else:
+            amount = amount_for(raw, b"token") % 10**15
+            if not amount:
+                return None
+            data = bytes(64) + struct.pack("<Q", amount) + bytes(93)
+        return {"data": [base64.b64encode(data).decode(), "base64"], "executable": False,
+                "lamports": 2039280, "owner": TOKEN_PROGRAM_ID, "rentEpoch": 0, "space": len(data)}
+
+    def _rpc_getTokenAccountsByOwner(self, params):
+        owner = bytes(Pubkey.from_string(params[0]))
+        program = params[1]["programId"].encode()
+        accounts = []
+        for index in range(self.discover_accounts):
+            mint = hashlib.blake2b(owner + program + index.to_bytes(4, "big"), digest_size=32).digest()
+            with self._lock:
+                self._mints.add(str(Pubkey(mint)))
+            data = mint + owner + struct.pack("<Q", amount_for(owner, mint) % 10**15 + 1) + bytes(93)
+            accounts.append({
+                "pubkey": str(Pubkey(hashlib.blake2b(mint + owner, digest_size=32).digest())),
+                "account": {"data": [base64.b64encode(data).decode(), "base64"], "executable": False,
+                            "lamports": 2039280, "owner": params[1]["programId"], "rentEpoch": 0, "space": 165}
+            })
+        return {"context": {"slot": SLOT}, "value": accounts}
+
+
+class _RPCFailure(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients drop connections on timeouts, hedging and failover
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock: MockRPCServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # solana-py's health check
+        self._send(200, b"ok", "text/plain")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.mock._admit():
+            self._send(503, b'{"error": "injected failure"}')
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._send(400, b'{"error": "invalid JSON"}')
+            return
+        if isinstance(payload, list):
+            response = [self.mock.handle(request) for request in payload]
+        else:
+            response = self.mock.handle(payload)
+        self._send(200, json.dumps(response).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock EVM/Solana JSON-RPC node")
+    parser.add_argument("--port", type=int, default=8545, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = MockRPCServer(args.latency, args.jitter, args.error_rate, port=args.port).start()
+    print(f"Mock RPC node listening on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print(json.dumps(server.snapshot(), indent=2))
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
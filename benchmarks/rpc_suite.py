@@ -0,0 +1,232 @@
+"""
+Offline balance-lookup benchmark suite
+
+Starts a local mock JSON-RPC node (benchmarks/mock_rpc.py), points every
+network at it and measures, per scenario:
+
+- wall time (median of --repeat runs)
+- RPC traffic: HTTP requests, JSON-RPC calls by method, injected errors
+- allocations: peak and retained traced memory of one extra run under
+  tracemalloc (in-process scenarios only)
+
+Scenarios cover the synchronous clients (get_all_evm_balances,
+get_solana_balances), the async query planner path, the CLI (in a subprocess)
+and the API endpoints (through FastAPI's test client). The balance cache is
+disabled so every run reaches the node.
+
+Usage:
+    python benchmarks/rpc_suite.py [--latency 0.02] [--error-rate 0.01] [--repeat 5]
+                                   [--output results.json] [--compare previous.json]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack
+from typing import Callable, Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_rpc import MockRPCServer  # noqa: E402
+
+EVM_ADDRESS = "0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045"
+SOLANA_ADDRESS = "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM"
+RPC_ENV_VARS = ("ETHEREUM_RPC", "ARBITRUM_RPC", "OPTIMISM_RPC", "BASE_RPC", "BNB_RPC", "POLYGON_RPC", "SOLANA_RPC")
+
+
+def configure_environment(server: MockRPCServer, metrics: bool = False) -> Dict[str, str]:
+    """Point every network at the mock node; must run before the app is imported"""
+    env = {name: server.url for name in RPC_ENV_VARS}
+    env["CACHE_ENABLED"] = "false"
+    env["METRICS_ENABLED"] = "true" if metrics else "false"
+    os.environ.update(env)
+    return env
+
+
+def batch_addresses(count: int) -> list:
+    """Deterministic mix of EVM and Solana addresses"""
+    from solders.pubkey import Pubkey
+
+    addresses = []
+    for index in range(count):
+        seed = hashlib.sha256(index.to_bytes(4, "big")).digest()
+        addresses.append("0x" + seed[:20].hex() if index % 2 == 0 else str(Pubkey(seed)))
+    return addresses
+
+
+def build_scenarios(env: Dict[str, str], batch_size: int, stack: ExitStack) -> Dict[str, Callable[[], None]]:
+    from fastapi.testclient import TestClient
+    from api import app
+    from app.chains.evm import get_all_evm_balances
+    from app.chains.registry import ClientRegistry
+    from app.chains.solana import get_solana_balances
+    from app.planner import query_balances
+
+    async def with_registry(fetch):
+        async with ClientRegistry() as registry:
+            await fetch(registry)
+
+    def planned(address: str, discover: bool = False):
+        # The path /balances and the CLI take: plan, then run through the registry
+        asyncio.run(with_registry(lambda registry: query_balances(registry, [address], discover=discover)))
+
+    def cli(*args: str):
+        subprocess.run([sys.executable, "main.py", *args, "--format", "json"],
+                       cwd=ROOT, env={**os.environ, **env}, capture_output=True, check=False)
+
+    api = stack.enter_context(TestClient(app))
+    addresses = batch_addresses(batch_size)
+
+    def api_batch():
+        with api.stream("POST", "/balances/batch", json={"addresses": addresses}) as response:
+            for _ in response.iter_lines():
+                pass
+
+    return {
+        "evm_sync": lambda: get_all_evm_balances(EVM_ADDRESS),
+        "solana_sync": lambda: get_solana_balances(SOLANA_ADDRESS),
+        "evm_async": lambda: planned(EVM_ADDRESS),
+        "solana_async": lambda: planned(SOLANA_ADDRESS),
+        "solana_discover": lambda: planned(SOLANA_ADDRESS, discover=True),
+        "cli_evm": lambda: cli("--address", EVM_ADDRESS),
+        "cli_solana": lambda: cli("--address", SOLANA_ADDRESS),
+        "api_balances_evm": lambda: api.get("/balances", params={"address": EVM_ADDRESS}),
+        "api_balances_solana": lambda: api.get("/balances", params={"address": SOLANA_ADDRESS}),
+        "api_batch": api_batch,
+        "api_validate_batch": lambda: api.post("/validate/batch", json={"addresses": addresses}),
+    }
+
+
+def run_scenario(name: str, scenario: Callable[[], None], server: MockRPCServer, repeat: int) -> dict:
+    """Time a scenario, count its RPC traffic and trace its allocations"""
+    # Warm-up run: imports, connection pools and the node's mint table
+    scenario()
+
+    times = []
+    traffic = None
+    for _ in range(repeat):
+        server.reset()
+        start = time.perf_counter()
+        scenario()
+        times.append(time.perf_counter() - start)
+        if traffic is None:
+            traffic = server.snapshot()
+
+    result = {
+        "wall_ms": round(statistics.median(times) * 1000, 2),
+        "min_ms": round(min(times) * 1000, 2),
+        **traffic,
+        "peak_kb": None,
+        "retained_kb": None
+    }
+
+    if not name.startswith("cli_"):
+        tracemalloc.start()
+        scenario()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_kb"] = round(peak / 1024, 1)
+        result["retained_kb"] = round(current / 1024, 1)
+
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: dict, previous_path: str):
+    with open(previous_path) as f:
+        previous = json.load(f)["results"]
+
+    print(f"\nCompared with {previous_path}")
+    print(f"{'Scenario':<22}{'before (ms)':>13}{'after (ms)':>12}{'change':>9}{'RPC before':>12}{'RPC after':>11}")
+    for name, result in results.items():
+        before = previous.get(name)
+        if before is None:
+            continue
+        change = (result["wall_ms"] / before["wall_ms"] - 1) * 100 if before["wall_ms"] else 0.0
+        print(f"{name:<22}{before['wall_ms']:>13.1f}{result['wall_ms']:>12.1f}{change:>+8.1f}%"
+              f"{before['rpc_calls']:>12}{result['rpc_calls']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline balance-lookup benchmark suite")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per RPC HTTP request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of RPC requests failing with 503")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario")
+    parser.add_argument("--batch-size", type=int, default=50, help="Addresses in the batch scenarios")
+    parser.add_argument("--scenarios", nargs="+", help="Only run these scenarios")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--metrics", action="store_true", help="Run with METRICS_ENABLED to measure its overhead")
+    parser.add_argument("--verbose", action="store_true", help="Keep client logging enabled")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.ERROR)
+
+    with ExitStack() as stack:
+        server = stack.enter_context(MockRPCServer(args.latency, args.jitter, args.error_rate))
+        env = configure_environment(server, args.metrics)
+        scenarios = build_scenarios(env, args.batch_size, stack)
+        selected = args.scenarios or list(scenarios)
+        unknown = [name for name in selected if name not in scenarios]
+        if unknown:
+            parser.error(f"Unknown scenarios: {', '.join(unknown)} (available: {', '.join(scenarios)})")
+
+        results = {name: run_scenario(name, scenarios[name], server, args.repeat) for name in selected}
+
+    report = {
+        "config": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "repeat": args.repeat,
+            "batch_size": args.batch_size,
+            "metrics": args.metrics
+        },
+        "environment": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        },
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'Scenario':<22}{'wall (ms)':>11}{'HTTP':>7}{'RPC':>7}{'errors':>8}{'peak (KB)':>11}")
+        for name, result in results.items():
+            peak = f"{result['peak_kb']:.1f}" if result["peak_kb"] is not None else "-"
+            print(f"{name:<22}{result['wall_ms']:>11.1f}{result['http_requests']:>7}{result['rpc_calls']:>7}"
+                  f"{result['injected_errors']:>8}{peak:>11}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
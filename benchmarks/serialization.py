@@ -0,0 +1,147 @@
+"""
+Balance response serialization benchmark
+
+Builds BalanceResponse payloads of increasing size (networks x tokens per
+network) and reports the CPU time per response of each stage:
+
+- build: models created with validation, as the chain clients do
+- model_construct: the same models created without validation, for
+  comparison (pydantic-core validates faster than model_construct fills
+  fields in Python, so the clients keep validating)
+- FastAPI: the previous /balances encoding, through response_model
+  (dump to a dict, validate again) and the stdlib json encoder
+- to_json: the current /balances and /balances/batch encoding, straight
+  from the model with pydantic-core's serializer
+
+and the share of a response's CPU time (build + encoding) saved by to_json.
+Both encodings must produce the same JSON; the run aborts if they differ.
+
+Usage:
+    python benchmarks/serialization.py [--tokens 0 4 16 64 256] [--networks 6] [--repeat 500] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.models import BalanceResponse, NetworkBalance, TokenBalance, to_json  # noqa: E402
+
+ADDRESS = "0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045"
+RESPONSE_FIELD = create_response_field(name="Response_get_balances", type_=BalanceResponse)
+
+
+def payload(networks: int, tokens: int) -> list:
+    """Raw values of one response, as the chain clients decode them"""
+    return [
+        {
+            "network": f"Network {network}",
+            "chain_id": network + 1,
+            "native_token": "ETH",
+            "native_balance": str(10 ** 18 + network),
+            "native_balance_formatted": f"{1 + network / 1000:.6f}",
+            "tokens": [
+                {"symbol": f"TK{index}", "name": f"Token {index}", "balance": str(10 ** 6 * (index + 1)),
+                 "balance_formatted": f"{index + 1}", "decimals": 6, "contract_address": "0x" + f"{index:040x}"}
+                for index in range(tokens)
+            ],
+            "explorer_url": f"https://explorer{network}.example/address/{ADDRESS}"
+        }
+        for network in range(networks)
+    ]
+
+
+def build(values: list, validate: bool = True) -> BalanceResponse:
+    create = {
+        model: model if validate else model.model_construct
+        for model in (TokenBalance, NetworkBalance, BalanceResponse)
+    }
+    balances = [
+        create[NetworkBalance](**{**network, "tokens": [create[TokenBalance](**token) for token in network["tokens"]]})
+        for network in values
+    ]
+    return create[BalanceResponse](address=ADDRESS, networks=balances, total_networks_checked=len(balances),
+                                   success=True)
+
+
+def run_now(coroutine):
+    """Result of a coroutine that never suspends, without the cost of an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended")
+
+
+def fastapi_encode(response: BalanceResponse) -> bytes:
+    content = run_now(serialize_response(field=RESPONSE_FIELD, response_content=response))
+    return JSONResponse(content).body
+
+
+def cpu_us(function, argument, repeat: int, rounds: int = 5) -> float:
+    """CPU microseconds per call, from the fastest of several rounds"""
+    function(argument)
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.process_time()
+        for _ in range(repeat):
+            function(argument)
+        best = min(best, time.process_time() - start)
+    return best / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Balance response serialization benchmark")
+    parser.add_argument("--tokens", type=int, nargs="+", default=[0, 4, 16, 64, 256],
+                        help="Tokens per network of each response size")
+    parser.add_argument("--networks", type=int, default=6, help="Networks per response")
+    parser.add_argument("--repeat", type=int, default=500, help="Calls per stage, size and round")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for tokens in args.tokens:
+        values = payload(args.networks, tokens)
+        response = build(values)
+        body = to_json(response)
+        if json.loads(fastapi_encode(response)) != json.loads(body):
+            sys.exit(f"Serialized output differs at {tokens} tokens per network")
+
+        # Fewer repetitions for large payloads keeps every size at a similar run time
+        repeat = max(20, args.repeat // (1 + tokens // 16))
+        build_us = cpu_us(build, values, repeat)
+        construct_us = cpu_us(lambda values: build(values, validate=False), values, repeat)
+        fastapi_us = cpu_us(fastapi_encode, response, repeat)
+        to_json_us = cpu_us(to_json, response, repeat)
+        results.append({
+            "networks": args.networks,
+            "tokens_per_network": tokens,
+            "bytes": len(body),
+            "build_us": round(build_us, 1),
+            "model_construct_us": round(construct_us, 1),
+            "fastapi_us": round(fastapi_us, 1),
+            "to_json_us": round(to_json_us, 1),
+            "saved_pct": round((fastapi_us - to_json_us) / (build_us + fastapi_us) * 100, 1)
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'tokens/net':>10}{'bytes':>9}{'build (us)':>12}{'construct (us)':>16}{'FastAPI (us)':>14}"
+          f"{'to_json (us)':>14}{'CPU saved':>11}")
+    for result in results:
+        print(f"{result['tokens_per_network']:>10}{result['bytes']:>9}{result['build_us']:>12.1f}"
+              f"{result['model_construct_us']:>16.1f}{result['fastapi_us']:>14.1f}{result['to_json_us']:>14.1f}"
+              f"{result['saved_pct']:>10.1f}%")
+
+
+if __name__ == "__main__":
+    main()
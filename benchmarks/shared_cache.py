@@ -0,0 +1,191 @@
+"""
+Cross-worker balance cache benchmark
+
+Simulates a multi-worker API deployment: one stream of balance lookups
+(a skewed mix of wallets, like real traffic) is spread round-robin over
+N worker processes, as a load balancer would. Each worker resolves its
+lookups through its balance cache with a fixed fetch latency standing in
+for the RPC round trip. The run is repeated with a per-process cache
+(BalanceCache) and with the cache shared through a memory-mapped file
+(SharedBalanceCache), and reports per worker count:
+
+- hit ratio and number of fetches (RPC round trips) across all workers
+- lookup latency p50 / p99 / mean
+- the cost of a hit served from the in-process cache and of one served
+  from the shared table (decoding included)
+
+Entries do not expire during a run, so the difference between backends
+is the duplicated cold misses of per-process caches.
+
+Usage:
+    python benchmarks/shared_cache.py [--workers 1 4 16] [--lookups 20000] [--wallets 2000]
+                                      [--fetch-ms 20] [--concurrency 16] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.cache import BalanceCache  # noqa: E402
+from app.models import NetworkBalance, TokenBalance  # noqa: E402
+from app.shared_cache import SharedBalanceCache  # noqa: E402
+
+# Long enough that no entry expires during a run
+TTL_BLOCKS = 1000
+
+
+def lookup_stream(count: int, wallets: int, seed: int = 0) -> list:
+    """Wallet indices with a Zipf-like skew: a few wallets are looked up far more often"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(wallets)]
+    return rng.choices(range(wallets), weights=weights, k=count)
+
+
+def sample_balance(wallet: int) -> NetworkBalance:
+    """A typical EVM payload: native balance and eight tokens"""
+    return NetworkBalance(
+        network="Ethereum",
+        chain_id=1,
+        native_token="ETH",
+        native_balance=str(10 ** 18 + wallet),
+        native_balance_formatted=f"{1 + wallet / 10 ** 18:.6f}",
+        tokens=[
+            TokenBalance(symbol=f"TK{index}", name=f"Token {index}", balance=str(wallet * 1000 + index),
+                         balance_formatted=f"{wallet + index / 1000:.6f}", decimals=18,
+                         contract_address="0x" + f"{index:040x}")
+            for index in range(8)
+        ],
+        explorer_url=f"https://etherscan.io/address/0x{wallet:040x}"
+    )
+
+
+def time_hits(cache: BalanceCache, keys: list) -> float:
+    """Mean seconds per cache lookup of keys that are all present"""
+    start = time.perf_counter()
+    for key in keys:
+        cache._lookup(key)
+    return (time.perf_counter() - start) / len(keys)
+
+
+async def run_lookups(cache: BalanceCache, wallets: list, fetch_seconds: float, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def lookup(wallet: int):
+        async def fetch() -> Tuple[NetworkBalance, Optional[int]]:
+            await asyncio.sleep(fetch_seconds)
+            return sample_balance(wallet), None
+
+        async with semaphore:
+            start = time.perf_counter()
+            await cache.get_or_fetch(BalanceCache.make_key("ethereum", f"0x{wallet:040x}"), fetch)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[lookup(wallet) for wallet in wallets])
+    result = {
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "coalesced": cache.coalesced,
+        "latencies": latencies,
+        "local_hit": None,
+        "shared_hit": None
+    }
+
+    # Per-hit cost, measured after the run so concurrent misses do not skew it
+    keys = [BalanceCache.make_key("ethereum", f"0x{wallet:040x}") for wallet in sorted(set(wallets))[:1000]]
+    result["local_hit"] = time_hits(cache, keys)
+    if isinstance(cache, SharedBalanceCache):
+        cache._entries.clear()
+        result["shared_hit"] = time_hits(cache, keys)
+    return result
+
+
+def worker(backend: str, path: str, wallets: list, fetch_seconds: float, concurrency: int,
+           barrier, results):
+    if backend == "shared":
+        cache = SharedBalanceCache(path, ttl_blocks=TTL_BLOCKS)
+    else:
+        cache = BalanceCache(ttl_blocks=TTL_BLOCKS)
+    barrier.wait()
+    results.put(asyncio.run(run_lookups(cache, wallets, fetch_seconds, concurrency)))
+
+
+def run(backend: str, workers: int, stream: list, fetch_seconds: float, concurrency: int) -> dict:
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    with tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as directory:
+        path = os.path.join(directory, "balance-tracker.cache")
+        processes = [
+            context.Process(target=worker, args=(backend, path, stream[index::workers], fetch_seconds,
+                                                 concurrency, barrier, results))
+            for index in range(workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        per_worker = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        wall = time.perf_counter() - start
+
+    latencies = sorted(latency for result in per_worker for latency in result["latencies"])
+    shared = [result["shared_hit"] for result in per_worker if result["shared_hit"] is not None]
+    hits = sum(result["hits"] + result["coalesced"] for result in per_worker)
+    misses = sum(result["misses"] for result in per_worker)
+    return {
+        "backend": backend,
+        "workers": workers,
+        "hit_ratio": round(hits / (hits + misses), 4),
+        "fetches": misses,
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "local_hit_us": round(statistics.fmean(result["local_hit"] for result in per_worker) * 1e6, 2),
+        "shared_hit_us": round(statistics.fmean(shared) * 1e6, 2) if shared else None,
+        "wall_s": round(wall, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-worker balance cache benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="Worker counts to compare")
+    parser.add_argument("--lookups", type=int, default=20000, help="Lookups in the stream, over all workers")
+    parser.add_argument("--wallets", type=int, default=2000, help="Distinct wallets in the stream")
+    parser.add_argument("--fetch-ms", type=float, default=20.0, help="Simulated RPC latency of a miss")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent lookups per worker")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    stream = lookup_stream(args.lookups, args.wallets)
+    results = [
+        run(backend, workers, stream, args.fetch_ms / 1000, args.concurrency)
+        for workers in args.workers
+        for backend in ("local", "shared")
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'workers':>7}  {'backend':<8}{'hit ratio':>10}{'fetches':>9}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'mean (ms)':>11}{'local hit (us)':>16}{'shared hit (us)':>17}")
+    for result in results:
+        shared = f"{result['shared_hit_us']:.2f}" if result["shared_hit_us"] is not None else "-"
+        print(f"{result['workers']:>7}  {result['backend']:<8}{result['hit_ratio']:>10.3f}{result['fetches']:>9}"
+              f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['mean_ms']:>11.3f}"
+              f"{result['local_hit_us']:>16.2f}{shared:>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+CLI cold-start benchmark
+
+Times, in fresh interpreters, everything `python main.py` imports before
+its first RPC request, for each kind of invocation, and reports which heavy
+chain libraries were loaded. Each scenario is run several times and the
+median is reported.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--target-ms 1500] [--json]
+
+With --target-ms the exit status is non-zero when any scenario's median
+exceeds the target, so the benchmark can guard cold start in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("web3", "eth_utils", "solana", "spl", "solders", "aiohttp", "pydantic")
+
+# Runs in a child interpreter and prints {"import_s": ..., "loaded": [...]}
+_PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"import_s": elapsed, "loaded": loaded}}))
+"""
+
+# What main.py loads for each invocation, up to its first RPC request
+SCENARIOS = {
+    "help": """
+import main
+""",
+    "invalid_address": """
+import main
+from app.validators import normalize_address
+try:
+    normalize_address("not-an-address")
+except ValueError:
+    main.invalid_address_response("not-an-address")
+""",
+    "evm": """
+import main
+from app.validators import normalize_address
+from app.chains.registry import ClientRegistry
+from app.chains.evm_async import AsyncEVMClient
+normalize_address("0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045")
+""",
+    "solana": """
+import main
+from app.validators import normalize_address
+from app.chains.registry import ClientRegistry
+from app.chains.solana_async import AsyncSolanaClient
+normalize_address("9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM")
+""",
+    "eager_all_chains": """
+import main
+import app.chains.evm_async, app.chains.solana_async, app.chains.evm, app.chains.solana
+from web3 import Web3
+from solana.rpc.api import Client
+""",
+}
+
+
+def probe(body: str) -> dict:
+    """Run a snippet in a fresh interpreter and return its measurements"""
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(root=ROOT, body=body, heavy=HEAVY_MODULES)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure(body: str, runs: int) -> dict:
+    samples = [probe(body) for _ in range(runs)]
+    return {
+        "median_ms": round(statistics.median(s["import_s"] for s in samples) * 1000, 1),
+        "min_ms": round(min(s["import_s"] for s in samples) * 1000, 1),
+        "loaded": samples[-1]["loaded"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per scenario")
+    parser.add_argument("--target-ms", type=float, help="Fail if a lazy scenario's median exceeds this")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {name: measure(body, args.runs) for name, body in SCENARIOS.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'Scenario':<18}{'median (ms)':>13}{'min (ms)':>10}  loaded")
+        for name, result in results.items():
+            print(f"{name:<18}{result['median_ms']:>13.1f}{result['min_ms']:>10.1f}  {', '.join(result['loaded']) or '-'}")
+
+    if args.target_ms is not None:
+        over = [name for name, result in results.items()
+                if name != "eager_all_chains" and result["median_ms"] > args.target_ms]
+        if over:
+            print(f"Cold start above {args.target_ms} ms: {', '.join(over)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Token-list scaling benchmark
+
+Generates a synthetic Uniswap-style token list, compiles it into a token
+table and reports, each in a fresh interpreter:
+
+- startup time and RSS of importing the token registry without a list,
+  with the memory-mapped table, and with the JSON parsed into Token objects
+- Multicall3 encoding/decoding time for the largest network
+
+Usage:
+    python benchmarks/token_list.py [--tokens 50000] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.config import EVM_NETWORKS  # noqa: E402
+from app.tokens.tokenlist import SOLANA_CHAIN_ID, compile_token_lists  # noqa: E402
+
+# Runs in a child interpreter and prints {"import_s": ..., "rss_mb": ...}
+_PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+import eth_utils, solders.pubkey
+before = rss_mb()
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"import_s": elapsed, "rss_mb": rss_mb() - before, "tokens": count}}))
+"""
+
+_REGISTRY = """
+from app.tokens import TOKENS
+count = sum(len(TOKENS.for_network(n)) for n in TOKENS.networks())
+"""
+
+_JSON_OBJECTS = """
+from app.tokens.registry import Token
+from eth_utils import to_checksum_address
+with open(os.environ["BENCH_TOKEN_JSON"]) as f:
+    entries = json.load(f)["tokens"]
+tokens = [
+    Token(str(e["chainId"]), e["symbol"], e["name"],
+          e["address"] if e["chainId"] == 101 else to_checksum_address(e["address"]), int(e["decimals"]))
+    for e in entries
+]
+count = len(tokens)
+"""
+
+
+def generate_token_list(path: str, count: int):
+    """Write a synthetic token list spread across every supported chain"""
+    from solders.pubkey import Pubkey
+
+    chain_ids = [config["chain_id"] for config in EVM_NETWORKS.values()] + [SOLANA_CHAIN_ID]
+    tokens = []
+    for index in range(count):
+        chain_id = chain_ids[index % len(chain_ids)]
+        if chain_id == SOLANA_CHAIN_ID:
+            address = str(Pubkey(os.urandom(32)))
+        else:
+            address = "0x" + os.urandom(20).hex()
+        tokens.append({
+            "chainId": chain_id,
+            "address": address,
+            "symbol": f"TKN{index}",
+            "name": f"Benchmark Token {index}",
+            "decimals": 18 if index % 3 else 6,
+            "logoURI": f"https://example.com/{index}.png"
+        })
+
+    with open(path, "w") as f:
+        json.dump({"name": "Benchmark", "version": {"major": 1, "minor": 0, "patch": 0}, "tokens": tokens}, f)
+
+
+def probe(body: str, env: dict) -> dict:
+    """Run a snippet in a fresh interpreter and return its measurements"""
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(root=ROOT, body=body)],
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_multicall(token_count: int) -> dict:
+    """Time aggregate3 encoding and decoding of one wallet against token_count tokens"""
+    from app.chains.multicall import (
+        build_balance_calls, chunk_calls, decode_aggregate3, encode_aggregate3, GET_BLOCK_NUMBER_SELECTOR
+    )
+    from app.config import MULTICALL3_ADDRESS, MULTICALL_CHUNK_SIZE
+
+    tokens = [os.urandom(20) for _ in range(token_count)]
+    owner = "0x" + os.urandom(20).hex()
+
+    start = time.perf_counter()
+    calls = build_balance_calls(MULTICALL3_ADDRESS, owner, tokens)
+    payloads = [encode_aggregate3([*chunk, (MULTICALL3_ADDRESS, GET_BLOCK_NUMBER_SELECTOR)])
+                for chunk in chunk_calls(calls, MULTICALL_CHUNK_SIZE)]
+    encode_s = time.perf_counter() - start
+
+    # A (bool,bytes)[] result with one uint256 per call
+    word = (1).to_bytes(32, "big")
+    result = (32).to_bytes(32, "big") + len(calls).to_bytes(32, "big")
+    result += b"".join((len(calls) * 32 + i * 128).to_bytes(32, "big") for i in range(len(calls)))
+    result += (word + (64).to_bytes(32, "big") + (32).to_bytes(32, "big") + word) * len(calls)
+    start = time.perf_counter()
+    decode_aggregate3(result)
+    decode_s = time.perf_counter() - start
+
+    return {
+        "calls": len(calls),
+        "eth_calls": len(payloads),
+        "encode_ms": round(encode_s * 1000, 2),
+        "decode_ms": round(decode_s * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token-list startup and memory benchmark")
+    parser.add_argument("--tokens", type=int, default=50_000, help="Tokens in the synthetic list")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        list_path = os.path.join(tmp, "tokens.json")
+        table_path = os.path.join(tmp, "tokens.tokens")
+        generate_token_list(list_path, args.tokens)
+
+        start = time.perf_counter()
+        compiled = compile_token_lists([list_path], table_path)
+        compile_s = time.perf_counter() - start
+
+        results = {
+            "tokens": args.tokens,
+            "json_mb": round(os.path.getsize(list_path) / 2**20, 2),
+            "table_mb": round(os.path.getsize(table_path) / 2**20, 2),
+            "compile_s": round(compile_s, 3),
+            "compiled_tokens": compiled,
+            "startup": {
+                "no_list": probe(_REGISTRY, {"TOKEN_LIST_PATH": ""}),
+                "mmap_table": probe(_REGISTRY, {"TOKEN_LIST_PATH": table_path}),
+                "json_objects": probe(_JSON_OBJECTS, {"BENCH_TOKEN_JSON": list_path, "TOKEN_LIST_PATH": ""})
+            },
+            "multicall": bench_multicall(compiled // (len(EVM_NETWORKS) + 1))
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Token list: {results['tokens']} tokens, {results['json_mb']} MB JSON -> "
+          f"{results['table_mb']} MB table (compiled in {results['compile_s']} s)")
+    print(f"{'Startup':<14}{'tokens':>10}{'time (ms)':>12}{'RSS (MB)':>12}")
+    for name, startup in results["startup"].items():
+        print(f"{name:<14}{startup['tokens']:>10}{startup['import_s'] * 1000:>12.1f}{startup['rss_mb']:>12.1f}")
+    multicall = results["multicall"]
+    print(f"Multicall: {multicall['calls']} sub-calls in {multicall['eth_calls']} eth_calls, "
+          f"encode {multicall['encode_ms']} ms, decode {multicall['decode_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
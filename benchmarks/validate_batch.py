@@ -0,0 +1,122 @@
+"""
+Batch address validation benchmark
+
+Generates a mixed list of EVM, Solana and malformed addresses and reports
+addresses per second for:
+
+- validate_addresses (pre-checked, native base58 decoding, no memo churn)
+- normalize_address called once per address
+- the previous per-address path (web3 checks and pure-Python base58), when
+  the `base58` package is installed
+
+Usage:
+    python benchmarks/validate_batch.py [--addresses 200000] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.validators import normalize_address, validate_addresses  # noqa: E402
+
+
+def generate_addresses(count: int, seed: int = 0) -> list:
+    """Mixed input: 45% EVM, 45% Solana, 10% malformed, in random order"""
+    from solders.pubkey import Pubkey
+
+    rng = random.Random(seed)
+    addresses = []
+    for index in range(count):
+        kind = index % 20
+        if kind < 9:
+            addresses.append("0x" + rng.randbytes(20).hex())
+        elif kind < 18:
+            addresses.append(str(Pubkey(rng.randbytes(32))))
+        elif kind == 18:
+            addresses.append("0x" + rng.randbytes(20).hex()[:-1] + "g")
+        else:
+            addresses.append(str(Pubkey(rng.randbytes(32)))[:-2] + "0O")
+    rng.shuffle(addresses)
+    return addresses
+
+
+def _legacy_validate():
+    """The per-address validation used before the batch path, or None"""
+    try:
+        import base58
+        from web3 import Web3
+    except ImportError:
+        return None
+
+    def validate(address: str) -> bool:
+        if address.startswith("0x") and len(address) == 42:
+            if not Web3.is_address(address):
+                return False
+            Web3.to_checksum_address(address)
+            return True
+        if 32 <= len(address) <= 44:
+            try:
+                return len(base58.b58decode(address)) == 32
+            except Exception:
+                return False
+        return False
+
+    return validate
+
+
+def _per_address(address: str) -> bool:
+    try:
+        normalize_address(address)
+        return True
+    except ValueError:
+        return False
+
+
+def measure(name: str, run, count: int) -> dict:
+    start = time.perf_counter()
+    valid = run()
+    elapsed = time.perf_counter() - start
+    return {
+        "name": name,
+        "seconds": round(elapsed, 3),
+        "addresses_per_s": round(count / elapsed),
+        "valid": valid
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch address validation benchmark")
+    parser.add_argument("--addresses", type=int, default=200_000, help="Addresses to validate")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    addresses = generate_addresses(args.addresses)
+    count = len(addresses)
+
+    runs = [
+        measure("validate_addresses", lambda: sum(valid for valid, _ in validate_addresses(addresses)), count),
+        measure("normalize_address", lambda: sum(map(_per_address, addresses)), count)
+    ]
+    legacy = _legacy_validate()
+    if legacy is not None:
+        runs.append(measure("legacy", lambda: sum(map(legacy, addresses)), count))
+
+    results = {"addresses": count, "runs": runs}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Validated {count} addresses")
+    print(f"{'Path':<20}{'time (s)':>10}{'addr/s':>12}{'valid':>9}")
+    for run in runs:
+        print(f"{run['name']:<20}{run['seconds']:>10.3f}{run['addresses_per_s']:>12}{run['valid']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,92 @@
 #!/usr/bin/env python3
-"""CLI interface for Universal On-Chain Balance Tracker"""
+"""CLI interface for Universal On-Chain Balance Tracker
+
+Only the standard library is imported at module level. Arguments are parsed
+first, and the chain backends are imported once the address type and the
+requested networks are known.
+"""
 
 import argparse
+import asyncio
+import csv
+import io
 import json
+import os
 import sys
-from app.validators import validate_evm_address, validate_solana_address, detect_address_type
-from app.chains.evm import get_all_evm_balances
-from app.chains.solana import get_solana_balances
-from app.models import BalanceResponse
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+if TYPE_CHECKING:
+    from app.chains.registry import ClientRegistry
+    from app.models import BalanceResponse, TimingSpan
+    from app.planner import QueryPlan
+
+
+def select_networks(network_filter: Optional[Sequence[str]]) -> Tuple[Optional[List[str]], bool]:
+    """
+    Resolve --networks into the networks to query
+
+    A network is selected when a filter word equals its key or appears in
+    its name (case-insensitive), e.g. "eth" selects Ethereum.
+
+    Args:
+        network_filter: Filter words, or None for all networks
+
+    Returns:
+        Tuple of (EVM network keys, or None for all; whether to query Solana)
+    """
+    if not network_filter:
+        return None, True
+
+    from app.config import EVM_NETWORKS, SOLANA_CONFIG
+
+    wanted = [n.lower() for n in network_filter]
 
+    def selected(network_key: str, name: str) -> bool:
+        name = name.lower()
+        return network_key in wanted or any(keyword in name for keyword in wanted)
 
-def format_output(response: BalanceResponse, format_type: str = "json") -> str:
+    evm_keys = [key for key, config in EVM_NETWORKS.items() if selected(key, config["name"])]
+    return evm_keys, selected("solana", SOLANA_CONFIG["name"])
+
+
+def batch_network_filter(network_filter: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """
+    Resolve --networks into the network keys app.batch expects
+
+    Raises:
+        ValueError: If no supported network matches
+    """
+    evm_keys, include_solana = select_networks(network_filter)
+    if evm_keys is None:
+        return None
+    keys = evm_keys + (["solana"] if include_solana else [])
+    if not keys:
+        raise ValueError(f"No supported network matches --networks {' '.join(network_filter)}")
+    return keys
+
+
+def format_timings(timing: "TimingSpan", depth: int = 0) -> List[str]:
+    """Render a timing span tree as indented lines"""
+    details = " ".join(f"{key}={value}" for key, value in timing.attributes.items())
+    label = f"{'  ' * depth}{timing.name}" + (f" [{details}]" if details else "")
+    duration = f"{timing.duration_ms:.1f} ms" if timing.duration_ms is not None else "unfinished"
+    lines = [f"{label:<60} {duration:>12}  @ {timing.start_ms:.1f} ms"]
+    for child in timing.children:
+        lines.extend(format_timings(child, depth + 1))
+    return lines
+
+
+def format_output(response: "BalanceResponse", format_type: str = "json") -> str:
     """Format output for display"""
     if format_type == "json":
         return response.model_dump_json(indent=2)
+    if format_type == "ndjson":
+        return response.model_dump_json()
+    if format_type == "csv":
+        buffer = io.StringIO()
+        ResultWriter(buffer, "csv").write(response)
+        return buffer.getvalue().rstrip("\r\n")
 
     # Pretty text format
     output_lines = []
@@ -41,54 +114,296 @@ def format_output(response: BalanceResponse, format_type: str = "json") -> str:
     output_lines.append(f"Total Networks Checked: {response.total_networks_checked}")
     output_lines.append(f"{'='*80}\n")
 
+    if response.timings is not None:
+        output_lines.append("Timings:")
+        output_lines.extend(format_timings(response.timings))
+        output_lines.append("")
+
     return "\n".join(output_lines)
 
 
-def get_balances(address: str) -> BalanceResponse:
+CSV_FIELDS = ["address", "network", "chain_id", "asset", "contract_address", "balance", "balance_formatted",
+              "decimals", "success", "error"]
+
+
+def csv_rows(response: "BalanceResponse") -> List[list]:
+    """One CSV row per asset (native and tokens) per network; a single row when there is none"""
+    address, success, error = response.address, response.success, response.error or ""
+    rows = []
+    for network in response.networks:
+        rows.append([address, network.network, network.chain_id, network.native_token, "",
+                     network.native_balance, network.native_balance_formatted, "", success, error])
+        for token in network.tokens:
+            rows.append([address, network.network, network.chain_id, token.symbol, token.contract_address or "",
+                         token.balance, token.balance_formatted, token.decimals, success, error])
+    if not rows:
+        rows.append([address, "", "", "", "", "", "", "", success, error])
+    return rows
+
+
+class ResultWriter:
+    """Writes responses as NDJSON lines or CSV rows, flushing after each one"""
+
+    def __init__(self, stream: TextIO, format_type: str, header: bool = True):
+        self.stream = stream
+        self.format_type = format_type
+        self._csv = csv.writer(stream) if format_type == "csv" else None
+        if self._csv is not None and header:
+            self._csv.writerow(CSV_FIELDS)
+
+    def write(self, response: "BalanceResponse"):
+        if self._csv is not None:
+            self._csv.writerows(csv_rows(response))
+        else:
+            self.stream.write(response.model_dump_json() + "\n")
+        self.stream.flush()
+
+
+class Checkpoint:
+    """Append-only file of finished addresses, one per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self._file: Optional[TextIO] = None
+
+    def __contains__(self, address: str) -> bool:
+        return address in self.done
+
+    def add(self, address: str):
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write(address + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def read_addresses(lines: Iterable[str], checkpoint: Optional[Checkpoint] = None) -> Iterator[str]:
+    """Addresses from input lines, skipping blank lines, '#' comments and checkpointed addresses"""
+    from app.validators import normalize_address
+
+    for line in lines:
+        address = line.strip()
+        if not address or address.startswith("#"):
+            continue
+        if checkpoint is not None:
+            try:
+                # The checkpoint holds normalized addresses
+                if normalize_address(address) in checkpoint:
+                    continue
+            except ValueError:
+                if address in checkpoint:
+                    continue
+        yield address
+
+
+def invalid_address_response(address: str) -> "BalanceResponse":
+    """Response for an address that is neither EVM nor Solana"""
+    from app.models import BalanceResponse
+    from app.validators import INVALID_ADDRESS_MESSAGE
+
+    return BalanceResponse(
+        address=address,
+        networks=[],
+        total_networks_checked=0,
+        success=False,
+        error=INVALID_ADDRESS_MESSAGE
+    )
+
+
+async def get_balances_async(address: str, registry: "ClientRegistry", discover: bool = False,
+                             networks: Optional[Sequence[str]] = None,
+                             tokens: Optional[Sequence[str]] = None) -> "BalanceResponse":
     """
     Get balances for an address across all supported networks
 
     Args:
         address: Wallet address
+        registry: Started client registry to query through
+        discover: Discover all Solana token holdings
+        networks: Optional --networks filter words
+        tokens: Optional --tokens filter (symbols or contract/mint addresses)
 
     Returns:
         BalanceResponse object
+
+    Raises:
+        ValueError: If a filtered token exists on none of the selected networks
     """
-    # Detect address type
-    address_type = detect_address_type(address)
-
-    if address_type == "unknown":
-        return BalanceResponse(
-            address=address,
-            networks=[],
-            total_networks_checked=0,
-            success=False,
-            error="Invalid address format. Must be valid EVM or Solana address."
-        )
-
-    all_balances = []
-
-    # Get EVM balances
-    if address_type == "evm":
-        is_valid, result = validate_evm_address(address)
-        if is_valid:
-            address = result  # Use checksum address
-            evm_balances = get_all_evm_balances(address)
-            all_balances.extend(evm_balances)
-
-    # Get Solana balances
-    if address_type == "solana":
-        is_valid, result = validate_solana_address(address)
-        if is_valid:
-            solana_balance = get_solana_balances(address)
-            all_balances.append(solana_balance)
+    from app.planner import query_balances
+
+    # Only the selected networks and tokens are read
+    evm_keys, include_solana = select_networks(networks)
+    response, = await query_balances(registry, [address], evm_keys, include_solana, tokens, discover)
+    return response
 
-    return BalanceResponse(
-        address=address,
-        networks=all_balances,
-        total_networks_checked=len(all_balances),
-        success=True
-    )
+
+def get_balances(address: str, discover: bool = False, networks: Optional[Sequence[str]] = None,
+                 tokens: Optional[Sequence[str]] = None) -> "BalanceResponse":
+    """
+    Get balances for an address across all supported networks
+
+    Args:
+        address: Wallet address
+        discover: Discover all Solana token holdings
+        networks: Optional --networks filter words
+        tokens: Optional --tokens filter (symbols or contract/mint addresses)
+
+    Returns:
+        BalanceResponse object
+    """
+    from app.timings import span
+    from app.validators import normalize_address
+
+    # Reject invalid input before loading any chain backend
+    try:
+        with span("validate"):
+            address = normalize_address(address)
+    except ValueError:
+        return invalid_address_response(address)
+
+    with span("startup"):
+        from app.chains.registry import ClientRegistry
+
+    async def run() -> "BalanceResponse":
+        async with ClientRegistry() as registry:
+            return await get_balances_async(address, registry, discover, networks, tokens)
+
+    return asyncio.run(run())
+
+
+async def scan_async(addresses: Iterable[str], writer: ResultWriter, checkpoint: Optional[Checkpoint] = None,
+                     discover: bool = False, networks: Optional[Sequence[str]] = None,
+                     workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                     tokens: Optional[Sequence[str]] = None) -> Tuple[int, int]:
+    """
+    Look up many addresses through one client registry, writing each result as it completes
+
+    An address is added to the checkpoint only after its result has been
+    written, and only if it will not change on a retry (looked up, or
+    invalid); a scan killed midway may repeat its last results on resume,
+    but never loses one.
+
+    Args:
+        addresses: Wallet addresses (EVM and Solana may be mixed)
+        writer: Destination of the results
+        checkpoint: Records finished addresses, if given
+        discover: Discover all Solana token holdings
+        networks: Optional --networks filter words
+        workers: Address chunks looked up concurrently (default BATCH_CONCURRENCY)
+        chunk_size: Addresses per shared RPC batch (default BATCH_CHUNK_SIZE)
+        tokens: Optional --tokens filter
+
+    Returns:
+        Tuple of (addresses written, addresses that failed)
+    """
+    from app.batch import stream_balances
+    from app.chains.registry import ClientRegistry
+    from app.config import BATCH_CHUNK_SIZE, BATCH_CONCURRENCY
+    from app.validators import INVALID_ADDRESS_MESSAGE
+
+    network_filter = batch_network_filter(networks)
+    written = failed = 0
+    async with ClientRegistry() as registry:
+        async for response in stream_balances(registry, addresses, network_filter, discover,
+                                              chunk_size or BATCH_CHUNK_SIZE, workers or BATCH_CONCURRENCY, tokens):
+            writer.write(response)
+            written += 1
+            if not response.success:
+                failed += 1
+            if checkpoint is not None and (response.success or response.error == INVALID_ADDRESS_MESSAGE):
+                checkpoint.add(str(response.address))
+    return written, failed
+
+
+def scan(args: argparse.Namespace) -> int:
+    """Run --input mode; returns the exit code"""
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    # A resumed scan adds to the output of the previous runs
+    resuming = checkpoint is not None and bool(checkpoint.done)
+    output_file = sys.stdout if args.output in (None, "-") else open(args.output, "a" if resuming else "w")
+    try:
+        writer = ResultWriter(output_file, args.format, header=output_file is sys.stdout or output_file.tell() == 0)
+        written, failed = asyncio.run(scan_async(
+            read_addresses(input_file, checkpoint), writer, checkpoint,
+            discover=args.discover, networks=args.networks, workers=args.workers, chunk_size=args.chunk_size,
+            tokens=args.tokens
+        ))
+    finally:
+        for f in (input_file, output_file):
+            if f not in (sys.stdin, sys.stdout):
+                f.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+    skipped = f", {len(checkpoint.done)} already in checkpoint" if resuming else ""
+    print(f"Scanned {written} addresses ({failed} failed{skipped})", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+
+def plan_query(args: argparse.Namespace) -> List["QueryPlan"]:
+    """Plans of the lookups the arguments describe, one per batch, without running them"""
+    from app.batch import plan_batch
+    from app.config import BATCH_CHUNK_SIZE
+
+    network_filter = batch_network_filter(args.networks)
+    chunk_size = args.chunk_size or BATCH_CHUNK_SIZE
+    if args.address is not None:
+        return plan_batch([args.address], network_filter, args.tokens, args.discover, chunk_size)
+
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    try:
+        return plan_batch(read_addresses(input_file, checkpoint), network_filter, args.tokens, args.discover,
+                          chunk_size)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+
+
+def format_plan(plans: List["QueryPlan"], format_type: str = "text") -> str:
+    """Render the plans of a --dry-run: reads and RPC requests per network, and in total"""
+    networks = {}
+    for plan in plans:
+        for network in plan.networks:
+            entry = networks.setdefault(network.network_key, {**network.to_dict(), "addresses": 0, "reads": 0,
+                                                              "requests": 0})
+            entry["addresses"] += len(network.addresses)
+            entry["reads"] += network.reads
+            entry["requests"] += network.requests
+
+    wallets = [wallet for plan in plans for wallet in plan.wallets]
+    summary = {
+        "addresses": len(wallets),
+        "invalid_addresses": sum(wallet is None for wallet in wallets),
+        "batches": sum(1 for plan in plans if plan.networks),
+        "tokens": list(plans[0].tokens) if plans and plans[0].tokens is not None else None,
+        "networks": list(networks.values()),
+        "requests": sum(plan.requests for plan in plans)
+    }
+    if format_type in ("json", "ndjson"):
+        return json.dumps(summary, indent=2 if format_type == "json" else None)
+
+    output_lines = [
+        f"Addresses: {summary['addresses']} ({summary['invalid_addresses']} invalid) in {summary['batches']} batch(es)",
+        f"Tokens: {', '.join(summary['tokens']) if summary['tokens'] else 'all'}",
+        "",
+        f"{'network':<12}{'addresses':>10}{'tokens/addr':>13}{'reads':>9}{'requests':>10}  method"
+    ]
+    for entry in summary["networks"]:
+        tokens = entry["tokens_per_address"] if entry["tokens_per_address"] is not None else "all"
+        output_lines.append(f"{entry['network']:<12}{entry['addresses']:>10}{tokens:>13}{entry['reads']:>9}"
+                            f"{entry['requests']:>10}  {entry['method']}")
+    output_lines.append("")
+    output_lines.append(f"RPC requests: {summary['requests']} at most (cache hits and known-empty tokens are skipped)")
+    return "\n".join(output_lines)
 
 
 def main():
@@ -109,22 +424,72 @@ Examples:
 
   # Output in pretty text format
   python main.py --address 0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb --format text
+
+  # Discover every token held by a Solana address
+  python main.py --address 9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM --discover
+
+  # Show a per-network, per-RPC-call timing breakdown
+  python main.py --address 0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb --timings
+
+  # Read only USDC and USDT (plus native balances) on Ethereum and Polygon
+  python main.py --address 0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb --networks ethereum polygon --tokens USDC USDT
+
+  # Print the RPC plan of a scan without sending anything
+  python main.py --input wallets.txt --tokens USDC --dry-run
+
+  # Scan a file of addresses (one per line) to NDJSON, resumable after a kill
+  python main.py --input wallets.txt --output balances.ndjson --checkpoint scan.done
+
+  # Scan addresses from stdin to CSV with 16 concurrent workers
+  cat wallets.txt | python main.py --input - --format csv --workers 16 > balances.csv
         """
     )
 
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
         "--address",
         "-a",
-        required=True,
         help="Wallet address (EVM or Solana)"
     )
 
+    source.add_argument(
+        "--input",
+        "-i",
+        metavar="PATH",
+        help="File of wallet addresses, one per line, or - for stdin; results are streamed as they complete"
+    )
+
     parser.add_argument(
         "--format",
         "-f",
-        choices=["json", "text"],
-        default="text",
-        help="Output format (default: text)"
+        choices=["json", "text", "ndjson", "csv"],
+        help="Output format (default: text, or ndjson with --input; --input supports ndjson and csv)"
+    )
+
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="PATH",
+        help="With --input: write results to a file instead of stdout"
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        help="With --input: address chunks looked up concurrently (default: BATCH_CONCURRENCY)"
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="With --input: addresses per shared RPC batch (default: BATCH_CHUNK_SIZE)"
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        metavar="PATH",
+        help="With --input: record finished addresses here and skip them when the scan is rerun"
     )
 
     parser.add_argument(
@@ -134,24 +499,81 @@ Examples:
         help="Specific networks to check (e.g., ethereum polygon solana)"
     )
 
+    parser.add_argument(
+        "--tokens",
+        "-t",
+        nargs="+",
+        help="Only read these tokens: symbols or contract/mint addresses (e.g., USDC USDT); native balances are always read"
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the query plan (reads and RPC requests per network) without querying anything"
+    )
+
+    parser.add_argument(
+        "--discover",
+        action="store_true",
+        help="Solana only: list every SPL/Token-2022 holding, not just popular tokens"
+    )
+
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Show where the time went: per network, per RPC call, queueing and output formatting"
+    )
+
     args = parser.parse_args()
 
+    if args.dry_run:
+        if args.timings:
+            parser.error("--timings is not supported with --dry-run")
+        try:
+            print(format_plan(plan_query(args), args.format or "text"))
+            sys.exit(0)
+        except (OSError, ValueError) as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.input is not None:
+        args.format = args.format or "ndjson"
+        if args.format not in ("ndjson", "csv"):
+            parser.error("--input writes ndjson or csv")
+        if args.timings:
+            parser.error("--timings is not supported with --input")
+        if (args.workers is not None and args.workers < 1) or (args.chunk_size is not None and args.chunk_size < 1):
+            parser.error("--workers and --chunk-size must be at least 1")
+        try:
+            sys.exit(scan(args))
+        except (OSError, ValueError) as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+
+    for option in ("output", "workers", "chunk_size", "checkpoint"):
+        if getattr(args, option) is not None:
+            parser.error(f"--{option.replace('_', '-')} requires --input")
+    args.format = args.format or "text"
+
     try:
-        # Get balances
-        response = get_balances(args.address)
-
-        # Filter networks if specified
-        if args.networks:
-            networks_lower = [n.lower() for n in args.networks]
-            response.networks = [
-                net for net in response.networks
-                if net.network.lower() in networks_lower or
-                   any(keyword in net.network.lower() for keyword in networks_lower)
-            ]
-            response.total_networks_checked = len(response.networks)
+        if args.timings:
+            from app.timings import span, trace
+
+        with trace("balances") if args.timings else nullcontext() as request_span:
+            # Get balances, querying only the requested networks
+            response = get_balances(args.address, discover=args.discover, networks=args.networks, tokens=args.tokens)
+
+            with span("serialize") if args.timings else nullcontext():
+                output = format_output(response, args.format)
+
+        if request_span is not None:
+            from app.models import TimingSpan
+
+            # Render again with the finished span tree attached
+            response.timings = TimingSpan.model_validate(request_span.to_dict())
+            output = format_output(response, args.format)
 
         # Output results
-        output = format_output(response, args.format)
         print(output)
 
         # Exit with appropriate code
@@ -0,0 +1,33 @@
+"""
+Shared fixtures: every network points at the local mock JSON-RPC node
+
+Settings are read when app.config is imported, so the node is started and
+the environment configured here, before any test module imports the app.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_rpc import MockRPCServer  # noqa: E402
+from benchmarks.rpc_suite import configure_environment  # noqa: E402
+
+MOCK_NODE = MockRPCServer().start()
+configure_environment(MOCK_NODE)
+os.environ["CACHE_SHARED_PATH"] = ""
+os.environ["TRANSFER_CURSOR_PATH"] = ""
+
+
+@pytest.fixture
+def mock_node():
+    """The mock node with cleared counters; handlers patched with monkeypatch are restored after the test"""
+    MOCK_NODE.reset()
+    yield MOCK_NODE
+
+
+def pytest_sessionfinish(session, exitstatus):
+    MOCK_NODE.stop()
@@ -0,0 +1,30 @@
+"""API error responses: route 404s keep their detail, unknown endpoints get the generic body"""
+
+from fastapi.testclient import TestClient
+
+
+def test_unknown_endpoint(mock_node):
+    from api import app
+
+    with TestClient(app) as client:
+        response = client.get("/no-such-endpoint")
+    assert response.status_code == 404
+    assert response.json()["error"] == "Endpoint not found"
+
+
+def test_disabled_metrics_keep_their_detail(mock_node):
+    from api import app
+
+    with TestClient(app) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Metrics are disabled"}
+
+
+def test_removing_an_unwatched_address_keeps_its_detail(mock_node):
+    from api import app
+
+    with TestClient(app) as client:
+        response = client.delete("/watchlist/0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Address is not watched"}
@@ -0,0 +1,125 @@
+"""Balance cache: coalesced fetches and head-based invalidation"""
+
+import asyncio
+
+import pytest
+
+from app.cache import BalanceCache
+from app.chains.registry import ClientRegistry
+from app.models import NetworkBalance
+from app.planner import query_balances
+from benchmarks.mock_rpc import BLOCK_NUMBER, SLOT
+from benchmarks.rpc_suite import EVM_ADDRESS, SOLANA_ADDRESS
+
+KEY = BalanceCache.make_key("ethereum", "0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045")
+
+
+def balance(native: str) -> NetworkBalance:
+    return NetworkBalance(network="Ethereum", chain_id=1, native_token="ETH", native_balance=native,
+                          native_balance_formatted=native)
+
+
+def test_waiter_fetches_again_when_leader_is_cancelled():
+    async def test():
+        cache = BalanceCache(ttl_blocks=100)
+        started = asyncio.Event()
+        fetches = []
+
+        async def slow_fetch():
+            fetches.append("leader")
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fetch():
+            fetches.append("waiter")
+            return balance("1"), None
+
+        leader = asyncio.ensure_future(cache.get_or_fetch(KEY, slow_fetch))
+        await started.wait()
+        waiter = asyncio.ensure_future(cache.get_or_fetch(KEY, fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert (await waiter).native_balance == "1"
+        assert leader.cancelled()
+        assert fetches == ["leader", "waiter"]
+        assert cache.get(KEY).native_balance == "1"
+
+    asyncio.run(test())
+
+
+def test_cancelled_waiter_is_cancelled():
+    async def test():
+        cache = BalanceCache(ttl_blocks=100)
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return balance("1"), None
+
+        leader = asyncio.ensure_future(cache.get_or_fetch(KEY, fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_fetch(KEY, fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        release.set()
+        assert (await leader).native_balance == "1"
+
+    asyncio.run(test())
+
+
+def test_value_is_tagged_with_block_it_was_read_at():
+    async def test():
+        cache = BalanceCache(ttl_blocks=100)
+        cache.observe_head("ethereum", 100)
+
+        async def fetch():
+            # The read itself reports the block it saw
+            cache.observe_head("ethereum", 101)
+            return balance("1"), 101
+
+        await cache.get_or_fetch(KEY, fetch)
+        assert cache.get(KEY).native_balance == "1"
+
+        async def unknown_block_fetch():
+            # Another request sees the next block while this read, which reports no block, is in flight
+            cache.observe_head("ethereum", 102)
+            return balance("2"), None
+
+        cache.clear()
+        await cache.get_or_fetch(KEY, unknown_block_fetch)
+        assert cache.get(KEY) is None
+
+        cache.set(KEY, balance("2"), cache.head("ethereum"))
+        assert cache.get(KEY).native_balance == "2"
+        cache.observe_head("ethereum", 103)
+        assert cache.get(KEY) is None
+
+    asyncio.run(test())
+
+
+@pytest.mark.parametrize("address, method, discover", [
+    (EVM_ADDRESS, "eth_call", False),
+    (SOLANA_ADDRESS, "getMultipleAccounts", False),
+    (SOLANA_ADDRESS, "getTokenAccountsByOwner", True),
+])
+def test_repeated_query_at_same_head_is_served_from_cache(mock_node, address, method, discover):
+    async def test():
+        registry = ClientRegistry(cache=BalanceCache())
+        await registry.start(prewarm=False)
+        try:
+            for _ in range(3):
+                await query_balances(registry, [address], evm_keys=["ethereum"], discover=discover)
+            return registry.cache
+        finally:
+            await registry.close()
+
+    cache = asyncio.run(test())
+    network_key = "ethereum" if address == EVM_ADDRESS else "solana"
+    assert cache.head(network_key) == (BLOCK_NUMBER if network_key == "ethereum" else SLOT)
+    assert (cache.misses, cache.hits) == (1, 2)
+    # Discovery reads both token programs; every other query is one batch
+    assert mock_node.methods[method] == (2 if discover else 1)
@@ -0,0 +1,153 @@
+"""Multicall3 aggregate3 encoding against eth_abi, and batching through the mock node"""
+
+import asyncio
+
+import pytest
+from eth_abi import decode, encode
+
+from app.cache import BalanceCache, NegativeCache
+from app.chains import evm_async
+from app.chains.multicall import (
+    AGGREGATE3_SELECTOR,
+    BALANCE_OF_SELECTOR,
+    build_balance_calls,
+    chunk_calls,
+    decode_aggregate3,
+    decode_uint256,
+    encode_aggregate3,
+    encode_balance_of,
+)
+from app.chains.registry import ClientRegistry
+from app.config import MULTICALL3_ADDRESS
+from app.planner import query_balances
+from benchmarks.mock_rpc import BLOCK_NUMBER, GET_ETH_BALANCE_SELECTOR, _RPCFailure, amount_for
+from benchmarks.rpc_suite import EVM_ADDRESS
+
+OWNER = bytes.fromhex(EVM_ADDRESS[2:])
+TOKENS = [bytes([index]) * 20 for index in range(1, 4)]
+
+
+@pytest.mark.parametrize("calls", [
+    [],
+    build_balance_calls(MULTICALL3_ADDRESS, EVM_ADDRESS, TOKENS),
+    # Empty and unaligned calldata, raw and hex targets
+    [(TOKENS[0], b""), ("0x" + TOKENS[1].hex(), b"\x01" * 33), (TOKENS[2], BALANCE_OF_SELECTOR)],
+])
+def test_encode_aggregate3_matches_eth_abi(calls):
+    data = bytes.fromhex(encode_aggregate3(calls)[2:])
+    assert data[:4] == AGGREGATE3_SELECTOR
+
+    expected = [("0x" + (target.hex() if isinstance(target, bytes) else target[2:].lower()), True, calldata)
+                for target, calldata in calls]
+    assert data[4:] == encode(["(address,bool,bytes)[]"], [expected])
+    (decoded,) = decode(["(address,bool,bytes)[]"], data[4:])
+    assert [(target.lower(), allow_failure, calldata) for target, allow_failure, calldata in decoded] == expected
+
+
+@pytest.mark.parametrize("results", [
+    [],
+    [(True, encode(["uint256"], [2 ** 256 - 1]))],
+    # Reverted sub-calls, with and without revert data, between successful ones
+    [(True, encode(["uint256"], [7])), (False, b""), (False, b"\x08\xc3\x79\xa0" + encode(["string"], ["nope"])),
+     (True, b"\x01" * 5), (True, encode(["uint256"], [0]))],
+])
+def test_decode_aggregate3_matches_eth_abi(results):
+    data = encode(["(bool,bytes)[]"], [results])
+    assert decode_aggregate3(data) == results
+
+
+def test_decode_uint256_of_reverted_and_short_results():
+    decoded = [decode_uint256(success, data) for success, data in [
+        (True, encode(["uint256"], [42])), (False, encode(["uint256"], [42])), (True, b"\x01" * 31)
+    ]]
+    assert decoded == [42, None, None]
+
+
+def test_decode_aggregate3_rejects_truncated_data():
+    data = encode(["(bool,bytes)[]"], [[(True, encode(["uint256"], [1]))]])
+    with pytest.raises(ValueError):
+        decode_aggregate3(data[:-32])
+    with pytest.raises(ValueError):
+        decode_aggregate3(data[:40])
+
+
+@pytest.mark.parametrize("chunk_size", [-1, 0, 1, 2, 5, 6])
+def test_chunk_calls(chunk_size):
+    calls = [(token, b"") for token in TOKENS * 2]
+    chunks = list(chunk_calls(calls, chunk_size))
+    assert all(0 < len(chunk) <= max(1, chunk_size) for chunk in chunks)
+    assert [call for chunk in chunks for call in chunk] == calls
+
+
+@pytest.mark.parametrize("chunk_size", [0, 2, 500])
+def test_aggregate3_through_mock_node(mock_node, monkeypatch, chunk_size):
+    monkeypatch.setattr(evm_async, "MULTICALL_CHUNK_SIZE", chunk_size)
+    reverting = b"\xee" * 20
+    subcall = mock_node._evm_subcall
+    monkeypatch.setattr(mock_node, "_evm_subcall",
+                        lambda target, data: (False, b"") if target == reverting else subcall(target, data))
+
+    calls = build_balance_calls(MULTICALL3_ADDRESS, EVM_ADDRESS, [TOKENS[0], reverting, TOKENS[1]])
+    calls.append((TOKENS[2], b"\x12\x34\x56\x78"))
+
+    async def test():
+        registry = ClientRegistry()
+        await registry.start(prewarm=False)
+        try:
+            return await registry.evm("ethereum").aggregate3(calls)
+        finally:
+            await registry.close()
+
+    results, block_number = asyncio.run(test())
+    assert results == [
+        amount_for(OWNER, b"native"), amount_for(OWNER, TOKENS[0]), None, amount_for(OWNER, TOKENS[1]), None
+    ]
+    assert block_number == BLOCK_NUMBER
+    assert mock_node.methods["eth_call"] == -(-len(calls) // max(1, chunk_size))
+
+
+@pytest.mark.parametrize("use_multicall", [True, False])
+def test_failed_native_read_fails_the_address(mock_node, monkeypatch, use_multicall):
+    failing = "0x" + "ab" * 20
+    subcall = mock_node._evm_subcall
+    get_balance = mock_node._rpc_eth_getBalance
+
+    def evm_subcall(target, data):
+        if data[:4].hex() == GET_ETH_BALANCE_SELECTOR and data[16:36].hex() == failing[2:]:
+            return False, b""
+        # The wallet holds no token, so a recorded read would mark them all empty
+        return (True, bytes(32)) if data[16:36].hex() == failing[2:] else subcall(target, data)
+
+    def rpc_get_balance(params):
+        if params[0].lower() == failing:
+            raise _RPCFailure(-32000, "header not found")
+        return get_balance(params)
+
+    monkeypatch.setattr(mock_node, "_evm_subcall", evm_subcall)
+    monkeypatch.setattr(mock_node, "_rpc_eth_getBalance", rpc_get_balance)
+
+    async def test():
+        registry = ClientRegistry(cache=BalanceCache())
+        await registry.start(prewarm=False)
+        try:
+            client = registry.evm("ethereum")
+            client.use_multicall = use_multicall
+            client.negative_cache = NegativeCache(ttls={"ethereum": 60})
+            balances, _ = await client.fetch_selected_balances_many([failing, EVM_ADDRESS], [0, 1])
+            for _ in range(2):
+                await query_balances(registry, [failing], evm_keys=["ethereum"], tokens="USDT")
+            return balances, client.negative_cache, registry.cache
+        finally:
+            await registry.close()
+
+    (failed, balance), negative_cache, cache = asyncio.run(test())
+    assert isinstance(failed, Exception)
+    assert balance.native_balance == str(amount_for(OWNER, b"native"))
+    assert negative_cache.probes("ethereum", failing, 2) is None
+    # Nothing was cached for the failed address, so the second query read it again
+    assert (cache.misses, cache.hits) == (2, 0)
+
+
+def test_balance_of_calldata():
+    assert encode_balance_of(EVM_ADDRESS) == BALANCE_OF_SELECTOR + encode(["address"], [EVM_ADDRESS])
+    assert encode_balance_of(OWNER) == encode_balance_of(EVM_ADDRESS)
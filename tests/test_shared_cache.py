@@ -0,0 +1,148 @@
+"""Shared memory-mapped balance table: slots, eviction, torn writes and chain heads"""
+
+import fcntl
+import multiprocessing
+import time
+
+import pytest
+
+from app.cache import BalanceCache
+from app.models import NetworkBalance
+from app.shared_cache import HEAD, HEADS_OFFSET, NETWORK_INDEX, SLOT_HEADER, SLOTS_OFFSET, WAYS, SharedBalanceCache, SharedMemoryStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "balance-tracker.cache")
+
+
+def fingerprints_in_bucket(store: SharedMemoryStore, count: int) -> list:
+    return [store.buckets * index + 1 for index in range(count)]
+
+
+def test_get_set(path):
+    store = SharedMemoryStore(path, slots=64, slot_size=256)
+    expires_at = time.time() + 60
+    assert store.set(1, b"payload", expires_at, head=100) is False
+
+    assert store.get(1, min_head=100) == (b"payload", expires_at)
+    assert store.get(2, min_head=100) is None
+    # Stored at an older head than the reader has seen
+    assert store.get(1, min_head=101) is None
+
+    store.set(1, b"replaced", expires_at, head=101)
+    assert store.get(1, min_head=101) == (b"replaced", expires_at)
+
+    store.set(3, b"expired", time.time() - 1, head=100)
+    assert store.get(3, min_head=100) is None
+    assert store.set(4, b"x" * 256, expires_at, head=100) is None
+
+
+def test_shared_between_open_tables(path):
+    writer = SharedMemoryStore(path, slots=64, slot_size=256)
+    reader = SharedMemoryStore(path, slots=64, slot_size=256)
+    writer.set(1, b"payload", time.time() + 60, head=5)
+    assert reader.get(1, min_head=5)[0] == b"payload"
+
+    with pytest.raises(ValueError):
+        SharedMemoryStore(path, slots=128, slot_size=256)
+
+
+def test_eviction_prefers_expired_then_soonest_expiring(path):
+    store = SharedMemoryStore(path, slots=64, slot_size=256)
+    now = time.time()
+    first, *others, extra = fingerprints_in_bucket(store, WAYS + 1)
+    store.set(first, b"soonest", now + 10, head=1)
+    for index, fp in enumerate(others):
+        store.set(fp, b"later", now + 100 + index, head=1)
+
+    # The bucket is full of live entries: the soonest to expire makes room
+    assert store.set(extra, b"new", now + 60, head=1) is True
+    assert store.get(first, min_head=1) is None
+    assert store.get(extra, min_head=1)[0] == b"new"
+    assert all(store.get(fp, min_head=1) for fp in others)
+
+    # An expired slot is reused without evicting a live entry
+    store.set(others[0], b"expired", now - 1, head=1)
+    assert store.set(first, b"back", now + 60, head=1) is False
+    assert all(store.get(fp, min_head=1) for fp in (first, extra, *others[1:]))
+
+
+def test_torn_write_reads_as_miss(path):
+    store = SharedMemoryStore(path, slots=64, slot_size=256)
+    fp = 1
+    store.set(fp, b"old payload", time.time() + 60, head=1)
+    offset = SLOTS_OFFSET + (fp % store.buckets) * WAYS * store.slot_size
+
+    # A writer stopped after the payload, before the header (and its CRC) was rewritten
+    start = offset + SLOT_HEADER.size
+    store._mmap[start:start + 11] = b"new payload"
+    assert store.get(fp, min_head=1) is None
+
+    # A writer stopped halfway through the header: new length, old CRC
+    store.set(fp, b"old payload", time.time() + 60, head=1)
+    slot_fp, expires_at, head, length, crc = SLOT_HEADER.unpack_from(store._mmap, offset)
+    SLOT_HEADER.pack_into(store._mmap, offset, slot_fp, expires_at, head, length - 1, crc)
+    assert store.get(fp, min_head=1) is None
+
+
+def _observe_heads(path: str, heads: list):
+    store = SharedMemoryStore(path, slots=64, slot_size=256)
+    for head in heads:
+        store.observe_head("ethereum", head)
+    store.close()
+
+
+def test_head_never_moves_backwards(path):
+    store = SharedMemoryStore(path, slots=64, slot_size=256)
+    store.observe_head("ethereum", 10)
+    store.observe_head("ethereum", 9)
+    assert store.head("ethereum") == 10
+    assert store.head("polygon") == -1
+
+    # Workers racing to publish interleaved heads end at the newest one
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_observe_heads, args=(path, list(range(100 + worker, 20000, 4))))
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert store.head("ethereum") == 19999
+
+
+def test_head_update_waits_for_the_lock(path):
+    store = SharedMemoryStore(path, slots=64, slot_size=256)
+    offset = HEADS_OFFSET + NETWORK_INDEX["ethereum"] * HEAD.size
+    worker = multiprocessing.get_context("fork").Process(target=_observe_heads, args=(path, [50]))
+
+    fcntl.lockf(store._fd, fcntl.LOCK_EX, HEAD.size, offset)
+    try:
+        worker.start()
+        worker.join(0.3)
+        assert worker.is_alive()
+        assert store.head("ethereum") == -1
+    finally:
+        fcntl.lockf(store._fd, fcntl.LOCK_UN, HEAD.size, offset)
+    worker.join()
+    assert store.head("ethereum") == 50
+
+
+def test_cache_shares_values_and_heads(path):
+    key = BalanceCache.make_key("ethereum", "0xd8dA6BF26964aF9D7eEd9e03E53415D37aA96045")
+    value = NetworkBalance(network="Ethereum", chain_id=1, native_token="ETH", native_balance="1",
+                           native_balance_formatted="0.000000000000000001")
+    first = SharedBalanceCache(path, slots=64, slot_size=1024)
+    second = SharedBalanceCache(path, slots=64, slot_size=1024)
+
+    first.observe_head("ethereum", 100)
+    first.set(key, value, first.head("ethereum"))
+    assert second.get(key) == value
+    assert second.shared_hits == 1
+
+    # A newer head seen by one worker invalidates the entry for every worker
+    first.observe_head("ethereum", 101)
+    assert second.get(key) is None
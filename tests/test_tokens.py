@@ -0,0 +1,97 @@
+"""Token registry over a compiled token list: lookups by binary search in the table"""
+
+import json
+import os
+import struct
+
+import pytest
+from solders.pubkey import Pubkey
+
+from app.tokens import POPULAR_TOKENS, SOLANA_POPULAR_TOKENS, SOLANA_NETWORK, TokenRegistry
+from app.tokens.tokenlist import SOLANA_CHAIN_ID, TokenTable, open_token_table
+
+USDT = POPULAR_TOKENS["ethereum"][0]["address"]
+USDC_MINT = SOLANA_POPULAR_TOKENS[0]["mint"]
+
+
+def evm_address(index: int) -> str:
+    return "0x" + (index * 7919).to_bytes(20, "big").hex()
+
+
+def token_list() -> list:
+    tokens = [
+        # A popular token listed under another symbol, and a symbol shared with a popular token
+        {"chainId": 1, "address": USDT.lower(), "symbol": "TETHER", "name": "Listed USDT", "decimals": 6},
+        {"chainId": 1, "address": evm_address(1000), "symbol": "usdt", "name": "Copycat", "decimals": 6},
+        {"chainId": 101, "address": USDC_MINT, "symbol": "LISTEDUSDC", "name": "Listed USDC", "decimals": 6},
+        {"chainId": 101, "address": str(Pubkey(bytes(31) + b"\x07")), "symbol": "Mint", "name": "Mint", "decimals": 9},
+    ]
+    # Shuffled addresses and repeated, mixed-case symbols
+    tokens += [
+        {"chainId": 1, "address": evm_address(index), "symbol": ["Dup", "DUP", f"t{index}"][index % 3],
+         "name": f"Token {index}", "decimals": 18}
+        for index in range(300, 0, -1)
+    ]
+    return tokens
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps({"tokens": token_list()}))
+    return TokenRegistry(POPULAR_TOKENS, SOLANA_POPULAR_TOKENS, open_token_table(str(path)))
+
+
+def test_lookups_match_a_scan(registry):
+    for network_key in ("ethereum", SOLANA_NETWORK):
+        tokens = list(registry.for_network(network_key))
+        for token in tokens:
+            found = registry.by_address(network_key, token.address)
+            assert (found.symbol, found.address) == (token.symbol, token.address)
+            first = next(t for t in tokens if t.symbol.upper() == token.symbol.upper())
+            assert registry.by_symbol(network_key, token.symbol.lower()).address == first.address
+
+
+def test_popular_tokens_win(registry):
+    assert registry.by_address("ethereum", USDT.lower()).name == "Tether USD"
+    assert registry.by_symbol("ethereum", "usdt").address == USDT
+    # Listed again under another symbol: the row is skipped, so the symbol is unknown
+    assert registry.by_symbol("ethereum", "TETHER") is None
+    assert registry.by_symbol(SOLANA_NETWORK, "listedusdc") is None
+    assert registry.by_symbol("ethereum", "dup").name == "Token 300"
+
+
+def test_only_looked_up_tokens_are_kept(registry):
+    popular = len(registry._by_symbol), len(registry._by_address)
+    assert registry.by_symbol("ethereum", "T5").address.lower() == evm_address(5)
+    assert registry.by_address("ethereum", evm_address(7)).symbol == "DUP"
+    assert registry.by_symbol("ethereum", "missing") is None
+    assert (len(registry._by_symbol), len(registry._by_address)) == (popular[0] + 1, popular[1] + 1)
+
+
+@pytest.mark.parametrize("network_key, address", [
+    ("ethereum", "USDT"), ("ethereum", "0x1234"), ("ethereum", "0x" + "zz" * 20), ("ethereum", evm_address(5000)),
+    (SOLANA_NETWORK, "USDT"), (SOLANA_NETWORK, "0x" + "11" * 20), (SOLANA_NETWORK, str(Pubkey(bytes(32)))),
+    ("unknown", evm_address(1)),
+])
+def test_unknown_addresses(registry, network_key, address):
+    assert registry.by_address(network_key, address) is None
+
+
+def test_outdated_compiled_table_is_rebuilt(tmp_path):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps({"tokens": token_list()}))
+    table = open_token_table(str(path))
+    compiled = table.path
+    table.close()
+
+    with open(compiled, "r+b") as f:
+        f.seek(4)
+        f.write(struct.pack("<H", 1))
+    with pytest.raises(ValueError):
+        TokenTable(compiled)
+    os.utime(compiled, (os.path.getmtime(path) + 1,) * 2)
+
+    table = open_token_table(str(path))
+    assert table.find_address("ethereum", bytes.fromhex(evm_address(1)[2:])) is not None
+    table.close()
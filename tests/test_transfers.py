@@ -0,0 +1,189 @@
+"""Transfer-log tracking: cursor persistence and recovery from failed reads"""
+
+import asyncio
+
+import pytest
+
+from app.chains.registry import ClientRegistry
+from app.chains.transfers import CursorStore, TransferLogTracker
+from app.chains.evm_async import TRANSFER_TOPIC
+from app.tokens import TOKENS
+from app.validators import normalize_address
+from app.watchlist import Watchlist
+from benchmarks.mock_rpc import BLOCK_NUMBER, _RPCFailure, amount_for
+from benchmarks.rpc_suite import EVM_ADDRESS
+
+WALLET = normalize_address(EVM_ADDRESS)
+TOKEN_INDEX = 2
+TOKEN = TOKENS.for_network("ethereum")[TOKEN_INDEX]
+
+
+def transfer_log(token: str, to: bytes) -> dict:
+    return {
+        "address": token.lower(),
+        "topics": [TRANSFER_TOPIC, "0x" + "00" * 12 + "11" * 20, "0x" + "00" * 12 + to.hex()],
+        "data": "0x" + "00" * 31 + "01",
+        "removed": False
+    }
+
+
+class Chain:
+    """Head and Transfer logs served by the mock node, changed by the test"""
+
+    def __init__(self, mock_node, monkeypatch):
+        self.head = BLOCK_NUMBER
+        self.logs = []
+        self.fail_from = None
+        self.ranges = set()
+        monkeypatch.setattr(mock_node, "_rpc_eth_blockNumber", lambda params: hex(self.head))
+        monkeypatch.setattr(mock_node, "_rpc_eth_getLogs", self.get_logs)
+
+    def get_logs(self, params):
+        start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        if self.fail_from is not None and start >= self.fail_from:
+            raise _RPCFailure(-32005, "query timeout exceeded")
+        self.ranges.add((start, end))
+        return self.logs
+
+
+@pytest.fixture
+def chain(mock_node, monkeypatch):
+    return Chain(mock_node, monkeypatch)
+
+
+def run(test):
+    async def with_registry():
+        registry = ClientRegistry()
+        await registry.start(prewarm=False)
+        try:
+            return await test(registry)
+        finally:
+            await registry.close()
+
+    return asyncio.run(with_registry())
+
+
+def poll(cursors: CursorStore, block_range: int = 1000, confirmations: int = 0):
+    async def test(registry):
+        tracker = TransferLogTracker(registry.evm("ethereum"), cursors, block_range=block_range,
+                                     confirmations=confirmations)
+        return await tracker.poll({WALLET.raw: WALLET})
+
+    return run(test)
+
+
+def test_cursor_resumes_after_restart(chain, tmp_path):
+    path = str(tmp_path / "cursors.json")
+    cursors = CursorStore(path)
+    # Unknown history: every holder is re-read and the cursor starts at the head
+    assert poll(cursors) is None
+    assert cursors.get("ethereum") == BLOCK_NUMBER
+    cursors.flush()
+
+    chain.head = BLOCK_NUMBER + 10
+    chain.logs = [transfer_log(TOKEN.address, WALLET.raw)]
+    restarted = CursorStore(path)
+    assert poll(restarted) == {WALLET: {TOKEN_INDEX}}
+    assert chain.ranges == {(BLOCK_NUMBER + 1, BLOCK_NUMBER + 10)}
+    restarted.flush()
+
+    assert CursorStore(path).get("ethereum") == BLOCK_NUMBER + 10
+
+
+def test_unconfirmed_blocks_are_left_for_a_later_poll(chain):
+    cursors = CursorStore("")
+    assert poll(cursors, confirmations=3) is None
+    assert cursors.get("ethereum") == BLOCK_NUMBER - 3
+
+    # Only blocks at least 3 below the head are read, so a reorg near the tip is never skipped
+    chain.head = BLOCK_NUMBER + 2
+    chain.logs = [transfer_log(TOKEN.address, WALLET.raw)]
+    assert poll(cursors, confirmations=3) == {WALLET: {TOKEN_INDEX}}
+    assert chain.ranges == {(BLOCK_NUMBER - 2, BLOCK_NUMBER - 1)}
+    assert cursors.get("ethereum") == BLOCK_NUMBER - 1
+
+    # No newly confirmed block: nothing is read and the cursor stays
+    chain.ranges.clear()
+    assert poll(cursors, confirmations=3) == {}
+    assert chain.ranges == set()
+    assert cursors.get("ethereum") == BLOCK_NUMBER - 1
+
+
+def test_cursor_stops_at_failed_range(chain):
+    cursors = CursorStore("")
+    cursors.set("ethereum", BLOCK_NUMBER)
+    chain.head = BLOCK_NUMBER + 12
+    chain.logs = [transfer_log(TOKEN.address, WALLET.raw)]
+    chain.fail_from = BLOCK_NUMBER + 5
+
+    # The first range is reported; the cursor stays before the range that failed
+    assert poll(cursors, block_range=4) == {WALLET: {TOKEN_INDEX}}
+    assert cursors.get("ethereum") == BLOCK_NUMBER + 4
+
+    chain.fail_from = None
+    chain.ranges.clear()
+    poll(cursors, block_range=4)
+    assert chain.ranges == {(BLOCK_NUMBER + 5, BLOCK_NUMBER + 8), (BLOCK_NUMBER + 9, BLOCK_NUMBER + 12)}
+    assert cursors.get("ethereum") == BLOCK_NUMBER + 12
+
+
+def test_cursor_does_not_move_when_first_range_fails(chain):
+    cursors = CursorStore("")
+    cursors.set("ethereum", BLOCK_NUMBER)
+    chain.head = BLOCK_NUMBER + 3
+    chain.fail_from = BLOCK_NUMBER + 1
+
+    with pytest.raises(Exception):
+        poll(cursors)
+    assert cursors.get("ethereum") == BLOCK_NUMBER
+
+
+@pytest.mark.parametrize("failure", ["sub-call", "request"])
+def test_failed_partial_read_forces_full_read(chain, mock_node, monkeypatch, failure):
+    token = bytes.fromhex(TOKEN.address[2:])
+    subcall = mock_node._evm_subcall
+    eth_call = mock_node._rpc_eth_call
+    failing = {"on": False}
+
+    def token_subcall(target, data):
+        if failing["on"] and target == token:
+            return False, b""
+        return subcall(target, data)
+
+    def any_call(params):
+        if failing["on"]:
+            raise _RPCFailure(-32000, "header not found")
+        return eth_call(params)
+
+    if failure == "sub-call":
+        monkeypatch.setattr(mock_node, "_evm_subcall", token_subcall)
+    else:
+        monkeypatch.setattr(mock_node, "_rpc_eth_call", any_call)
+
+    async def test(registry):
+        watchlist = Watchlist(registry, cursors=CursorStore(""), transfer_tracking=True)
+        watchlist.add(EVM_ADDRESS)
+        await watchlist.refresh("ethereum")
+        snapshot = watchlist._snapshots["ethereum"][WALLET]
+        assert snapshot.values is not None
+        checked_at = snapshot.checked_at
+
+        # A Transfer touches the wallet, but re-reading the token fails
+        chain.head += 1
+        chain.logs = [transfer_log(TOKEN.address, WALLET.raw)]
+        failing["on"] = True
+        await watchlist.refresh("ethereum")
+        assert snapshot.values is None
+        assert snapshot.checked_at == checked_at
+        assert watchlist.stats()["networks"]["ethereum"]["errors"] == 1
+
+        # The logs are consumed, yet the next tick re-reads the whole wallet
+        chain.head += 1
+        chain.logs = []
+        failing["on"] = False
+        await watchlist.refresh("ethereum")
+        assert snapshot.values is not None
+        assert snapshot.checked_at > checked_at
+        assert snapshot.values[TOKEN_INDEX + 1] == amount_for(WALLET.raw, token)
+
+    run(test)